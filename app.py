@@ -1,10 +1,12 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, send_file
+from flask import Flask, Response, render_template, request, jsonify, session, redirect, url_for, send_file, stream_with_context, make_response
 import os
+import hashlib
+import io
 import csv
-import shutil
 from datetime import datetime
 from functools import wraps
 from database import db_manager
+from metrics import Metrics
 
 app = Flask(__name__)
 app.secret_key = os.urandom(24)
@@ -12,6 +14,26 @@ app.secret_key = os.urandom(24)
 # Initialize database
 db_manager.init_db()
 
+# Close the per-request database connection
+app.teardown_appcontext(db_manager.close_request_connection)
+
+# Per-endpoint request metrics and database counters at /metrics
+metrics = Metrics(app, db_manager)
+
+@app.after_request
+def add_query_headers(response):
+    """
+    In debug mode, report the request's SQL statement count and time.
+
+    For streamed responses (CSV exports) the headers only cover the
+    statements run before streaming started.
+    """
+    if app.debug:
+        stats = db_manager.query_log.current()
+        response.headers['X-DB-Queries'] = str(stats.queries)
+        response.headers['X-DB-Time'] = f'{stats.ms:.1f}ms'
+    return response
+
 def login_required(f):
     """Decorator to require login."""
     @wraps(f)
@@ -21,6 +43,41 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# Changes on every restart so ETags from a previous process never match
+_ETAG_EPOCH = os.urandom(4).hex()
+
+def etag_versioned(f):
+    """
+    Decorator for read endpoints: strong ETag from the data version.
+
+    The ETag folds in db_manager.get_data_signature(), today's date (for
+    endpoints that default to the current month) and the request path and
+    query. A matching If-None-Match gets 304 Not Modified before the view
+    runs, so unchanged pages cost no database work.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        source = '|'.join([
+            _ETAG_EPOCH,
+            db_manager.get_data_signature(),
+            datetime.now().strftime('%Y-%m-%d'),
+            request.full_path
+        ])
+        etag = hashlib.sha1(source.encode()).hexdigest()
+
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag)
+        # Let browsers keep the body but revalidate on every fetch
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return decorated_function
+
 @app.route('/')
 def index():
     """Redirect to login or loans page."""
@@ -83,17 +140,51 @@ def out_of_pocket():
 
 # API Endpoints
 
+def _limit_arg():
+    """Read the optional limit (page size) argument; ValueError unless it is a whole number >= 1."""
+    value = request.args.get('limit') or None
+    if value is None:
+        return None
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError('limit must be a whole number of at least 1') from None
+    if limit < 1:
+        raise ValueError('limit must be a whole number of at least 1')
+    return limit
+
 @app.route('/api/loans', methods=['GET'])
 @login_required
+@etag_versioned
 def api_get_loans():
-    """Get all loans with optional filters."""
+    """
+    Get loans with optional filters.
+
+    Optional paging: limit, cursor (next_cursor from the previous page),
+    sort (created_at / outstanding_principal / given_date / monthly_rate),
+    order (asc / desc) and fields (comma-separated projection).
+    """
     status = request.args.get('status')
     search = request.args.get('search')
-    loans = db_manager.get_loans(status, search)
+    fields = request.args.get('fields')
+
+    try:
+        loans = db_manager.get_loans(
+            status, search,
+            limit=_limit_arg(),
+            cursor=request.args.get('cursor'),
+            sort=request.args.get('sort', 'created_at'),
+            order=request.args.get('order', 'desc'),
+            fields=[f.strip() for f in fields.split(',') if f.strip()] if fields else None
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     return jsonify(loans)
 
 @app.route('/api/loans/summary', methods=['GET'])
 @login_required
+@etag_versioned
 def api_get_loans_summary():
     """Get summary statistics for loans."""
     summary = db_manager.get_loans_summary()
@@ -125,6 +216,7 @@ def api_create_loan():
 
 @app.route('/api/loans/<int:loan_id>', methods=['GET'])
 @login_required
+@etag_versioned
 def api_get_loan(loan_id):
     """Get a specific loan."""
     loan = db_manager.get_loan_by_id(loan_id)
@@ -175,6 +267,7 @@ def api_close_loan(loan_id):
 
 @app.route('/api/loans/<int:loan_id>/interest-due', methods=['GET'])
 @login_required
+@etag_versioned
 def api_get_interest_due(loan_id):
     """Calculate interest due for a specific month."""
     interest_month = request.args.get('month')
@@ -221,6 +314,7 @@ def api_add_payment():
 
 @app.route('/api/payments/<int:loan_id>', methods=['GET'])
 @login_required
+@etag_versioned
 def api_get_payments(loan_id):
     """Get all payments for a loan."""
     payments = db_manager.get_payments_by_loan(loan_id)
@@ -228,13 +322,24 @@ def api_get_payments(loan_id):
 
 @app.route('/api/borrowers', methods=['GET'])
 @login_required
+@etag_versioned
 def api_get_borrowers():
     """Get all borrowers."""
     borrowers = db_manager.get_borrowers()
     return jsonify(borrowers)
 
+@app.route('/api/borrowers/search', methods=['GET'])
+@login_required
+@etag_versioned
+def api_search_borrowers():
+    """Typeahead search of borrowers by name or phone (?q=...&limit=10)."""
+    query = request.args.get('q', '')
+    limit = request.args.get('limit', 10, type=int)
+    return jsonify(db_manager.search_borrowers(query, limit))
+
 @app.route('/api/person-history/<borrower_name>', methods=['GET'])
 @login_required
+@etag_versioned
 def api_get_person_history(borrower_name):
     """Get person history."""
     history = db_manager.get_person_history(borrower_name)
@@ -242,6 +347,7 @@ def api_get_person_history(borrower_name):
 
 @app.route('/api/recent-payments', methods=['GET'])
 @login_required
+@etag_versioned
 def api_get_recent_payments():
     """Get recent payments for all borrowers."""
     months = int(request.args.get('months', 3))
@@ -250,6 +356,7 @@ def api_get_recent_payments():
 
 @app.route('/api/monthly-report', methods=['GET'])
 @login_required
+@etag_versioned
 def api_get_monthly_report():
     """Get monthly report."""
     report_month = request.args.get('month')
@@ -258,55 +365,75 @@ def api_get_monthly_report():
     report = db_manager.get_monthly_report(report_month, include_closed)
     return jsonify(report)
 
+def _export_args():
+    """Read and validate the status / from / to export filters."""
+    status = request.args.get('status') or None
+    date_from = request.args.get('from') or None
+    date_to = request.args.get('to') or None
+    for value in (date_from, date_to):
+        if value:
+            datetime.strptime(value, '%Y-%m-%d')
+    return status, date_from, date_to
+
+def _csv_response(rows, filename):
+    """
+    Stream rows (header first) as a CSV download without building the file in memory.
+
+    The header is only written once there is a data row, so an empty export is
+    an empty file, as it was when exports were written to /tmp.
+    """
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        data = iter(rows)
+        header = next(data, None)
+        for row in data:
+            if header is not None:
+                writer.writerow(header)
+                header = None
+            writer.writerow(row)
+            if buffer.tell() >= 16384:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
 @app.route('/api/export/loans', methods=['GET'])
 @login_required
 def api_export_loans():
-    """Export loans to CSV."""
-    loans = db_manager.get_loans()
-
-    # Create CSV
-    csv_path = '/tmp/loans_export.csv'
-    with open(csv_path, 'w', newline='') as csvfile:
-        if loans:
-            fieldnames = loans[0].keys()
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(loans)
+    """Export loans to CSV (optional status, from/to given_date filters)."""
+    try:
+        status, date_from, date_to = _export_args()
+    except ValueError:
+        return jsonify({'error': 'from/to must be in YYYY-MM-DD format'}), 400
 
-    return send_file(csv_path, as_attachment=True, download_name=f'loans_{datetime.now().strftime("%Y%m%d")}.csv')
+    rows = db_manager.iter_loans_export(status, date_from, date_to)
+    return _csv_response(rows, f'loans_{datetime.now().strftime("%Y%m%d")}.csv')
 
 @app.route('/api/export/payments', methods=['GET'])
 @login_required
 def api_export_payments():
-    """Export all payments to CSV."""
-    conn = db_manager.get_db_connection()
-    cursor = conn.execute('''
-        SELECT p.*, b.name as borrower_name
-        FROM payments p
-        JOIN loans l ON p.loan_id = l.id
-        JOIN borrowers b ON l.borrower_id = b.id
-        ORDER BY p.payment_date DESC
-    ''')
-    payments = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-
-    # Create CSV
-    csv_path = '/tmp/payments_export.csv'
-    with open(csv_path, 'w', newline='') as csvfile:
-        if payments:
-            fieldnames = payments[0].keys()
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(payments)
-
-    return send_file(csv_path, as_attachment=True, download_name=f'payments_{datetime.now().strftime("%Y%m%d")}.csv')
+    """Export payments to CSV (optional loan status, from/to payment_date filters)."""
+    try:
+        status, date_from, date_to = _export_args()
+    except ValueError:
+        return jsonify({'error': 'from/to must be in YYYY-MM-DD format'}), 400
+
+    rows = db_manager.iter_payments_export(status, date_from, date_to)
+    return _csv_response(rows, f'payments_{datetime.now().strftime("%Y%m%d")}.csv')
 
 @app.route('/api/backup', methods=['GET'])
 @login_required
 def api_backup_database():
     """Backup database."""
     backup_path = f'/tmp/lending_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.db'
-    shutil.copy(db_manager.DB_PATH, backup_path)
+    db_manager.backup_database(backup_path)
     return send_file(backup_path, as_attachment=True)
 
 @app.route('/api/restore', methods=['POST'])
@@ -320,20 +447,25 @@ def api_restore_database():
     if file.filename == '':
         return jsonify({'success': False, 'error': 'No file selected'}), 400
 
+    upload_path = f'/tmp/lending_restore_{datetime.now().strftime("%Y%m%d_%H%M%S")}.db'
     try:
-        # Save backup of current database
-        backup_path = f'{db_manager.DB_PATH}.backup'
-        shutil.copy(db_manager.DB_PATH, backup_path)
+        file.save(upload_path)
 
-        # Restore from uploaded file
-        file.save(db_manager.DB_PATH)
+        # Copies the current database to DB_PATH.backup first and puts it back on failure
+        db_manager.restore_database(upload_path)
 
         return jsonify({'success': True})
     except Exception as e:
-        # Restore backup if something went wrong
-        if os.path.exists(backup_path):
-            shutil.copy(backup_path, db_manager.DB_PATH)
         return jsonify({'success': False, 'error': str(e)}), 400
+    finally:
+        if os.path.exists(upload_path):
+            os.remove(upload_path)
+
+@app.route('/api/diagnostics/db', methods=['GET'])
+@login_required
+def api_db_diagnostics():
+    """Get the SQLite settings in effect and connection stats."""
+    return jsonify(db_manager.get_db_settings())
 
 # ============================================================================
 # INDIVIDUAL CHIT MANAGEMENT (Borrower-specific chits with monthly schedules)
@@ -341,12 +473,20 @@ def api_restore_database():
 
 @app.route('/api/chits', methods=['GET'])
 @login_required
+@etag_versioned
 def api_get_individual_chits():
     """Get all individual chits with optional status filter."""
     status = request.args.get('status')
     chits = db_manager.get_individual_chits(status)
     return jsonify(chits)
 
+@app.route('/api/chits/dashboard', methods=['GET'])
+@login_required
+@etag_versioned
+def api_get_chits_dashboard():
+    """Get chit summary totals (active count, current month dues, pending, paid)."""
+    return jsonify(db_manager.get_chits_dashboard())
+
 @app.route('/api/chits', methods=['POST'])
 @login_required
 def api_create_individual_chit():
@@ -368,8 +508,31 @@ def api_create_individual_chit():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
 
+@app.route('/api/chits/bulk', methods=['POST'])
+@login_required
+def api_create_individual_chits_bulk():
+    """
+    Create many individual chits at once (e.g. importing a chit roster).
+
+    Body: {"chits": [...]} with the same fields as POST /api/chits. Rows that
+    fail are reported in 'errors' by index; the other rows are still created.
+    """
+    data = request.json or {}
+    chits = data.get('chits') if isinstance(data, dict) else data
+
+    if not isinstance(chits, list):
+        return jsonify({'success': False, 'error': 'chits must be a list'}), 400
+
+    try:
+        result = db_manager.create_individual_chits_bulk(chits)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    return jsonify({'success': True, **result})
+
 @app.route('/api/chits/<int:chit_id>', methods=['GET'])
 @login_required
+@etag_versioned
 def api_get_individual_chit(chit_id):
     """Get a specific individual chit with schedule."""
     chit = db_manager.get_individual_chit_by_id(chit_id)
@@ -410,9 +573,23 @@ def api_close_individual_chit(chit_id):
 
 @app.route('/api/pending-chit-dues', methods=['GET'])
 @login_required
+@etag_versioned
 def api_get_pending_chit_dues():
-    """Get all pending chit dues."""
-    dues = db_manager.get_pending_chit_dues()
+    """
+    Get pending chit dues with count and totals.
+
+    Optional from / to (YYYY-MM-DD due date, to defaults to today) and
+    borrower_id filters.
+    """
+    try:
+        dues = db_manager.get_pending_chit_dues(
+            from_date=request.args.get('from') or None,
+            to_date=request.args.get('to') or None,
+            borrower_id=request.args.get('borrower_id', type=int)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     return jsonify(dues)
 
 @app.route('/api/chit-schedule/<int:schedule_id>/pay', methods=['POST'])
@@ -435,9 +612,24 @@ def api_pay_chit_schedule(schedule_id):
 
 @app.route('/api/out-of-pocket-payments', methods=['GET'])
 @login_required
+@etag_versioned
 def api_get_out_of_pocket_payments():
-    """Get all out-of-pocket chit payments."""
-    payments = db_manager.get_out_of_pocket_payments()
+    """
+    Get out-of-pocket chit payments.
+
+    Optional from / to (YYYY-MM-DD paid date) filters; limit and cursor page
+    through the results newest first.
+    """
+    try:
+        payments = db_manager.get_out_of_pocket_payments(
+            from_date=request.args.get('from') or None,
+            to_date=request.args.get('to') or None,
+            limit=_limit_arg(),
+            cursor=request.args.get('cursor')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     return jsonify(payments)
 
 @app.route('/api/chit-adjustments', methods=['POST'])
@@ -479,6 +671,7 @@ def api_create_chit_adjustment():
 # Chit Group Management
 @app.route('/api/chit-groups', methods=['GET'])
 @login_required
+@etag_versioned
 def api_get_chit_groups():
     """Get all chit groups."""
     status = request.args.get('status')
@@ -504,6 +697,7 @@ def api_create_chit_group():
 
 @app.route('/api/chit-groups/<int:chit_id>', methods=['GET'])
 @login_required
+@etag_versioned
 def api_get_chit_group(chit_id):
     """Get a specific chit group."""
     chit_group = db_manager.get_chit_group_by_id(chit_id)
@@ -544,6 +738,7 @@ def api_close_chit_group(chit_id):
 # Borrower-Chit Links
 @app.route('/api/borrower-chit-links', methods=['GET'])
 @login_required
+@etag_versioned
 def api_get_borrower_chit_links():
     """Get borrower-chit links."""
     borrower_id = request.args.get('borrower_id', type=int)
@@ -581,6 +776,7 @@ def api_delete_borrower_chit_link(borrower_id, chit_id):
 # Adjustments (Interest → Chit)
 @app.route('/api/adjustments', methods=['GET'])
 @login_required
+@etag_versioned
 def api_get_adjustments():
     """Get adjustments with filters."""
     borrower_id = request.args.get('borrower_id', type=int)
@@ -609,8 +805,35 @@ def api_create_adjustment():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
 
+@app.route('/api/adjustments/auto-allocate', methods=['POST'])
+@login_required
+def api_auto_allocate_adjustments():
+    """
+    Allocate available interest to remaining chit dues, oldest first.
+
+    Body: {"from_month", "to_month", optional "borrower_id", "chit_id",
+    "notes" and "dry_run"}. With dry_run the planned adjustments are returned
+    without being created; otherwise they are all created in one transaction.
+    """
+    data = request.json or {}
+
+    try:
+        result = db_manager.auto_allocate_interest(
+            from_month=data.get('from_month'),
+            to_month=data.get('to_month'),
+            borrower_id=int(data['borrower_id']) if data.get('borrower_id') else None,
+            chit_id=int(data['chit_id']) if data.get('chit_id') else None,
+            dry_run=bool(data.get('dry_run', False)),
+            notes=data.get('notes', 'Auto allocation')
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    return jsonify({'success': True, **result})
+
 @app.route('/api/adjustments/<int:adjustment_id>', methods=['GET'])
 @login_required
+@etag_versioned
 def api_get_adjustment(adjustment_id):
     """Get a specific adjustment."""
     adjustment = db_manager.get_adjustment_by_id(adjustment_id)
@@ -618,6 +841,38 @@ def api_get_adjustment(adjustment_id):
         return jsonify(adjustment)
     return jsonify({'error': 'Adjustment not found'}), 404
 
+@app.route('/api/adjustments/bulk-reverse', methods=['POST'])
+@login_required
+def api_bulk_reverse_adjustments():
+    """
+    Reverse many adjustments atomically.
+
+    Body: either {"adjustment_ids": [...]} or filters "borrower_id",
+    "chit_id", "chit_month", "interest_month_from", "interest_month_to";
+    optional "notes" and "reapply": {"interest_month", "chit_month"} to
+    re-create the reversed amounts on a corrected month. If any row fails,
+    nothing is changed.
+    """
+    data = request.json or {}
+    reapply = data.get('reapply') or {}
+
+    try:
+        result = db_manager.reverse_adjustments_bulk(
+            adjustment_ids=data.get('adjustment_ids'),
+            borrower_id=int(data['borrower_id']) if data.get('borrower_id') else None,
+            chit_id=int(data['chit_id']) if data.get('chit_id') else None,
+            chit_month=data.get('chit_month') or None,
+            interest_month_from=data.get('interest_month_from') or None,
+            interest_month_to=data.get('interest_month_to') or None,
+            notes=data.get('notes', ''),
+            reapply_interest_month=reapply.get('interest_month') or None,
+            reapply_chit_month=reapply.get('chit_month') or None
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    return jsonify({'success': True, **result})
+
 @app.route('/api/adjustments/<int:adjustment_id>/reverse', methods=['POST'])
 @login_required
 def api_reverse_adjustment(adjustment_id):
@@ -636,6 +891,7 @@ def api_reverse_adjustment(adjustment_id):
 # Direct Chit Payments
 @app.route('/api/direct-chit-payments', methods=['GET'])
 @login_required
+@etag_versioned
 def api_get_direct_chit_payments():
     """Get direct chit payments."""
     borrower_id = request.args.get('borrower_id', type=int)
@@ -668,6 +924,7 @@ def api_add_direct_chit_payment():
 # Calculations & Views
 @app.route('/api/interest-view/<int:borrower_id>/<interest_month>', methods=['GET'])
 @login_required
+@etag_versioned
 def api_get_interest_view(borrower_id, interest_month):
     """Get interest calculations for a borrower + month."""
     try:
@@ -678,6 +935,7 @@ def api_get_interest_view(borrower_id, interest_month):
 
 @app.route('/api/chit-month-view/<int:borrower_id>/<int:chit_id>/<chit_month>', methods=['GET'])
 @login_required
+@etag_versioned
 def api_get_chit_month_view(borrower_id, chit_id, chit_month):
     """Get chit calculations for a borrower + chit + month."""
     try:
@@ -686,8 +944,38 @@ def api_get_chit_month_view(borrower_id, chit_id, chit_month):
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
+@app.route('/api/chit-grid', methods=['GET'])
+@login_required
+@etag_versioned
+def api_get_chit_grid():
+    """
+    Get due / paid / remaining / status for every linked borrower, chit and month.
+
+    Query: from, to (YYYY-MM, default the last 12 months), optional chit_id and borrower_id.
+    """
+    from dateutil.relativedelta import relativedelta
+
+    to_month = request.args.get('to') or datetime.now().strftime('%Y-%m')
+    from_month = request.args.get('from')
+    if not from_month:
+        try:
+            from_month = (datetime.strptime(to_month, '%Y-%m') - relativedelta(months=11)).strftime('%Y-%m')
+        except ValueError:
+            return jsonify({'error': 'Months must be in YYYY-MM format'}), 400
+
+    try:
+        grid = db_manager.get_chit_grid(
+            from_month, to_month,
+            chit_id=request.args.get('chit_id', type=int),
+            borrower_id=request.args.get('borrower_id', type=int)
+        )
+        return jsonify(grid)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
 @app.route('/api/borrower-chit-summary/<int:borrower_id>', methods=['GET'])
 @login_required
+@etag_versioned
 def api_get_borrower_chit_summary(borrower_id):
     """Get chit summary for a borrower."""
     try:
@@ -696,6 +984,18 @@ def api_get_borrower_chit_summary(borrower_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
+@app.route('/api/borrower-chit-summary', methods=['GET'])
+@login_required
+@etag_versioned
+def api_get_borrower_chit_summaries():
+    """Get chit contribution totals for every borrower (?all=1) or one (?borrower_id=)."""
+    borrower_id = request.args.get('borrower_id', type=int)
+    if request.args.get('all') != '1' and not borrower_id:
+        return jsonify({'error': 'Pass all=1 or borrower_id'}), 400
+
+    summaries = db_manager.get_borrower_chit_summaries(None if request.args.get('all') == '1' else borrower_id)
+    return jsonify(summaries)
+
 # Validation Helpers
 @app.route('/api/validate-adjustment', methods=['POST'])
 @login_required
@@ -710,40 +1010,10 @@ def api_validate_adjustment():
         chit_month = data['chit_month']
         amount = float(data['amount'])
 
-        # Get interest view
-        interest_view = db_manager.get_interest_month_view(borrower_id, interest_month)
-
-        # Get chit view
-        chit_view = db_manager.get_chit_month_view(borrower_id, chit_id, chit_month)
-
-        # Calculate max allowed
-        max_allowed = min(interest_view['interest_available'], chit_view['remaining_due'])
-
-        # Validation checks
-        errors = []
-
-        if not db_manager.is_borrower_linked_to_chit(borrower_id, chit_id):
-            errors.append('Borrower is not linked to this chit')
-
-        if amount <= 0:
-            errors.append('Amount must be positive')
-
-        if amount > interest_view['interest_available']:
-            errors.append(f'Insufficient interest available (₹{interest_view["interest_available"]:.2f})')
-
-        if amount > chit_view['remaining_due']:
-            errors.append(f'Amount exceeds remaining due (₹{chit_view["remaining_due"]:.2f})')
-
-        if chit_view['remaining_due'] == 0:
-            errors.append('Chit month is already fully paid')
-
-        return jsonify({
-            'valid': len(errors) == 0,
-            'errors': errors,
-            'interest_view': interest_view,
-            'chit_view': chit_view,
-            'max_allowed': max_allowed
-        })
+        # One read for the checks; creating the adjustment repeats it under the write lock
+        return jsonify(db_manager.validate_adjustment(
+            borrower_id, interest_month, chit_id, chit_month, amount
+        ))
 
     except Exception as e:
         return jsonify({'valid': False, 'errors': [str(e)]}), 400
@@ -0,0 +1,296 @@
+"""
+Generate a synthetic lending portfolio for benchmarks.
+
+Fills a new SQLite database (schema from database/schema.sql) with borrowers,
+loans, monthly payments, chit groups, borrower-chit links, adjustments,
+direct chit payments and individual chits with their schedules. The same
+seed, counts and end month always produce the same rows, so benchmark runs
+on different commits measure the same data. Payments run up to the current
+month by default, so reads that look back from today (recent payments,
+pending interest and dues) find data; pass --end-month to pin it.
+
+Usage (from the repository root):
+    python -m benchmarks.generate_data --db /tmp/bench.db
+    python -m benchmarks.generate_data --db /tmp/big.db --loans 50000 --payments 2000000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+from database import db_manager
+from database.loan_logic import month_index, month_from_index
+
+FIRST_NAMES = [
+    'Ravi', 'Lakshmi', 'Suresh', 'Priya', 'Arun', 'Kavitha', 'Murugan', 'Deepa',
+    'Senthil', 'Anitha', 'Karthik', 'Meena', 'Rajesh', 'Divya', 'Ganesh', 'Revathi',
+    'Vijay', 'Saranya', 'Mani', 'Geetha'
+]
+LAST_NAMES = [
+    'Kumar', 'Raman', 'Subramani', 'Krishnan', 'Natarajan', 'Pillai', 'Iyer',
+    'Selvam', 'Velu', 'Shankar', 'Mohan', 'Balaji'
+]
+PAYMENT_MODES = ['Cash', 'UPI', 'Bank Transfer', 'Cheque']
+
+DEFAULTS = {
+    'borrowers': 1000,
+    'loans': 2000,
+    'payments': 40000,
+    'chit_groups': 20,
+    'links': 500,
+    'adjustments': 5000,
+    'direct_payments': 1000,
+    'chits': 300,
+}
+
+# Executemany batch size for the large tables
+BATCH = 10000
+
+
+def generate(db_path, seed=42, end_month=None, **counts):
+    """
+    Create db_path and fill it with synthetic data.
+
+    Args:
+        db_path: Path of the database to create (must not exist)
+        seed: Random seed; same seed and counts give the same rows
+        end_month: YYYY-MM of the last month with payments (default: current month)
+        **counts: Row counts overriding DEFAULTS
+
+    Returns:
+        dict of table -> rows written
+    """
+    counts = {**DEFAULTS, **counts}
+    rng = random.Random(seed)
+    end_month = end_month or datetime.now().strftime('%Y-%m')
+    end = month_index(end_month)
+
+    db_manager.DB_PATH = db_path
+    db_manager.init_db()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA synchronous = OFF')
+    written = {}
+
+    # Borrowers
+    borrower_names = []
+    rows = []
+    for i in range(1, counts['borrowers'] + 1):
+        name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}'
+        borrower_names.append(name)
+        rows.append((i, name, f'9{rng.randrange(10 ** 9):09d}',
+                     db_manager.normalize_borrower_name(name)))
+    conn.executemany('INSERT INTO borrowers (id, name, phone, name_key) VALUES (?, ?, ?, ?)', rows)
+    written['borrowers'] = len(rows)
+
+    # Loans and their payments; payments are spread evenly over the loans and
+    # run monthly from the given month, which is set just far enough back for
+    # each loan to reach its share by end_month (months are only missed while
+    # there is room), so recent months have payments from most loans
+    loan_count = counts['loans']
+    per_loan, extra = divmod(counts['payments'], loan_count) if loan_count else (0, 0)
+
+    loans = []
+    loan_borrowers = []
+    payments = []
+    payment_total = 0
+
+    def flush_payments():
+        conn.executemany('''
+            INSERT INTO payments (loan_id, payment_date, interest_month, total_received,
+                                  interest_paid, principal_paid, payment_mode)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', payments)
+        payments.clear()
+
+    for loan_id in range(1, loan_count + 1):
+        borrower_id = rng.randint(1, counts['borrowers'])
+        principal = float(rng.choice([25000, 50000, 75000, 100000, 150000, 200000, 500000]))
+        rate = rng.choice([1.0, 1.5, 2.0, 2.5, 3.0])
+        due_day = rng.randint(1, 28)
+        wanted = per_loan + (1 if loan_id <= extra else 0)
+        given = end - (max(wanted, 1) - 1) - rng.randint(0, max(1, wanted // 8))
+        given_date = f'{month_from_index(given)}-{rng.randint(1, 28):02d}'
+        outstanding = principal
+        made = 0
+        month = given
+        while made < wanted and month <= end:
+            interest_due = round(outstanding * rate / 100, 2)
+            roll = rng.random()
+            # Missed month, unless the remaining months are all needed
+            if roll < 0.08 and end - month >= wanted - made:
+                month += 1
+                continue
+            interest = interest_due if roll > 0.18 else round(interest_due * rng.choice([0.25, 0.5, 0.75]), 2)
+            principal_paid = 0.0
+            # Principal is paid down to at most half, so every loan keeps running
+            if rng.random() < 0.05 and outstanding > principal / 2:
+                principal_paid = min(outstanding, round(principal * rng.choice([0.1, 0.25, 0.5]), 2))
+                outstanding = round(outstanding - principal_paid, 2)
+
+            interest_month = month_from_index(month)
+            payments.append((
+                loan_id, f'{interest_month}-{due_day:02d}', interest_month,
+                interest + principal_paid, interest, principal_paid,
+                rng.choice(PAYMENT_MODES)
+            ))
+            made += 1
+            month += 1
+
+        payment_total += made
+        closed = rng.random() < 0.05
+        closed_date = f'{month_from_index(min(month, end))}-28' if closed else None
+        loans.append((
+            loan_id, borrower_id, principal, max(outstanding, 0.0), rate, due_day, given_date,
+            'Closed' if closed else 'Active', closed_date, f'{given_date} 10:00:00'
+        ))
+        loan_borrowers.append(borrower_id)
+
+        if len(payments) >= BATCH:
+            flush_payments()
+
+    conn.executemany('''
+        INSERT INTO loans (id, borrower_id, principal_given, outstanding_principal, monthly_rate,
+                           interest_due_day, given_date, status, closed_date, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', loans)
+    flush_payments()
+    written['loans'] = len(loans)
+    written['payments'] = payment_total
+
+    # Chit groups
+    groups = []
+    for group_id in range(1, counts['chit_groups'] + 1):
+        start = end - rng.randint(6, 36)
+        closed = rng.random() < 0.2
+        closed_month = month_from_index(min(end, start + rng.randint(6, 30))) if closed else None
+        groups.append((group_id, f'Group {group_id}', float(rng.choice([1000, 2500, 5000, 10000])),
+                       month_from_index(start), 'Closed' if closed else 'Active', closed_month))
+    conn.executemany('''
+        INSERT INTO chit_groups (id, name, monthly_installment, start_month, status, closed_month)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', groups)
+    written['chit_groups'] = len(groups)
+
+    # Borrower-chit links (distinct pairs)
+    links = set()
+    max_links = min(counts['links'], counts['borrowers'] * len(groups))
+    while len(links) < max_links:
+        links.add((rng.randint(1, counts['borrowers']), rng.randint(1, len(groups))))
+    links = sorted(links)
+    conn.executemany('INSERT INTO borrower_chit_links (borrower_id, chit_id) VALUES (?, ?)', links)
+    written['borrower_chit_links'] = len(links)
+
+    def chit_month_for(group_id):
+        group = groups[group_id - 1]
+        last = month_index(group[5]) if group[5] else end
+        return month_from_index(rng.randint(month_index(group[3]), last))
+
+    # Adjustments and direct chit payments against linked chits
+    adjustments = []
+    direct = []
+    if links:
+        for _ in range(counts['adjustments']):
+            borrower_id, group_id = rng.choice(links)
+            chit_month = chit_month_for(group_id)
+            amount = round(groups[group_id - 1][2] * rng.choice([0.25, 0.5, 1.0]), 2)
+            adjustments.append((borrower_id, chit_month, group_id, chit_month, amount,
+                                'REVERSED' if rng.random() < 0.05 else 'ACTIVE'))
+        for _ in range(counts['direct_payments']):
+            borrower_id, group_id = rng.choice(links)
+            chit_month = chit_month_for(group_id)
+            direct.append((borrower_id, group_id, chit_month,
+                           round(groups[group_id - 1][2] * rng.choice([0.5, 1.0]), 2),
+                           f'{chit_month}-10', rng.choice(PAYMENT_MODES)))
+    conn.executemany('''
+        INSERT INTO adjustments (borrower_id, interest_month, chit_id, chit_month, amount, status)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', adjustments)
+    conn.executemany('''
+        INSERT INTO direct_chit_payments (borrower_id, chit_id, chit_month, amount, payment_date, payment_mode)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', direct)
+    written['adjustments'] = len(adjustments)
+    written['direct_chit_payments'] = len(direct)
+
+    # Individual chits with schedules; months up to end_month are mostly paid
+    end_date = f'{end_month}-28'
+    schedule = []
+    chit_adjustments = []
+    for chit_id in range(1, counts['chits'] + 1):
+        borrower_id = rng.randint(1, counts['borrowers'])
+        total_months = rng.choice([10, 12, 20, 25])
+        start_date = f'{month_from_index(end - rng.randint(0, 24))}-{rng.randint(1, 28):02d}'
+        amount = float(rng.choice([2000, 5000, 10000]))
+        conn.execute('''
+            INSERT INTO chits (id, borrower_id, borrower_name, chit_name, total_months, start_date, status)
+            VALUES (?, ?, ?, ?, ?, ?, 'Active')
+        ''', (chit_id, borrower_id, borrower_names[borrower_id - 1], f'Chit {chit_id}',
+              total_months, start_date))
+
+        for month_number, due_date in enumerate(db_manager._schedule_due_dates(start_date, total_months), 1):
+            paid, status, paid_date = 0.0, 'Pending', None
+            if due_date <= end_date and rng.random() < 0.8:
+                paid = amount if rng.random() < 0.85 else round(amount / 2, 2)
+                status = 'Paid' if paid >= amount else 'Partial'
+                paid_date = due_date
+            schedule.append((chit_id, month_number, due_date, amount, status, paid, paid_date))
+            if paid and loans and rng.random() < 0.3:
+                chit_adjustments.append((len(schedule), rng.randint(1, len(loans)),
+                                         due_date[:7], round(paid / 2, 2), due_date))
+
+    conn.executemany('''
+        INSERT INTO chit_monthly_schedule (chit_id, month_number, due_date, due_amount,
+                                           payment_status, paid_amount, paid_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', schedule)
+    # Schedule ids are 1..n in insertion order on a fresh database
+    conn.executemany('''
+        INSERT INTO chit_adjustments (chit_schedule_id, loan_id, interest_month, adjusted_amount, adjustment_date)
+        VALUES (?, ?, ?, ?, ?)
+    ''', chit_adjustments)
+    written['chits'] = counts['chits']
+    written['chit_monthly_schedule'] = len(schedule)
+    written['chit_adjustments'] = len(chit_adjustments)
+
+    conn.commit()
+    conn.close()
+
+    written['loan_month_ledger'] = db_manager.rebuild_loan_ledger()
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic lending portfolio database.')
+    parser.add_argument('--db', required=True, help='Database file to create')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--end-month', help='Last month with payments (YYYY-MM, default: current month)')
+    parser.add_argument('--overwrite', action='store_true', help='Replace --db if it exists')
+    for name, default in DEFAULTS.items():
+        parser.add_argument(f'--{name.replace("_", "-")}', type=int, default=default)
+    args = parser.parse_args(argv)
+
+    if os.path.abspath(args.db) == os.path.abspath(db_manager.DB_PATH):
+        parser.error('refusing to write synthetic data into the application database')
+    if os.path.exists(args.db):
+        if not args.overwrite:
+            parser.error(f'{args.db} exists (use --overwrite)')
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(args.db + suffix):
+                os.remove(args.db + suffix)
+
+    started = time.perf_counter()
+    written = generate(args.db, seed=args.seed, end_month=args.end_month,
+                       **{name: getattr(args, name) for name in DEFAULTS})
+
+    for table, rows in written.items():
+        print(f'{table:24} {rows:>10,}')
+    print(f'✓ Generated {args.db} in {time.perf_counter() - started:.1f}s')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""
+Time db_manager hot paths against a generated database.
+
+Each benchmark runs once to warm up and then --repeat times; min / median /
+mean / max wall times (ms) are written as JSON so runs on different commits
+can be compared with --compare. The result cache is off unless --with-cache
+is given, so the numbers measure the queries themselves.
+
+Usage (from the repository root):
+    python -m benchmarks.generate_data --db /tmp/bench.db
+    python -m benchmarks.run_benchmarks --db /tmp/bench.db --output before.json
+    python -m benchmarks.run_benchmarks --db /tmp/bench.db --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from database import db_manager
+from database.loan_logic import month_index
+
+# Loans / borrowers / links sampled per call for the per-item benchmarks
+SAMPLE_SIZE = 50
+
+
+def _last_payment_month(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        month = conn.execute('SELECT MAX(interest_month) FROM payments').fetchone()[0]
+    finally:
+        conn.close()
+    return month or datetime.now().strftime('%Y-%m')
+
+
+def _sample(conn, query, rng, size=SAMPLE_SIZE):
+    rows = [tuple(row) for row in conn.execute(query)]
+    return rng.sample(rows, min(size, len(rows)))
+
+
+def build_benchmarks(db_path, seed=42):
+    """
+    Benchmarks for the data in db_path.
+
+    Returns:
+        List of (name, function) pairs; each function does one unit of work
+    """
+    rng = random.Random(seed)
+    last_month = _last_payment_month(db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        loan_ids = [row[0] for row in _sample(conn, 'SELECT id FROM loans ORDER BY id', rng)]
+        all_active = [row[0] for row in conn.execute("SELECT id FROM loans WHERE status = 'Active'")]
+        names = [row[0] for row in _sample(conn, 'SELECT name FROM borrowers ORDER BY id', rng, 10)]
+        links = _sample(conn, '''
+            SELECT l.borrower_id, l.chit_id, g.start_month
+            FROM borrower_chit_links l JOIN chit_groups g ON g.id = l.chit_id
+            ORDER BY l.borrower_id, l.chit_id
+        ''', rng)
+    finally:
+        conn.close()
+
+    first_month = f'{int(last_month[:4]) - 1}{last_month[4:]}'
+    # Recent payments look back from today; reach the last three months with
+    # payments even when the database was generated with an older --end-month
+    recent_months = max(3, month_index(datetime.now().strftime('%Y-%m')) - month_index(last_month) + 3)
+
+    def each(items, call):
+        return lambda: [call(*item) if isinstance(item, tuple) else call(item) for item in items]
+
+    def drain(iterator):
+        return lambda: sum(1 for _ in iterator())
+
+    return [
+        ('monthly_report', lambda: db_manager.get_monthly_report(last_month)),
+        ('monthly_report_include_closed', lambda: db_manager.get_monthly_report(last_month, True)),
+        ('loans_summary', db_manager.get_loans_summary),
+        ('loans_page', lambda: db_manager.get_loans('Active', limit=50)),
+        ('loans_all', lambda: db_manager.get_loans('Active')),
+        ('pending_interest_per_loan', each([(loan_id, last_month) for loan_id in loan_ids],
+                                           db_manager.calculate_pending_interest)),
+        ('pending_interest_batch_all_active',
+         lambda: db_manager.calculate_pending_interest_batch(all_active, last_month)),
+        ('person_history', each(names, db_manager.get_person_history)),
+        ('recent_payments', lambda: db_manager.get_recent_payments_all(recent_months)),
+        ('chit_month_view', each([(b, c, last_month) for b, c, _ in links], db_manager.get_chit_month_view)),
+        ('interest_month_view', each([(b, last_month) for b, _, _ in links], db_manager.get_interest_month_view)),
+        ('chit_grid_12_months', lambda: db_manager.get_chit_grid(first_month, last_month)),
+        ('borrower_chit_summaries', db_manager.get_borrower_chit_summaries),
+        ('chits_dashboard', db_manager.get_chits_dashboard),
+        ('pending_chit_dues', db_manager.get_pending_chit_dues),
+        ('out_of_pocket_page', lambda: db_manager.get_out_of_pocket_payments(limit=100)),
+        ('export_loans', drain(db_manager.iter_loans_export)),
+        ('export_payments', drain(db_manager.iter_payments_export)),
+    ]
+
+
+def build_endpoint_benchmarks(report_month):
+    """Benchmarks that go through Flask (JSON/CSV formatting and streaming included)."""
+    import app as app_module
+
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['logged_in'] = True
+
+    def get(path):
+        def call():
+            response = client.get(path)
+            size = len(response.get_data())
+            response.close()
+            return size
+        return call
+
+    return [
+        ('endpoint_export_loans', get('/api/export/loans')),
+        ('endpoint_export_payments', get('/api/export/payments')),
+        ('endpoint_monthly_report', get(f'/api/monthly-report?month={report_month}')),
+    ]
+
+
+def run(benchmarks, repeat):
+    """Time each benchmark; returns {name: {min_ms, median_ms, mean_ms, max_ms, runs}}."""
+    results = {}
+    for name, call in benchmarks:
+        call()  # warm-up (page cache, ledger sync, prepared statements)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - started) * 1000)
+        results[name] = {
+            'min_ms': round(min(timings), 3),
+            'median_ms': round(statistics.median(timings), 3),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'max_ms': round(max(timings), 3),
+            'runs': repeat
+        }
+        print(f'{name:36} median {results[name]["median_ms"]:>10.2f} ms')
+    return results
+
+
+def table_counts(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {
+            table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+            for table in ('borrowers', 'loans', 'payments', 'chit_groups', 'borrower_chit_links',
+                          'adjustments', 'direct_chit_payments', 'chits', 'chit_monthly_schedule')
+        }
+    finally:
+        conn.close()
+
+
+def compare(previous, current):
+    """Print median change per benchmark against an earlier results file."""
+    print(f'\n{"benchmark":36} {"before":>10} {"after":>10} {"change":>8}')
+    for name, result in current['results'].items():
+        before = previous.get('results', {}).get(name)
+        if not before:
+            print(f'{name:36} {"-":>10} {result["median_ms"]:>10.2f} {"new":>8}')
+            continue
+        change = (result['median_ms'] - before['median_ms']) / before['median_ms'] * 100 \
+            if before['median_ms'] else 0.0
+        print(f'{name:36} {before["median_ms"]:>10.2f} {result["median_ms"]:>10.2f} {change:>+7.1f}%')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark db_manager hot paths.')
+    parser.add_argument('--db', required=True, help='Database created by benchmarks.generate_data')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42, help='Seed for sampled loans/borrowers')
+    parser.add_argument('--only', action='append', default=[],
+                        help='Run benchmarks whose name contains this text (repeatable)')
+    parser.add_argument('--with-cache', action='store_true', help='Leave the result cache on')
+    parser.add_argument('--no-endpoints', action='store_true', help='Skip the Flask endpoint benchmarks')
+    parser.add_argument('--output', help='Write JSON results here')
+    parser.add_argument('--compare', help='Earlier JSON results to compare against')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        parser.error(f'{args.db} does not exist (create it with benchmarks.generate_data)')
+
+    db_manager.DB_PATH = os.path.abspath(args.db)
+    if not args.with_cache:
+        db_manager.result_cache.ttl = 0
+    db_manager.init_db()
+
+    benchmarks = build_benchmarks(db_manager.DB_PATH, args.seed)
+    if not args.no_endpoints:
+        benchmarks += build_endpoint_benchmarks(_last_payment_month(db_manager.DB_PATH))
+    if args.only:
+        benchmarks = [(name, call) for name, call in benchmarks
+                      if any(text in name for text in args.only)]
+
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'db': db_manager.DB_PATH,
+            'rows': table_counts(db_manager.DB_PATH),
+            'repeat': args.repeat,
+            'seed': args.seed,
+            'result_cache': args.with_cache
+        },
+        'results': run(benchmarks, args.repeat)
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'\n✓ Results written to {args.output}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,29 @@
+-- BORROWER SEARCH INDEX
+-- FTS5 trigram index over borrower name and phone, used for substring search
+-- (replaces LIKE '%term%' scans) and typeahead. Applied by init_db() only when
+-- the SQLite build has FTS5 with the trigram tokenizer (3.34+).
+
+CREATE VIRTUAL TABLE IF NOT EXISTS borrowers_fts USING fts5(
+    name,
+    phone,
+    content='borrowers',
+    content_rowid='id',
+    tokenize='trigram'
+);
+
+-- Keep the index in sync with borrowers (external content table)
+CREATE TRIGGER IF NOT EXISTS trg_borrowers_fts_insert AFTER INSERT ON borrowers
+BEGIN
+    INSERT INTO borrowers_fts (rowid, name, phone) VALUES (NEW.id, NEW.name, NEW.phone);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_borrowers_fts_update AFTER UPDATE OF name, phone ON borrowers
+BEGIN
+    INSERT INTO borrowers_fts (borrowers_fts, rowid, name, phone) VALUES ('delete', OLD.id, OLD.name, OLD.phone);
+    INSERT INTO borrowers_fts (rowid, name, phone) VALUES (NEW.id, NEW.name, NEW.phone);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_borrowers_fts_delete AFTER DELETE ON borrowers
+BEGIN
+    INSERT INTO borrowers_fts (borrowers_fts, rowid, name, phone) VALUES ('delete', OLD.id, OLD.name, OLD.phone);
+END;
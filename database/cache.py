@@ -0,0 +1,137 @@
+"""
+RESULT CACHE
+In-process cache for report and summary reads
+
+Entries are keyed by the caller (function name plus arguments) and record the
+tables the result was read from. Write paths call invalidate() with the
+tables they touched, which drops only the entries that depend on them. The
+cache is bounded by an LRU size cap, and a TTL bounds how long a result can
+outlive writes made outside this process (e.g. the sqlite3 shell).
+
+Results are stored once in a read-only form (freeze()) and that same object
+is handed to every caller, so a hit costs a dict lookup however large the
+report is.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError('cached results are read-only; copy them before changing them')
+
+
+class FrozenDict(dict):
+    """dict that refuses changes; JSON-serializable like any dict."""
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+class FrozenList(list):
+    """list that refuses changes; JSON-serializable like any list."""
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = clear = extend = insert = pop = remove = reverse = sort = _read_only
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+
+def freeze(value):
+    """Read-only copy of value: dicts and lists (nested) become FrozenDict / FrozenList."""
+    if isinstance(value, dict):
+        return FrozenDict({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return FrozenList(freeze(item) for item in value)
+    if isinstance(value, tuple):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class ResultCache:
+    """Thread-safe LRU + TTL cache with per-table invalidation and counters."""
+
+    def __init__(self, max_entries=256, ttl=300):
+        """
+        Args:
+            max_entries: Most results kept; the least recently used is evicted
+            ttl: Seconds a result stays valid (0 disables caching)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires, tables, value)
+        self._lock = threading.Lock()
+        self._generation = 0  # bumped by every invalidation
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0, 'invalidated': 0}
+
+    def get_or_compute(self, key, tables, compute):
+        """
+        Return the cached result for key, or compute() and cache it.
+
+        The result is frozen (see freeze()) and every caller gets that same
+        read-only object; use dict()/list() copies to change it. A result is
+        not stored if an invalidation happened while it was being computed,
+        since it may already be out of date.
+
+        Args:
+            key: Hashable cache key
+            tables: Table names the result depends on
+            compute: Zero-argument function producing the result
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return entry[2]
+                del self._entries[key]
+                self._stats['expired'] += 1
+            self._stats['misses'] += 1
+            generation = self._generation
+
+        value = freeze(compute())
+
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return value
+
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (time.monotonic() + self.ttl, frozenset(tables), value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._stats['evictions'] += 1
+
+        return value
+
+    def invalidate(self, *tables):
+        """Drop entries that depend on any of the given tables (all entries if none given)."""
+        with self._lock:
+            self._generation += 1
+            if tables:
+                changed = set(tables)
+                stale = [key for key, entry in self._entries.items() if entry[1] & changed]
+            else:
+                stale = list(self._entries)
+            for key in stale:
+                del self._entries[key]
+            self._stats['invalidated'] += len(stale)
+
+    def stats(self):
+        """Counters (hits, misses, evictions, expired, invalidated) plus size, limits and hit rate."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['max_entries'] = self.max_entries
+        stats['ttl'] = self.ttl
+        return stats
@@ -5,8 +5,11 @@ India chit member + borrower interest adjustment
 All functions implement strict validation according to business rules.
 """
 
+import math
 from datetime import datetime
 
+from database.loan_logic import month_index, month_from_index
+
 
 # ============================================================================
 # CORE CALCULATION FUNCTIONS (used everywhere for consistency)
@@ -81,7 +84,11 @@ def calculate_chit_due(conn, borrower_id, chit_id, chit_month):
         WHERE id = ?
     ''', (chit_id,))
 
-    chit = cursor.fetchone()
+    return _chit_due(cursor.fetchone(), chit_month)
+
+
+def _chit_due(chit, chit_month):
+    """Chit due for a month given the chit group row (calculate_chit_due() rules)."""
     if not chit:
         return 0.0
 
@@ -149,7 +156,11 @@ def get_chit_month_status(conn, borrower_id, chit_id, chit_month):
     """
     remaining = calculate_chit_remaining_due(conn, borrower_id, chit_id, chit_month)
     adjusted_paid = calculate_chit_adjusted_paid(conn, borrower_id, chit_id, chit_month)
+    return _chit_month_status(remaining, adjusted_paid)
+
 
+def _chit_month_status(remaining, adjusted_paid):
+    """'Paid', 'Partial' or 'Unpaid' from remaining due and adjusted + paid."""
     if remaining == 0 and adjusted_paid > 0:
         return 'Paid'
     elif adjusted_paid > 0:
@@ -415,6 +426,125 @@ def has_active_loans(conn, borrower_id):
 # ADJUSTMENT CREATION & VALIDATION
 # ============================================================================
 
+def get_adjustment_context(conn, borrower_id, interest_month, chit_id, chit_month):
+    """
+    Read everything adjustment validation needs in one query.
+
+    A single statement sees one consistent snapshot: the borrower-chit link,
+    the chit group, the active-loan flag, interest received/adjusted for the
+    interest month and adjusted/paid for the chit month.
+
+    Returns:
+        dict with linked, has_active_loans, chit (dict or None),
+        interest_view and chit_view (same shapes as get_interest_month_view()
+        and get_chit_month_view())
+    """
+    row = conn.execute('''
+        SELECT
+            EXISTS (SELECT 1 FROM borrower_chit_links
+                    WHERE borrower_id = :borrower_id AND chit_id = :chit_id) as linked,
+            EXISTS (SELECT 1 FROM loans
+                    WHERE borrower_id = :borrower_id AND status = 'Active') as has_active_loans,
+            (SELECT SUM(p.interest_paid)
+             FROM payments p
+             JOIN loans l ON p.loan_id = l.id
+             WHERE l.borrower_id = :borrower_id
+               AND l.status = 'Active'
+               AND p.interest_month = :interest_month) as interest_received,
+            (SELECT SUM(amount) FROM adjustments
+             WHERE borrower_id = :borrower_id AND interest_month = :interest_month
+               AND status = 'ACTIVE') as interest_adjusted,
+            (SELECT SUM(amount) FROM adjustments
+             WHERE borrower_id = :borrower_id AND chit_id = :chit_id
+               AND chit_month = :chit_month AND status = 'ACTIVE') as chit_adjusted,
+            (SELECT SUM(amount) FROM direct_chit_payments
+             WHERE borrower_id = :borrower_id AND chit_id = :chit_id
+               AND chit_month = :chit_month) as chit_paid,
+            cg.id as chit_group_id,
+            cg.name,
+            cg.monthly_installment,
+            cg.start_month,
+            cg.status,
+            cg.closed_month
+        FROM (SELECT 1)
+        LEFT JOIN chit_groups cg ON cg.id = :chit_id
+    ''', {
+        'borrower_id': borrower_id,
+        'interest_month': interest_month,
+        'chit_id': chit_id,
+        'chit_month': chit_month
+    }).fetchone()
+
+    chit = None
+    if row['chit_group_id'] is not None:
+        chit = {
+            'id': row['chit_group_id'],
+            'name': row['name'],
+            'monthly_installment': row['monthly_installment'],
+            'start_month': row['start_month'],
+            'status': row['status'],
+            'closed_month': row['closed_month']
+        }
+
+    received = row['interest_received'] or 0.0
+    adjusted = row['interest_adjusted'] or 0.0
+
+    due = _chit_due(chit, chit_month)
+    adjusted_paid = (row['chit_adjusted'] or 0.0) + (row['chit_paid'] or 0.0)
+    remaining_due = max(0.0, due - adjusted_paid)
+
+    return {
+        'linked': bool(row['linked']),
+        'has_active_loans': bool(row['has_active_loans']),
+        'chit': chit,
+        'interest_view': {
+            'borrower_id': borrower_id,
+            'interest_month': interest_month,
+            'interest_received': received,
+            'interest_adjusted': adjusted,
+            'interest_available': received - adjusted
+        },
+        'chit_view': {
+            'borrower_id': borrower_id,
+            'chit_id': chit_id,
+            'chit_month': chit_month,
+            'due': due,
+            'adjusted_paid': adjusted_paid,
+            'remaining_due': remaining_due,
+            'status': _chit_month_status(remaining_due, adjusted_paid)
+        }
+    }
+
+
+def get_adjustment_warnings(context, amount):
+    """
+    Validation messages for the validate-before-submit UI.
+
+    Returns:
+        List of error strings (empty when the adjustment looks valid)
+    """
+    interest_view = context['interest_view']
+    chit_view = context['chit_view']
+    errors = []
+
+    if not context['linked']:
+        errors.append('Borrower is not linked to this chit')
+
+    if amount <= 0:
+        errors.append('Amount must be positive')
+
+    if amount > interest_view['interest_available']:
+        errors.append(f'Insufficient interest available (₹{interest_view["interest_available"]:.2f})')
+
+    if amount > chit_view['remaining_due']:
+        errors.append(f'Amount exceeds remaining due (₹{chit_view["remaining_due"]:.2f})')
+
+    if chit_view['remaining_due'] == 0:
+        errors.append('Chit month is already fully paid')
+
+    return errors
+
+
 def create_adjustment(conn, borrower_id, interest_month, chit_id, chit_month, amount, notes=''):
     """
     Create a new adjustment linking interest to chit payment.
@@ -454,12 +584,29 @@ def create_adjustment(conn, borrower_id, interest_month, chit_id, chit_month, am
     if amount <= 0:
         raise ValueError('Amount must be positive')
 
+    context = get_adjustment_context(conn, borrower_id, interest_month, chit_id, chit_month)
+    _check_adjustment(context, chit_month, amount)
+
+    # All validations passed - create adjustment
+    cursor = conn.execute('''
+        INSERT INTO adjustments (
+            borrower_id, interest_month, chit_id, chit_month,
+            amount, status, notes
+        ) VALUES (?, ?, ?, ?, ?, 'ACTIVE', ?)
+    ''', (borrower_id, interest_month, chit_id, chit_month, amount, notes))
+
+    conn.commit()
+    return cursor.lastrowid
+
+
+def _check_adjustment(context, chit_month, amount):
+    """Apply create_adjustment() rules 1-7 to a get_adjustment_context() result."""
     # Rule 1: Check borrower-chit link
-    if not is_borrower_linked_to_chit(conn, borrower_id, chit_id):
+    if not context['linked']:
         raise ValueError('Borrower is not linked to this chit group')
 
     # Rule 2: Check chit status and month validity
-    chit = get_chit_group_by_id(conn, chit_id)
+    chit = context['chit']
     if not chit:
         raise ValueError('Chit group not found')
 
@@ -471,11 +618,11 @@ def create_adjustment(conn, borrower_id, interest_month, chit_id, chit_month, am
         raise ValueError(f'Chit month cannot be before start month ({chit["start_month"]})')
 
     # Rule 3: Check for active loans
-    if not has_active_loans(conn, borrower_id):
+    if not context['has_active_loans']:
         raise ValueError('Borrower has no active loans')
 
     # Rule 5: Check available interest
-    available_interest = calculate_interest_available(conn, borrower_id, interest_month)
+    available_interest = context['interest_view']['interest_available']
     if available_interest < amount:
         raise ValueError(
             f'Insufficient interest available. '
@@ -483,7 +630,7 @@ def create_adjustment(conn, borrower_id, interest_month, chit_id, chit_month, am
         )
 
     # Rule 6 & 7: Check remaining chit due
-    remaining_due = calculate_chit_remaining_due(conn, borrower_id, chit_id, chit_month)
+    remaining_due = context['chit_view']['remaining_due']
     if remaining_due == 0:
         raise ValueError('Chit month is already fully paid')
 
@@ -493,16 +640,153 @@ def create_adjustment(conn, borrower_id, interest_month, chit_id, chit_month, am
             f'Remaining: ₹{remaining_due:.2f}, Requested: ₹{amount:.2f}'
         )
 
-    # All validations passed - create adjustment
-    cursor = conn.execute('''
+
+def _to_paise(amount):
+    """Whole paise in a rupee amount, rounded down (tolerates float noise such as 0.29999999)."""
+    return int(math.floor(amount * 100 + 1e-6))
+
+
+def plan_auto_allocation(conn, from_month, to_month, borrower_id=None, chit_id=None):
+    """
+    Work out interest -> chit adjustments for a month range, oldest first.
+
+    For each borrower, available interest from the interest months in the
+    range is applied in month order to the remaining due of their linked
+    chits, oldest chit month first (ties by chit ID). Chit dues come from
+    get_chit_grid(); interest received and already adjusted are each read
+    with one GROUP BY. Nothing is written.
+
+    Amounts are planned in whole paise, rounded down, so float leftovers
+    never produce a zero allocation and no allocation uses more interest or
+    due than is actually there.
+
+    Args:
+        from_month, to_month: Inclusive YYYY-MM range (interest and chit months)
+        borrower_id: Optional borrower filter
+        chit_id: Optional chit group filter
+
+    Returns:
+        dict with from_month, to_month, allocations (borrower_id,
+        borrower_name, interest_month, chit_id, chit_name, chit_month,
+        amount) and totals (count, amount, unallocated_interest, uncovered_due)
+
+    Raises:
+        ValueError: If the months are invalid or the range is too long
+    """
+    grid = get_chit_grid(conn, from_month, to_month, chit_id, borrower_id)
+
+    # Remaining dues per borrower, in the order they are paid off
+    dues = {}
+    names = {}
+    for row in grid['rows']:
+        # Same rule as create_adjustment(): a closed chit without a closed
+        # month takes no adjustments
+        if row['chit_status'] == 'Closed' and not row['closed_month']:
+            continue
+        names[row['borrower_id']] = row['borrower_name']
+        for cell in row['cells']:
+            remaining = _to_paise(cell['remaining_due'])
+            if remaining > 0:
+                dues.setdefault(row['borrower_id'], []).append([
+                    cell['chit_month'], row['chit_id'], row['chit_name'], remaining
+                ])
+
+    loan_filter = adjustment_filter = ''
+    params = [from_month, to_month]
+    if borrower_id:
+        loan_filter = ' AND l.borrower_id = ?'
+        adjustment_filter = ' AND borrower_id = ?'
+        params.append(borrower_id)
+
+    available = {}
+    cursor = conn.execute(f'''
+        SELECT l.borrower_id, p.interest_month, SUM(p.interest_paid) as total
+        FROM payments p
+        JOIN loans l ON p.loan_id = l.id
+        WHERE l.status = 'Active'
+          AND p.interest_month BETWEEN ? AND ?{loan_filter}
+        GROUP BY l.borrower_id, p.interest_month
+    ''', params)
+    for row in cursor:
+        available[(row['borrower_id'], row['interest_month'])] = row['total'] or 0.0
+
+    cursor = conn.execute(f'''
+        SELECT borrower_id, interest_month, SUM(amount) as total
+        FROM adjustments
+        WHERE status = 'ACTIVE'
+          AND interest_month BETWEEN ? AND ?{adjustment_filter}
+        GROUP BY borrower_id, interest_month
+    ''', params)
+    for row in cursor:
+        key = (row['borrower_id'], row['interest_month'])
+        if key in available:
+            available[key] -= row['total'] or 0.0
+
+    interest = {}
+    for (b_id, month), amount in sorted(available.items()):
+        amount = _to_paise(amount)
+        if b_id in dues and amount > 0:
+            interest.setdefault(b_id, []).append([month, amount])
+
+    allocations = []
+    unallocated = 0
+    uncovered = 0
+
+    for b_id in sorted(dues):
+        chit_dues = sorted(dues[b_id])
+        sources = interest.get(b_id, [])
+        d = 0
+
+        for source in sources:
+            while source[1] > 0 and d < len(chit_dues):
+                due = chit_dues[d]
+                amount = min(source[1], due[3])
+                allocations.append({
+                    'borrower_id': b_id,
+                    'borrower_name': names[b_id],
+                    'interest_month': source[0],
+                    'chit_id': due[1],
+                    'chit_name': due[2],
+                    'chit_month': due[0],
+                    'amount': amount / 100
+                })
+                source[1] -= amount
+                due[3] -= amount
+                if due[3] == 0:
+                    d += 1
+            unallocated += source[1]
+
+        uncovered += sum(due[3] for due in chit_dues[d:])
+
+    return {
+        'from_month': from_month,
+        'to_month': to_month,
+        'allocations': allocations,
+        'totals': {
+            'count': len(allocations),
+            'amount': round(sum((a['amount'] for a in allocations), 0.0), 2),
+            'unallocated_interest': unallocated / 100,
+            'uncovered_due': uncovered / 100
+        }
+    }
+
+
+def apply_auto_allocation(conn, plan, notes=''):
+    """
+    Insert the adjustments from a plan_auto_allocation() result.
+
+    The caller owns the transaction: plan and apply on the same connection
+    inside one write transaction so the plan cannot go stale in between.
+    """
+    conn.executemany('''
         INSERT INTO adjustments (
             borrower_id, interest_month, chit_id, chit_month,
             amount, status, notes
         ) VALUES (?, ?, ?, ?, ?, 'ACTIVE', ?)
-    ''', (borrower_id, interest_month, chit_id, chit_month, amount, notes))
-
-    conn.commit()
-    return cursor.lastrowid
+    ''', [
+        (a['borrower_id'], a['interest_month'], a['chit_id'], a['chit_month'], a['amount'], notes)
+        for a in plan['allocations']
+    ])
 
 
 # ============================================================================
@@ -574,6 +858,152 @@ def reverse_adjustment(conn, adjustment_id, notes=''):
     return reversal_id
 
 
+# Most adjustments one reverse_adjustments_bulk() call will reverse
+MAX_BULK_REVERSALS = 1000
+
+
+def reverse_adjustments_bulk(conn, adjustment_ids=None, borrower_id=None, chit_id=None,
+                             chit_month=None, interest_month_from=None, interest_month_to=None,
+                             notes='', reapply_interest_month=None, reapply_chit_month=None):
+    """
+    Reverse many adjustments at once, optionally re-applying them to a corrected month.
+
+    Adjustments are picked either by ID or by filter (filters only match
+    ACTIVE adjustments that are not themselves reversals). Each one gets the
+    same counter row and REVERSED status as reverse_adjustment(), written with
+    executemany. With reapply_interest_month and/or reapply_chit_month, a new
+    adjustment for the same borrower, chit and amount is then created on the
+    corrected month, checked with the create_adjustment() rules.
+
+    Nothing is committed: the caller runs this inside one write transaction
+    and rolls back if it raises, so either everything is applied or nothing.
+
+    Args:
+        conn: Database connection
+        adjustment_ids: Optional list of adjustment IDs (overrides the filters)
+        borrower_id, chit_id, chit_month: Optional filters
+        interest_month_from, interest_month_to: Optional inclusive YYYY-MM range
+        notes: Optional notes for the reversal (and re-applied) rows
+        reapply_interest_month, reapply_chit_month: Optional corrected months
+
+    Returns:
+        dict with reversed [{adjustment_id, reversal_id}], reapplied
+        [{adjustment_id, new_adjustment_id}], count and amount
+
+    Raises:
+        ValueError: If nothing selects the adjustments, an ID is missing or
+            already reversed, too many match, or a re-applied row fails validation
+    """
+    for month in (chit_month, interest_month_from, interest_month_to,
+                  reapply_interest_month, reapply_chit_month):
+        if month is not None:
+            try:
+                datetime.strptime(month, '%Y-%m')
+            except (TypeError, ValueError):
+                raise ValueError('Months must be in YYYY-MM format')
+
+    if adjustment_ids:
+        ids = list(dict.fromkeys(int(adjustment_id) for adjustment_id in adjustment_ids))
+        if len(ids) > MAX_BULK_REVERSALS:
+            raise ValueError(f'At most {MAX_BULK_REVERSALS} adjustments per request')
+
+        placeholders = ','.join('?' * len(ids))
+        found = {
+            row['id']: row for row in conn.execute(
+                f'SELECT * FROM adjustments WHERE id IN ({placeholders})', ids
+            )
+        }
+        for adjustment_id in ids:
+            if adjustment_id not in found:
+                raise ValueError(f'Adjustment #{adjustment_id} not found')
+            if found[adjustment_id]['status'] == 'REVERSED':
+                raise ValueError(f'Adjustment #{adjustment_id} is already reversed')
+        originals = [found[adjustment_id] for adjustment_id in ids]
+    else:
+        query = "SELECT * FROM adjustments WHERE status = 'ACTIVE' AND reversal_of_id IS NULL"
+        params = []
+        for column, op, value in (('borrower_id', '=', borrower_id),
+                                  ('chit_id', '=', chit_id),
+                                  ('chit_month', '=', chit_month),
+                                  ('interest_month', '>=', interest_month_from),
+                                  ('interest_month', '<=', interest_month_to)):
+            if value is not None:
+                query += f' AND {column} {op} ?'
+                params.append(value)
+
+        if not params:
+            raise ValueError('Give adjustment_ids or at least one filter')
+
+        originals = conn.execute(query + ' ORDER BY id', params).fetchall()
+        if len(originals) > MAX_BULK_REVERSALS:
+            raise ValueError(
+                f'{len(originals)} adjustments match; at most {MAX_BULK_REVERSALS} per request'
+            )
+
+    notes_suffix = f" - {notes}" if notes else ''
+
+    # Same counter row as reverse_adjustment(): months swapped
+    conn.executemany('''
+        INSERT INTO adjustments (
+            borrower_id, interest_month, chit_id, chit_month,
+            amount, status, reversal_of_id, notes
+        ) VALUES (?, ?, ?, ?, ?, 'ACTIVE', ?, ?)
+    ''', [
+        (row['borrower_id'], row['chit_month'], row['chit_id'], row['interest_month'],
+         row['amount'], row['id'], f"Reversal of adjustment #{row['id']}{notes_suffix}")
+        for row in originals
+    ])
+    conn.executemany(
+        "UPDATE adjustments SET status = 'REVERSED' WHERE id = ?",
+        [(row['id'],) for row in originals]
+    )
+
+    reversal_ids = {}
+    if originals:
+        ids = [row['id'] for row in originals]
+        cursor = conn.execute(f'''
+            SELECT reversal_of_id, MAX(id) as id
+            FROM adjustments
+            WHERE reversal_of_id IN ({','.join('?' * len(ids))})
+            GROUP BY reversal_of_id
+        ''', ids)
+        reversal_ids = {row['reversal_of_id']: row['id'] for row in cursor}
+
+    reapplied = []
+    if reapply_interest_month or reapply_chit_month:
+        for row in originals:
+            interest_month = reapply_interest_month or row['interest_month']
+            target_month = reapply_chit_month or row['chit_month']
+
+            # Read after the earlier inserts, so re-applied rows share the room
+            context = get_adjustment_context(
+                conn, row['borrower_id'], interest_month, row['chit_id'], target_month
+            )
+            try:
+                _check_adjustment(context, target_month, row['amount'])
+            except ValueError as e:
+                raise ValueError(f"Adjustment #{row['id']}: {e}")
+
+            cursor = conn.execute('''
+                INSERT INTO adjustments (
+                    borrower_id, interest_month, chit_id, chit_month,
+                    amount, status, notes
+                ) VALUES (?, ?, ?, ?, ?, 'ACTIVE', ?)
+            ''', (row['borrower_id'], interest_month, row['chit_id'], target_month,
+                  row['amount'], f"Re-applied from adjustment #{row['id']}{notes_suffix}"))
+            reapplied.append({'adjustment_id': row['id'], 'new_adjustment_id': cursor.lastrowid})
+
+    return {
+        'reversed': [
+            {'adjustment_id': row['id'], 'reversal_id': reversal_ids.get(row['id'])}
+            for row in originals
+        ],
+        'reapplied': reapplied,
+        'count': len(originals),
+        'amount': sum((row['amount'] for row in originals), 0.0)
+    }
+
+
 # ============================================================================
 # ADJUSTMENT QUERIES
 # ============================================================================
@@ -745,13 +1175,34 @@ def get_chit_month_view(conn, borrower_id, chit_id, chit_month):
     """
     Get complete view of a chit month for a borrower.
 
+    The chit group and both sums (ACTIVE adjustments, direct payments) are
+    read in one query; due / remaining / status follow the same rules as
+    calculate_chit_due(), calculate_chit_remaining_due() and
+    get_chit_month_status().
+
     Returns:
         dict with all calculations
     """
-    due = calculate_chit_due(conn, borrower_id, chit_id, chit_month)
-    adjusted_paid = calculate_chit_adjusted_paid(conn, borrower_id, chit_id, chit_month)
-    remaining_due = calculate_chit_remaining_due(conn, borrower_id, chit_id, chit_month)
-    status = get_chit_month_status(conn, borrower_id, chit_id, chit_month)
+    row = conn.execute('''
+        SELECT
+            cg.id as chit_group_id,
+            cg.monthly_installment,
+            cg.start_month,
+            cg.status,
+            cg.closed_month,
+            (SELECT SUM(amount) FROM adjustments
+             WHERE borrower_id = :borrower_id AND chit_id = :chit_id
+               AND chit_month = :chit_month AND status = 'ACTIVE') as total_adjusted,
+            (SELECT SUM(amount) FROM direct_chit_payments
+             WHERE borrower_id = :borrower_id AND chit_id = :chit_id
+               AND chit_month = :chit_month) as total_paid
+        FROM (SELECT 1)
+        LEFT JOIN chit_groups cg ON cg.id = :chit_id
+    ''', {'borrower_id': borrower_id, 'chit_id': chit_id, 'chit_month': chit_month}).fetchone()
+
+    due = _chit_due(row if row['chit_group_id'] is not None else None, chit_month)
+    adjusted_paid = (row['total_adjusted'] or 0.0) + (row['total_paid'] or 0.0)
+    remaining_due = max(0.0, due - adjusted_paid)
 
     return {
         'borrower_id': borrower_id,
@@ -760,7 +1211,112 @@ def get_chit_month_view(conn, borrower_id, chit_id, chit_month):
         'due': due,
         'adjusted_paid': adjusted_paid,
         'remaining_due': remaining_due,
-        'status': status
+        'status': _chit_month_status(remaining_due, adjusted_paid)
+    }
+
+
+# Longest month range get_chit_grid() will build
+MAX_GRID_MONTHS = 120
+
+
+def get_chit_grid(conn, from_month, to_month, chit_id=None, borrower_id=None):
+    """
+    Due / adjusted+paid / remaining / status for every linked borrower,
+    chit group and month in a range.
+
+    Adjustments and direct payments are each summed with one GROUP BY over
+    the range, then laid out per borrower-chit link in memory.
+
+    Args:
+        from_month, to_month: Inclusive YYYY-MM range
+        chit_id: Optional chit group filter
+        borrower_id: Optional borrower filter
+
+    Returns:
+        dict with from_month, to_month, months and rows; each row has the
+        link's borrower/chit details, one cell per month and row totals
+
+    Raises:
+        ValueError: If the months are invalid or the range is too long
+    """
+    try:
+        datetime.strptime(from_month, '%Y-%m')
+        datetime.strptime(to_month, '%Y-%m')
+    except (TypeError, ValueError):
+        raise ValueError('Months must be in YYYY-MM format')
+
+    start, end = month_index(from_month), month_index(to_month)
+    if end < start:
+        raise ValueError('to_month cannot be before from_month')
+    if end - start + 1 > MAX_GRID_MONTHS:
+        raise ValueError(f'Range cannot exceed {MAX_GRID_MONTHS} months')
+
+    months = [month_from_index(i) for i in range(start, end + 1)]
+    links = get_borrower_chit_links(conn, borrower_id, chit_id)
+
+    filters = ' AND chit_month BETWEEN ? AND ?'
+    params = [from_month, to_month]
+    if chit_id:
+        filters += ' AND chit_id = ?'
+        params.append(chit_id)
+    if borrower_id:
+        filters += ' AND borrower_id = ?'
+        params.append(borrower_id)
+
+    adjusted_paid = {}
+    for source in ("adjustments WHERE status = 'ACTIVE'", 'direct_chit_payments WHERE 1=1'):
+        cursor = conn.execute(f'''
+            SELECT borrower_id, chit_id, chit_month, SUM(amount) as total
+            FROM {source}{filters}
+            GROUP BY borrower_id, chit_id, chit_month
+        ''', params)
+        for row in cursor:
+            key = (row['borrower_id'], row['chit_id'], row['chit_month'])
+            adjusted_paid[key] = adjusted_paid.get(key, 0.0) + (row['total'] or 0.0)
+
+    rows = []
+    for link in links:
+        chit = {
+            'monthly_installment': link['monthly_installment'],
+            'start_month': link['start_month'],
+            'status': link['chit_status'],
+            'closed_month': link['closed_month']
+        }
+        cells = []
+        totals = {'due': 0.0, 'adjusted_paid': 0.0, 'remaining_due': 0.0}
+
+        for month in months:
+            due = _chit_due(chit, month)
+            paid = adjusted_paid.get((link['borrower_id'], link['chit_id'], month), 0.0)
+            remaining = max(0.0, due - paid)
+            cells.append({
+                'chit_month': month,
+                'due': due,
+                'adjusted_paid': paid,
+                'remaining_due': remaining,
+                'status': _chit_month_status(remaining, paid)
+            })
+            totals['due'] += due
+            totals['adjusted_paid'] += paid
+            totals['remaining_due'] += remaining
+
+        rows.append({
+            'borrower_id': link['borrower_id'],
+            'borrower_name': link['borrower_name'],
+            'chit_id': link['chit_id'],
+            'chit_name': link['chit_name'],
+            'monthly_installment': link['monthly_installment'],
+            'chit_status': link['chit_status'],
+            'closed_month': link['closed_month'],
+            'cells': cells,
+            'totals': totals
+        })
+
+    return {
+        'from_month': from_month,
+        'to_month': to_month,
+        'months': months,
+        'rows': rows
     }
 
 
@@ -791,37 +1347,77 @@ def get_borrower_chit_summary(conn, borrower_id):
     Returns:
         List of dict with chit details and totals
     """
-    # Get all chits linked to this borrower
-    links = get_borrower_chit_links(conn, borrower_id=borrower_id)
+    summaries = get_borrower_chit_summaries(conn, borrower_id=borrower_id)
+    for summary in summaries:
+        del summary['borrower_id']
+        del summary['borrower_name']
+    return summaries
 
-    summaries = []
-    for link in links:
-        chit_id = link['chit_id']
 
-        # Calculate total adjusted for this chit
-        cursor = conn.execute('''
-            SELECT SUM(amount) as total_adjusted
-            FROM adjustments
-            WHERE borrower_id = ? AND chit_id = ? AND status = 'ACTIVE'
-        ''', (borrower_id, chit_id))
+def get_borrower_chit_summaries(conn, borrower_id=None):
+    """
+    Get chit contribution totals for every borrower-chit link (or one borrower's).
 
-        total_adjusted = cursor.fetchone()['total_adjusted'] or 0.0
+    One query left-joins borrower_chit_links to adjustments (ACTIVE only) and
+    direct_chit_payments, each pre-aggregated per (borrower_id, chit_id).
 
-        # Calculate total direct payments
-        cursor = conn.execute('''
-            SELECT SUM(amount) as total_paid
-            FROM direct_chit_payments
-            WHERE borrower_id = ? AND chit_id = ?
-        ''', (borrower_id, chit_id))
+    Args:
+        borrower_id: Optional borrower filter (all links when None)
 
-        total_paid = cursor.fetchone()['total_paid'] or 0.0
+    Returns:
+        List of dict with borrower and chit details and totals,
+        ordered by borrower name then chit name
+    """
+    link_filter = ''
+    source_filter = ''
+    params = []
+    if borrower_id:
+        link_filter = ' WHERE bcl.borrower_id = ?'
+        source_filter = ' AND borrower_id = ?'
+        params = [borrower_id] * 3
+
+    cursor = conn.execute(f'''
+        SELECT
+            bcl.borrower_id,
+            b.name as borrower_name,
+            bcl.chit_id,
+            cg.name as chit_name,
+            cg.monthly_installment,
+            cg.start_month,
+            cg.status as chit_status,
+            a.total_adjusted,
+            d.total_paid
+        FROM borrower_chit_links bcl
+        JOIN borrowers b ON bcl.borrower_id = b.id
+        JOIN chit_groups cg ON bcl.chit_id = cg.id
+        LEFT JOIN (
+            SELECT borrower_id, chit_id, SUM(amount) as total_adjusted
+            FROM adjustments
+            WHERE status = 'ACTIVE'{source_filter}
+            GROUP BY borrower_id, chit_id
+        ) a ON a.borrower_id = bcl.borrower_id AND a.chit_id = bcl.chit_id
+        LEFT JOIN (
+            SELECT borrower_id, chit_id, SUM(amount) as total_paid
+            FROM direct_chit_payments
+            WHERE 1=1{source_filter}
+            GROUP BY borrower_id, chit_id
+        ) d ON d.borrower_id = bcl.borrower_id AND d.chit_id = bcl.chit_id
+        {link_filter}
+        ORDER BY b.name, cg.name
+    ''', params)
 
+    summaries = []
+    for row in cursor.fetchall():
+        total_adjusted = row['total_adjusted'] or 0.0
+        total_paid = row['total_paid'] or 0.0
         summaries.append({
-            'chit_id': chit_id,
-            'chit_name': link['chit_name'],
-            'monthly_installment': link['monthly_installment'],
-            'start_month': link['start_month'],
-            'chit_status': link['chit_status'],
+            'borrower_id': row['borrower_id'],
+            'borrower_name': row['borrower_name'],
+            'chit_id': row['chit_id'],
+            'chit_name': row['chit_name'],
+            'monthly_installment': row['monthly_installment'],
+            'start_month': row['start_month'],
+            'chit_status': row['chit_status'],
             'total_adjusted': total_adjusted,
             'total_paid': total_paid,
             'total_contributed': total_adjusted + total_paid
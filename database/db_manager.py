@@ -1,132 +1,689 @@
 import sqlite3
 import os
+import calendar
+import re
+import json
+import base64
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
+from functools import wraps
+from flask import g, has_app_context
 from werkzeug.security import generate_password_hash, check_password_hash
+from database import loan_logic
+from database.cache import ResultCache
+from database.query_log import QueryCursor, QueryLog
 
 DB_PATH = os.path.join(os.path.dirname(__file__), 'lending.db')
 
+def _setting(name, default):
+    """Read a database setting from the LENDING_DB_<NAME> environment variable."""
+    return os.environ.get(f'LENDING_DB_{name.upper()}', default)
+
+# Connection pragmas, applied in this order to every new connection.
+# WAL lets report reads run alongside payment writes; override any value
+# with LENDING_DB_<PRAGMA>, e.g. LENDING_DB_SYNCHRONOUS=FULL.
+DB_PRAGMAS = {
+    name: _setting(name, default)
+    for name, default in (
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'NORMAL'),
+        ('cache_size', '-16000'),      # negative = KiB, i.e. 16 MB
+        ('mmap_size', '67108864'),     # 64 MB
+        ('temp_store', 'MEMORY'),
+    )
+}
+
+# How long a connection waits on a lock before raising "database is locked"
+BUSY_TIMEOUT_MS = int(_setting('busy_timeout_ms', 5000))
+
+# Extra attempts for a write that still fails with "database is locked"
+WRITE_RETRIES = int(_setting('write_retries', 3))
+WRITE_RETRY_DELAY = float(_setting('write_retry_delay', 0.1))
+
+# Idle connections kept for callers outside a Flask request
+POOL_SIZE = int(_setting('pool_size', 4))
+
+# Report/summary results cached by _cached(); LENDING_DB_RESULT_CACHE_TTL=0 disables it
+RESULT_CACHE_SIZE = int(_setting('result_cache_size', 256))
+RESULT_CACHE_TTL = float(_setting('result_cache_ttl', 300))  # seconds
+
+# Statements at least this slow are logged with their query plan (0 disables);
+# LENDING_DB_SLOW_QUERY_LOG also writes the log to that file
+SLOW_QUERY_MS = float(_setting('slow_query_ms', 100))
+SLOW_QUERY_LOG = _setting('slow_query_log', None)
+
+# Shortest search term the trigram index can match; shorter terms fall back to LIKE
+BORROWER_SEARCH_MIN_LENGTH = 3
+
+# Set by init_db() when the FTS5 borrower search index is available
+_borrower_fts_enabled = False
+
+# Results of _cached() read functions, invalidated per table by _data_changed()
+result_cache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL)
+
+# Borrower name_key -> id, filled on lookup and cleared by _data_changed('borrowers')
+_borrower_id_cache = {}
+
+# Statement counts, rows and timings per request (see database/query_log.py)
+query_log = QueryLog(SLOW_QUERY_MS, SLOW_QUERY_LOG)
+
+# Bumped by _data_changed() on every write made through this module
+_write_version = 0
+
+_pool = []
+_pool_lock = threading.Lock()
+_thread_scope = threading.local()
+
+_connection_stats = {'opened': 0, 'closed': 0, 'reused': 0, 'pooled': 0, 'write_retries': 0}
+_stats_lock = threading.Lock()
+
+def _count(stat):
+    with _stats_lock:
+        _connection_stats[stat] += 1
+
+class _CountingConnection(sqlite3.Connection):
+    """sqlite3 connection that records closes and times statements through query_log."""
+
+    query_log = None
+
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = sqlite3.Cursor if self.query_log is None else QueryCursor
+        return super().cursor(factory)
+
+    # sqlite3.Connection.execute*() bypass cursor(), so route them through it
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def close(self):
+        _count('closed')
+        super().close()
+
 def get_db_connection():
-    """Create and return a database connection."""
-    conn = sqlite3.connect(DB_PATH)
+    """Create and return a new database connection.
+
+    Most callers should use db_connection() instead, which reuses the
+    request's (or thread's) connection.
+    """
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000,
+                           factory=_CountingConnection, check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    conn.db_path = DB_PATH
+    _apply_pragmas(conn)
+    conn.query_log = query_log
+    _count('opened')
     return conn
 
+def _apply_pragmas(conn):
+    conn.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+    for name, value in DB_PRAGMAS.items():
+        if not re.fullmatch(r'-?\w+', str(value)):
+            raise ValueError(f'Invalid value for PRAGMA {name}: {value!r}')
+        conn.execute(f'PRAGMA {name} = {value}')
+
+def _acquire_pooled_connection():
+    with _pool_lock:
+        while _pool:
+            conn = _pool.pop()
+            if conn.db_path == DB_PATH:
+                _count('pooled')
+                return conn
+            conn.close()
+    return get_db_connection()
+
+def _release_pooled_connection(conn):
+    if conn.in_transaction:
+        conn.rollback()
+    with _pool_lock:
+        if len(_pool) < POOL_SIZE and conn.db_path == DB_PATH:
+            _pool.append(conn)
+            return
+    conn.close()
+
+def _current_scope():
+    """State dict for the active unit of work: flask.g in a request, else the thread."""
+    if has_app_context():
+        return g.__dict__.setdefault('_db_scope', {'conn': None, 'depth': 0, 'pooled': False})
+    if not hasattr(_thread_scope, 'state'):
+        _thread_scope.state = {'conn': None, 'depth': 0, 'pooled': True}
+    return _thread_scope.state
+
+@contextmanager
+def db_connection():
+    """
+    Yield the database connection for the current unit of work.
+
+    Inside a Flask request every call shares one connection, closed by
+    close_request_connection() at app context teardown. Outside a request the
+    outermost block borrows a connection from a small pool and nested blocks
+    on the same thread reuse it. Uncommitted changes are rolled back if the
+    outermost block raises.
+    """
+    scope = _current_scope()
+
+    if scope['conn'] is None:
+        scope['conn'] = _acquire_pooled_connection() if scope['pooled'] else get_db_connection()
+    else:
+        _count('reused')
+
+    scope['depth'] += 1
+    try:
+        yield scope['conn']
+    except Exception:
+        if scope['depth'] == 1 and scope['conn'].in_transaction:
+            scope['conn'].rollback()
+        raise
+    finally:
+        scope['depth'] -= 1
+        if scope['depth'] == 0 and scope['pooled']:
+            _release_pooled_connection(scope['conn'])
+            scope['conn'] = None
+
+def close_request_connection(exception=None):
+    """Close the request's connection (registered as an app context teardown)."""
+    scope = g.pop('_db_scope', None)
+    if scope and scope['conn'] is not None:
+        if scope['conn'].in_transaction:
+            scope['conn'].rollback()
+        scope['conn'].close()
+
+def _retry_when_locked(func):
+    """
+    Retry a write function when SQLite reports the database as locked.
+
+    Only the outermost call retries (its transaction has been rolled back by
+    db_connection()); nested calls let the error reach it. Gives up after
+    WRITE_RETRIES extra attempts with a linearly growing delay.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(WRITE_RETRIES + 1):
+            try:
+                return func(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                locked = 'locked' in str(e) or 'busy' in str(e)
+                if not locked or attempt == WRITE_RETRIES or _current_scope()['depth'] > 0:
+                    raise
+                _count('write_retries')
+                time.sleep(WRITE_RETRY_DELAY * (attempt + 1))
+    return wrapper
+
+def get_connection_stats():
+    """Connection counters: opened, closed, reused (nested/request reuse), pooled (pool hits) and write_retries."""
+    with _stats_lock:
+        stats = dict(_connection_stats)
+    with _pool_lock:
+        stats['idle'] = len(_pool)
+    return stats
+
+def get_data_version():
+    """Counter bumped by every write made through this module (see _data_changed())."""
+    return _write_version
+
+def get_data_signature():
+    """
+    Cheap token that changes whenever the data may have changed.
+
+    Combines get_data_version() with the size and modification time of the
+    database and WAL files, so commits from another process or the sqlite3
+    shell change it too. Costs two stat() calls and no query.
+    """
+    parts = [str(_write_version)]
+    for path in (DB_PATH, f'{DB_PATH}-wal'):
+        try:
+            stat = os.stat(path)
+            parts.append(f'{stat.st_size}.{stat.st_mtime_ns}')
+        except OSError:
+            parts.append('-')
+    return ':'.join(parts)
+
+def get_db_settings():
+    """
+    Get the settings actually in effect on a database connection.
+
+    Returns:
+        Dict with the database path, SQLite version, pragma values read back
+        from the connection, retry settings, connection stats, result
+        cache counters and query totals with recent slow queries.
+    """
+    with db_connection() as conn:
+        pragmas = {
+            name: conn.execute(f'PRAGMA {name}').fetchone()[0]
+            for name in ['busy_timeout', *DB_PRAGMAS]
+        }
+
+    return {
+        'db_path': DB_PATH,
+        'sqlite_version': sqlite3.sqlite_version,
+        'pragmas': pragmas,
+        'configured_pragmas': dict(DB_PRAGMAS),
+        'write_retries': WRITE_RETRIES,
+        'write_retry_delay': WRITE_RETRY_DELAY,
+        'pool_size': POOL_SIZE,
+        'connections': get_connection_stats(),
+        'result_cache': result_cache.stats(),
+        'queries': query_log.stats()
+    }
+
+def backup_database(backup_path):
+    """Write a consistent copy of the database (including un-checkpointed WAL pages) to backup_path."""
+    target = sqlite3.connect(backup_path)
+    try:
+        with db_connection() as conn:
+            conn.backup(target)
+    finally:
+        target.close()
+
+def restore_database(source_path):
+    """
+    Replace the database contents with the SQLite file at source_path.
+
+    The current database is saved to DB_PATH + '.backup' first and copied back
+    if the restore fails. Copies go through the SQLite backup API so open
+    connections and the WAL file stay consistent.
+    """
+    backup_path = f'{DB_PATH}.backup'
+    backup_database(backup_path)
+
+    try:
+        _copy_into_database(source_path)
+        # Bring schema and loan ledger up to date for the restored file
+        init_db()
+    except Exception:
+        _copy_into_database(backup_path)
+        raise
+
+def _copy_into_database(source_path):
+    source = sqlite3.connect(source_path)
+    try:
+        with db_connection() as conn:
+            if conn.in_transaction:
+                conn.rollback()
+            source.backup(conn)
+    finally:
+        source.close()
+    _data_changed()
+
+def _data_changed(*tables):
+    """Invalidate cached results after a write to the given tables (everything if none given)."""
+    global _write_version
+    with _stats_lock:
+        _write_version += 1
+
+    result_cache.invalidate(*tables)
+    if not tables or 'borrowers' in tables:
+        _borrower_id_cache.clear()
+
+def _cached(*tables):
+    """
+    Decorator: keep a read function's results in result_cache.
+
+    The key is the function name, database path, today's date (several
+    reports default to the current month) and the arguments; entries are
+    dropped when _data_changed() names one of tables. Calls made inside an
+    open write transaction bypass the cache so uncommitted rows never get in.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            conn = _current_scope()['conn']
+            if conn is not None and conn.in_transaction:
+                return f(*args, **kwargs)
+
+            key = (f.__name__, DB_PATH, datetime.now().strftime('%Y-%m-%d'),
+                   args, tuple(sorted(kwargs.items())))
+            try:
+                hash(key)
+            except TypeError:
+                return f(*args, **kwargs)
+
+            return result_cache.get_or_compute(key, tables, lambda: f(*args, **kwargs))
+        return wrapper
+    return decorator
+
 def init_db():
     """Initialize the database with schema."""
-    conn = get_db_connection()
-
-    # Read and execute schema
-    schema_path = os.path.join(os.path.dirname(__file__), 'schema.sql')
-    with open(schema_path, 'r') as f:
-        conn.executescript(f.read())
-
-    # Check if a user exists, if not create default PIN: 1234
-    cursor = conn.execute('SELECT COUNT(*) as count FROM users')
-    if cursor.fetchone()['count'] == 0:
-        pin_hash = generate_password_hash('1234')
-        conn.execute('INSERT INTO users (pin_hash) VALUES (?)', (pin_hash,))
+    with db_connection() as conn:
+        _rename_chit_adjustments_schedule_column(conn)
+
+        # Read and execute schema
+        schema_path = os.path.join(os.path.dirname(__file__), 'schema.sql')
+        with open(schema_path, 'r') as f:
+            conn.executescript(f.read())
+
+        _init_borrower_search(conn)
+        _init_borrower_name_key(conn)
+
+        # Check if a user exists, if not create default PIN: 1234
+        cursor = conn.execute('SELECT COUNT(*) as count FROM users')
+        if cursor.fetchone()['count'] == 0:
+            pin_hash = generate_password_hash('1234')
+            conn.execute('INSERT INTO users (pin_hash) VALUES (?)', (pin_hash,))
+            conn.commit()
+
+        # Build ledger rows for loans that don't have any yet (first run / restored backups)
+        conn.execute('''
+            INSERT OR IGNORE INTO loan_ledger_stale (loan_id, from_month)
+            SELECT id, ? FROM loans
+            WHERE NOT EXISTS (SELECT 1 FROM loan_month_ledger WHERE loan_id = loans.id)
+        ''', (loan_logic.FULL_REBUILD_MONTH,))
+        loan_logic.sync_ledger(conn)
         conn.commit()
 
-    conn.close()
+    _data_changed()
     print(f"Database initialized at {DB_PATH}")
 
+def _rename_chit_adjustments_schedule_column(conn):
+    """
+    Rename chit_adjustments.schedule_id to chit_schedule_id.
+
+    Older copies of schema.sql named the column schedule_id while the code
+    and existing databases use chit_schedule_id, so chit adjustments failed
+    on databases created fresh from the schema. Runs before the schema so its
+    chit_schedule_id indexes can be created.
+    """
+    columns = [row['name'] for row in conn.execute('PRAGMA table_info(chit_adjustments)')]
+    if 'schedule_id' in columns and 'chit_schedule_id' not in columns:
+        conn.execute('ALTER TABLE chit_adjustments RENAME COLUMN schedule_id TO chit_schedule_id')
+        conn.commit()
+
+def _init_borrower_search(conn):
+    """
+    Create the FTS5 trigram borrower search index (borrower_search.sql) if missing.
+
+    Older SQLite builds without FTS5/trigram keep using LIKE scans.
+    """
+    global _borrower_fts_enabled
+
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'borrowers_fts'"
+    ).fetchone()
+
+    if not exists:
+        search_path = os.path.join(os.path.dirname(__file__), 'borrower_search.sql')
+        try:
+            with open(search_path, 'r') as f:
+                conn.executescript(f.read())
+        except sqlite3.OperationalError as e:
+            print(f"Borrower search index unavailable ({e}); using LIKE search")
+            _borrower_fts_enabled = False
+            return
+        conn.execute("INSERT INTO borrowers_fts (borrowers_fts) VALUES ('rebuild')")
+        conn.commit()
+
+    _borrower_fts_enabled = True
+
+def normalize_borrower_name(name):
+    """Borrower identity key: case-folded with runs of whitespace collapsed to one space."""
+    return ' '.join((name or '').split()).casefold()
+
+def _init_borrower_name_key(conn):
+    """
+    Add and backfill borrowers.name_key on older databases and index it.
+
+    The index is unique unless existing borrowers already share a key; then a
+    plain index is used until merge_duplicate_borrowers.py folds them together.
+    """
+    columns = [row['name'] for row in conn.execute('PRAGMA table_info(borrowers)')]
+    if 'name_key' not in columns:
+        conn.execute('ALTER TABLE borrowers ADD COLUMN name_key TEXT')
+
+    missing = conn.execute('SELECT id, name FROM borrowers WHERE name_key IS NULL').fetchall()
+    if missing:
+        conn.executemany(
+            'UPDATE borrowers SET name_key = ? WHERE id = ?',
+            [(normalize_borrower_name(row['name']), row['id']) for row in missing]
+        )
+    conn.commit()
+
+    _ensure_borrower_name_index(conn)
+
+def _ensure_borrower_name_index(conn):
+    """
+    Make idx_borrowers_name_key unique if the data allows it.
+
+    Returns:
+        True if the unique index is in place
+    """
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'index' AND name = 'idx_borrowers_name_key'"
+    ).fetchone()
+    if row and 'UNIQUE' in row['sql'].upper():
+        return True
+
+    try:
+        conn.execute('DROP INDEX IF EXISTS idx_borrowers_name_key')
+        conn.execute('CREATE UNIQUE INDEX idx_borrowers_name_key ON borrowers(name_key)')
+        conn.commit()
+        return True
+    except sqlite3.IntegrityError:
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_borrowers_name_key ON borrowers(name_key)')
+        conn.commit()
+        print("Duplicate borrower names found; run merge_duplicate_borrowers.py to merge them")
+        return False
+
+def _find_borrower_id(conn, name):
+    """Id of the borrower whose name_key matches name (cached), or None."""
+    name_key = normalize_borrower_name(name)
+
+    borrower_id = _borrower_id_cache.get(name_key)
+    if borrower_id is not None:
+        return borrower_id
+
+    row = conn.execute(
+        'SELECT id FROM borrowers WHERE name_key = ? ORDER BY id LIMIT 1', (name_key,)
+    ).fetchone()
+    if row and not conn.in_transaction:
+        # Only cache committed rows
+        _borrower_id_cache[name_key] = row['id']
+    return row['id'] if row else None
+
+def _get_or_create_borrower_id(conn, name, phone=None):
+    """
+    Find a borrower by normalized name or insert one (without committing).
+
+    Returns:
+        Tuple of (borrower_id, created)
+    """
+    borrower_id = _find_borrower_id(conn, name)
+    if borrower_id is not None:
+        return borrower_id, False
+
+    name_key = normalize_borrower_name(name)
+    _borrower_id_cache.pop(name_key, None)
+    try:
+        cursor = conn.execute(
+            'INSERT INTO borrowers (name, phone, name_key) VALUES (?, ?, ?)',
+            (name, phone, name_key)
+        )
+    except sqlite3.IntegrityError:
+        # Created by another connection since the lookup
+        row = conn.execute('SELECT id FROM borrowers WHERE name_key = ?', (name_key,)).fetchone()
+        return row['id'], False
+    return cursor.lastrowid, True
+
+def _fts_phrase(term):
+    """Quote a search term as an FTS5 phrase (substring match with the trigram tokenizer)."""
+    return '"' + term.replace('"', '""') + '"'
+
+def _borrower_search_condition(search):
+    """SQL condition (on borrower alias b) and params matching name or phone containing search."""
+    if _borrower_fts_enabled and len(search) >= BORROWER_SEARCH_MIN_LENGTH:
+        return 'b.id IN (SELECT rowid FROM borrowers_fts WHERE borrowers_fts MATCH ?)', [_fts_phrase(search)]
+    search_term = f'%{search}%'
+    return '(b.name LIKE ? OR b.phone LIKE ?)', [search_term, search_term]
+
 def verify_pin(pin):
     """Verify the PIN."""
-    conn = get_db_connection()
-    cursor = conn.execute('SELECT pin_hash FROM users LIMIT 1')
-    row = cursor.fetchone()
-    conn.close()
+    with db_connection() as conn:
+        cursor = conn.execute('SELECT pin_hash FROM users LIMIT 1')
+        row = cursor.fetchone()
 
     if row:
         return check_password_hash(row['pin_hash'], pin)
     return False
 
+@_retry_when_locked
 def update_pin(new_pin):
     """Update the PIN."""
-    conn = get_db_connection()
-    pin_hash = generate_password_hash(new_pin)
-    conn.execute('UPDATE users SET pin_hash = ?', (pin_hash,))
-    conn.commit()
-    conn.close()
-
-def get_or_create_borrower(name, phone=None):
-    """Get existing borrower or create new one."""
-    conn = get_db_connection()
-
-    # Try to find existing borrower by name
-    cursor = conn.execute('SELECT id FROM borrowers WHERE name = ?', (name,))
-    row = cursor.fetchone()
-
-    if row:
-        borrower_id = row['id']
-    else:
-        cursor = conn.execute(
-            'INSERT INTO borrowers (name, phone) VALUES (?, ?)',
-            (name, phone)
-        )
-        borrower_id = cursor.lastrowid
+    with db_connection() as conn:
+        pin_hash = generate_password_hash(new_pin)
+        conn.execute('UPDATE users SET pin_hash = ?', (pin_hash,))
         conn.commit()
 
-    conn.close()
+@_retry_when_locked
+def get_or_create_borrower(name, phone=None):
+    """Get existing borrower (matched on normalized name) or create new one."""
+    with db_connection() as conn:
+        borrower_id, created = _get_or_create_borrower_id(conn, name, phone)
+        if created:
+            conn.commit()
+
+    if created:
+        _data_changed('borrowers')
     return borrower_id
 
+@_retry_when_locked
 def create_loan(borrower_name, phone, principal_given, given_date, monthly_rate,
                 interest_due_day, document_received, document_type, document_path,
                 document_received_date, notes):
     """Create a new loan."""
-    borrower_id = get_or_create_borrower(borrower_name, phone)
+    with db_connection() as conn:
+        borrower_id = get_or_create_borrower(borrower_name, phone)
 
-    conn = get_db_connection()
-    cursor = conn.execute('''
-        INSERT INTO loans (
-            borrower_id, principal_given, outstanding_principal, monthly_rate,
-            interest_due_day, given_date, document_received, document_type,
-            document_path, document_received_date, notes
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (borrower_id, principal_given, principal_given, monthly_rate,
-          interest_due_day, given_date, document_received, document_type,
-          document_path, document_received_date, notes))
-
-    loan_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+        cursor = conn.execute('''
+            INSERT INTO loans (
+                borrower_id, principal_given, outstanding_principal, monthly_rate,
+                interest_due_day, given_date, document_received, document_type,
+                document_path, document_received_date, notes
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (borrower_id, principal_given, principal_given, monthly_rate,
+              interest_due_day, given_date, document_received, document_type,
+              document_path, document_received_date, notes))
+
+        loan_id = cursor.lastrowid
+        loan_logic.refresh_stale_ledgers(conn)
+        conn.commit()
 
+    _data_changed('loans')
     return loan_id
 
+@_retry_when_locked
 def update_loan(loan_id, borrower_name, phone, principal_given, outstanding_principal,
                 given_date, monthly_rate, interest_due_day, document_received,
                 document_type, document_path, document_received_date, notes):
     """Update an existing loan."""
-    borrower_id = get_or_create_borrower(borrower_name, phone)
-
-    conn = get_db_connection()
-    conn.execute('''
-        UPDATE loans SET
-            borrower_id = ?,
-            principal_given = ?,
-            outstanding_principal = ?,
-            monthly_rate = ?,
-            interest_due_day = ?,
-            given_date = ?,
-            document_received = ?,
-            document_type = ?,
-            document_path = ?,
-            document_received_date = ?,
-            notes = ?
-        WHERE id = ?
-    ''', (borrower_id, principal_given, outstanding_principal, monthly_rate,
-          interest_due_day, given_date, document_received, document_type,
-          document_path, document_received_date, notes, loan_id))
+    with db_connection() as conn:
+        borrower_id = get_or_create_borrower(borrower_name, phone)
 
-    conn.commit()
-    conn.close()
+        conn.execute('''
+            UPDATE loans SET
+                borrower_id = ?,
+                principal_given = ?,
+                outstanding_principal = ?,
+                monthly_rate = ?,
+                interest_due_day = ?,
+                given_date = ?,
+                document_received = ?,
+                document_type = ?,
+                document_path = ?,
+                document_received_date = ?,
+                notes = ?
+            WHERE id = ?
+        ''', (borrower_id, principal_given, outstanding_principal, monthly_rate,
+              interest_due_day, given_date, document_received, document_type,
+              document_path, document_received_date, notes, loan_id))
 
-def get_loans(status=None, search=None):
-    """Get all loans with optional filters."""
-    conn = get_db_connection()
+        loan_logic.refresh_stale_ledgers(conn)
+        conn.commit()
 
-    query = '''
-        SELECT l.*, b.name as borrower_name, b.phone as borrower_phone
+    _data_changed('loans')
+
+# Columns /api/loans can sort by and project (fields=)
+LOAN_SORT_COLUMNS = {
+    'created_at': 'l.created_at',
+    'outstanding_principal': 'l.outstanding_principal',
+    'given_date': 'l.given_date',
+    'monthly_rate': 'l.monthly_rate',
+}
+LOAN_FIELDS = {
+    'id', 'borrower_id', 'principal_given', 'outstanding_principal', 'monthly_rate',
+    'interest_due_day', 'given_date', 'status', 'closed_date', 'close_reason',
+    'document_received', 'document_type', 'document_path', 'document_received_date',
+    'notes', 'created_at', 'borrower_name', 'borrower_phone',
+}
+MAX_PAGE_SIZE = 200
+
+def _encode_cursor(sort, value, loan_id):
+    payload = json.dumps([sort, value, loan_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+def _decode_cursor(token, sort):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        cursor_sort, value, loan_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if cursor_sort != sort or not isinstance(loan_id, int):
+        raise ValueError('Cursor does not match the requested sort')
+    return value, loan_id
+
+def get_loans(status=None, search=None, limit=None, cursor=None, sort='created_at',
+              order='desc', fields=None):
+    """
+    Get loans with optional filters, sorting, paging and field projection.
+
+    Without limit/cursor every matching loan is returned as a list (as before).
+    With either, one page is returned and the next page is fetched by passing
+    back next_cursor (keyset on (sort column, id), so each page costs the same).
+
+    Args:
+        status: Optional loan status filter
+        search: Optional borrower name / phone substring
+        limit: Page size, at least 1 (capped at MAX_PAGE_SIZE)
+        cursor: next_cursor from the previous page
+        sort: One of LOAN_SORT_COLUMNS
+        order: 'asc' or 'desc'
+        fields: Optional list of LOAN_FIELDS to return
+
+    Returns:
+        List of loan dicts, or {'loans': [...], 'next_cursor': str or None} when paging
+
+    Raises:
+        ValueError: If limit, sort, order, fields or cursor are invalid
+    """
+    if limit is not None and limit < 1:
+        raise ValueError('limit must be at least 1')
+    if sort not in LOAN_SORT_COLUMNS:
+        raise ValueError(f'sort must be one of: {", ".join(LOAN_SORT_COLUMNS)}')
+    if order not in ('asc', 'desc'):
+        raise ValueError("order must be 'asc' or 'desc'")
+
+    if fields:
+        unknown = set(fields) - LOAN_FIELDS
+        if unknown:
+            raise ValueError(f'Unknown fields: {", ".join(sorted(unknown))}')
+        columns = ', '.join(
+            {'borrower_name': 'b.name as borrower_name',
+             'borrower_phone': 'b.phone as borrower_phone'}.get(f, f'l.{f}')
+            for f in fields
+        )
+    else:
+        columns = 'l.*, b.name as borrower_name, b.phone as borrower_phone'
+
+    sort_column = LOAN_SORT_COLUMNS[sort]
+    paged = limit is not None or cursor is not None
+
+    query = f'''
+        SELECT {columns}, {sort_column} as _sort_value, l.id as _sort_id
         FROM loans l
         JOIN borrowers b ON l.borrower_id = b.id
         WHERE 1=1
@@ -138,206 +695,317 @@ def get_loans(status=None, search=None):
         params.append(status)
 
     if search:
-        query += ' AND (b.name LIKE ? OR b.phone LIKE ?)'
-        search_term = f'%{search}%'
-        params.extend([search_term, search_term])
-
-    query += ' ORDER BY l.created_at DESC'
+        condition, search_params = _borrower_search_condition(search)
+        query += f' AND {condition}'
+        params.extend(search_params)
 
-    cursor = conn.execute(query, params)
-    loans = cursor.fetchall()
-    conn.close()
+    if cursor:
+        value, loan_id = _decode_cursor(cursor, sort)
+        query += f' AND ({sort_column}, l.id) {"<" if order == "desc" else ">"} (?, ?)'
+        params.extend([value, loan_id])
 
-    return [dict(loan) for loan in loans]
+    query += f' ORDER BY {sort_column} {order.upper()}, l.id {order.upper()}'
 
-def get_loans_summary():
-    """Get summary statistics for all active loans."""
-    conn = get_db_connection()
+    if paged:
+        limit = MAX_PAGE_SIZE if limit is None else min(limit, MAX_PAGE_SIZE)
+        query += ' LIMIT ?'
+        params.append(limit + 1)
 
-    # Get totals for active loans
-    cursor = conn.execute('''
-        SELECT
-            COUNT(*) as total_loans,
-            SUM(principal_given) as total_principal_given,
-            SUM(outstanding_principal) as total_outstanding
-        FROM loans
-        WHERE status = 'Active'
-    ''')
+    with db_connection() as conn:
+        cursor_rows = conn.execute(query, params).fetchall()
 
-    summary = dict(cursor.fetchone())
+    loans = []
+    for row in cursor_rows:
+        loan = dict(row)
+        loan['_cursor'] = (loan.pop('_sort_value'), loan.pop('_sort_id'))
+        loans.append(loan)
 
-    # Calculate total Interest Due (Month) for current month for all active loans
-    from datetime import datetime
-    current_month = datetime.now().strftime('%Y-%m')
+    next_cursor = None
+    if paged and len(loans) > limit:
+        loans = loans[:limit]
+        next_cursor = _encode_cursor(sort, *loans[-1]['_cursor'])
 
-    cursor = conn.execute('SELECT * FROM loans WHERE status = "Active"')
-    active_loans = [dict(row) for row in cursor.fetchall()]
+    for loan in loans:
+        del loan['_cursor']
 
-    total_interest_due_month = 0
-    for loan in active_loans:
-        interest_due = calculate_interest_due(loan, current_month)
-        total_interest_due_month += interest_due
+    if not paged:
+        return loans
+    return {'loans': loans, 'next_cursor': next_cursor}
 
-    summary['total_pending_interest'] = total_interest_due_month
+@_cached('loans', 'payments')
+def get_loans_summary():
+    """Get summary statistics for all active loans."""
+    current_month = datetime.now().strftime('%Y-%m')
 
-    conn.close()
-    return summary
+    with db_connection() as conn:
+        # Totals plus Interest Due (Month) for the current month in one pass:
+        # opening principal = principal_given - principal paid for earlier months
+        cursor = conn.execute('''
+            SELECT
+                COUNT(*) as total_loans,
+                SUM(l.principal_given) as total_principal_given,
+                SUM(l.outstanding_principal) as total_outstanding,
+                COALESCE(SUM(ROUND(
+                    (l.principal_given - COALESCE(pp.principal_paid, 0)) * (l.monthly_rate / 100), 2
+                )), 0) as total_pending_interest
+            FROM loans l
+            LEFT JOIN (
+                SELECT loan_id, SUM(principal_paid) as principal_paid
+                FROM payments
+                WHERE interest_month < ?
+                GROUP BY loan_id
+            ) pp ON pp.loan_id = l.id
+            WHERE l.status = 'Active'
+        ''', (current_month,))
+
+        return dict(cursor.fetchone())
 
 def get_loan_by_id(loan_id):
     """Get a specific loan by ID."""
-    conn = get_db_connection()
-    cursor = conn.execute('''
-        SELECT l.*, b.name as borrower_name, b.phone as borrower_phone
-        FROM loans l
-        JOIN borrowers b ON l.borrower_id = b.id
-        WHERE l.id = ?
-    ''', (loan_id,))
-    loan = cursor.fetchone()
-    conn.close()
+    with db_connection() as conn:
+        cursor = conn.execute('''
+            SELECT l.*, b.name as borrower_name, b.phone as borrower_phone
+            FROM loans l
+            JOIN borrowers b ON l.borrower_id = b.id
+            WHERE l.id = ?
+        ''', (loan_id,))
+        loan = cursor.fetchone()
 
     return dict(loan) if loan else None
 
+@_retry_when_locked
 def close_loan(loan_id, close_reason=''):
     """Close a loan."""
-    conn = get_db_connection()
-    conn.execute('''
-        UPDATE loans
-        SET status = 'Closed', closed_date = ?, close_reason = ?
-        WHERE id = ?
-    ''', (datetime.now().strftime('%Y-%m-%d'), close_reason, loan_id))
-    conn.commit()
-    conn.close()
+    with db_connection() as conn:
+        conn.execute('''
+            UPDATE loans
+            SET status = 'Closed', closed_date = ?, close_reason = ?
+            WHERE id = ?
+        ''', (datetime.now().strftime('%Y-%m-%d'), close_reason, loan_id))
+        loan_logic.refresh_stale_ledgers(conn)
+        conn.commit()
 
+    _data_changed('loans')
+
+@_retry_when_locked
 def add_payment(loan_id, payment_date, interest_month, total_received,
                 interest_paid, principal_paid, payment_mode, reference, notes):
     """Add a payment and update outstanding principal."""
-    conn = get_db_connection()
-
-    # Insert payment
-    conn.execute('''
-        INSERT INTO payments (
-            loan_id, payment_date, interest_month, total_received,
-            interest_paid, principal_paid, payment_mode, reference, notes
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (loan_id, payment_date, interest_month, total_received,
-          interest_paid, principal_paid, payment_mode, reference, notes))
-
-    # Update outstanding principal
-    conn.execute('''
-        UPDATE loans
-        SET outstanding_principal = outstanding_principal - ?
-        WHERE id = ?
-    ''', (principal_paid, loan_id))
+    with db_connection() as conn:
+        # Insert payment
+        conn.execute('''
+            INSERT INTO payments (
+                loan_id, payment_date, interest_month, total_received,
+                interest_paid, principal_paid, payment_mode, reference, notes
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (loan_id, payment_date, interest_month, total_received,
+              interest_paid, principal_paid, payment_mode, reference, notes))
+
+        # Update outstanding principal
+        conn.execute('''
+            UPDATE loans
+            SET outstanding_principal = outstanding_principal - ?
+            WHERE id = ?
+        ''', (principal_paid, loan_id))
 
-    conn.commit()
-    conn.close()
+        # Recompute ledger rows from this interest month onwards
+        loan_logic.refresh_stale_ledgers(conn)
+
+        conn.commit()
+
+    _data_changed('payments', 'loans')
 
 def get_payments_by_loan(loan_id):
     """Get all payments for a loan."""
-    conn = get_db_connection()
-    cursor = conn.execute('''
-        SELECT * FROM payments
-        WHERE loan_id = ?
-        ORDER BY payment_date DESC, interest_month DESC
-    ''', (loan_id,))
-    payments = cursor.fetchall()
-    conn.close()
+    with db_connection() as conn:
+        cursor = conn.execute('''
+            SELECT * FROM payments
+            WHERE loan_id = ?
+            ORDER BY payment_date DESC, interest_month DESC
+        ''', (loan_id,))
+        payments = cursor.fetchall()
 
     return [dict(payment) for payment in payments]
 
 def get_borrowers():
     """Get all borrowers."""
-    conn = get_db_connection()
-    cursor = conn.execute('SELECT DISTINCT name FROM borrowers ORDER BY name')
-    borrowers = cursor.fetchall()
-    conn.close()
+    with db_connection() as conn:
+        cursor = conn.execute('SELECT DISTINCT name FROM borrowers ORDER BY name')
+        borrowers = cursor.fetchall()
 
     return [row['name'] for row in borrowers]
 
+@_retry_when_locked
+def merge_duplicate_borrowers(dry_run=False):
+    """
+    Fold borrowers that share a normalized name into the oldest one.
+
+    Every table with a borrower_id column is repointed to the kept borrower
+    (rows that would then duplicate a unique key, e.g. a second link to the
+    same chit, are dropped), the kept borrower inherits a phone if it has
+    none, and the duplicates are deleted. Runs in one transaction, then
+    makes the name_key index unique.
+
+    Args:
+        dry_run: Only report what would be merged
+
+    Returns:
+        List of {'kept_id', 'kept_name', 'merged_ids', 'merged_names'}
+    """
+    with db_connection() as conn:
+        groups = conn.execute('''
+            SELECT name_key FROM borrowers
+            GROUP BY name_key
+            HAVING COUNT(*) > 1
+        ''').fetchall()
+
+        tables = [
+            row['name'] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name != 'borrowers'"
+            )
+            if any(col['name'] == 'borrower_id'
+                   for col in conn.execute(f'PRAGMA table_info({row["name"]})'))
+        ]
+
+        merges = []
+        for group in groups:
+            borrowers = conn.execute(
+                'SELECT id, name, phone FROM borrowers WHERE name_key = ? ORDER BY id',
+                (group['name_key'],)
+            ).fetchall()
+            kept, duplicates = borrowers[0], borrowers[1:]
+            merges.append({
+                'kept_id': kept['id'],
+                'kept_name': kept['name'],
+                'merged_ids': [b['id'] for b in duplicates],
+                'merged_names': [b['name'] for b in duplicates]
+            })
+
+            if dry_run:
+                continue
+
+            duplicate_ids = [b['id'] for b in duplicates]
+            placeholders = ','.join('?' * len(duplicate_ids))
+
+            for table in tables:
+                conn.execute(
+                    f'UPDATE OR IGNORE {table} SET borrower_id = ? WHERE borrower_id IN ({placeholders})',
+                    [kept['id']] + duplicate_ids
+                )
+                conn.execute(f'DELETE FROM {table} WHERE borrower_id IN ({placeholders})', duplicate_ids)
+
+            if 'chits' in tables:
+                conn.execute('UPDATE chits SET borrower_name = ? WHERE borrower_id = ?',
+                             (kept['name'], kept['id']))
+
+            phone = kept['phone'] or next((b['phone'] for b in duplicates if b['phone']), None)
+            conn.execute('UPDATE borrowers SET phone = ? WHERE id = ?', (phone, kept['id']))
+            conn.execute(f'DELETE FROM borrowers WHERE id IN ({placeholders})', duplicate_ids)
+
+        if not dry_run:
+            conn.commit()
+            _ensure_borrower_name_index(conn)
+
+    if merges and not dry_run:
+        _data_changed('borrowers', *tables)
+    return merges
+
+def search_borrowers(query, limit=10):
+    """
+    Typeahead search over borrower name and phone.
+
+    Names (or phones) starting with the query rank first, then other
+    substring matches by FTS rank, then by name.
+
+    Args:
+        query: Search text
+        limit: Maximum number of results (capped at 50)
+
+    Returns:
+        List of {id, name, phone, active_loans}
+    """
+    query = (query or '').strip()
+    if not query:
+        return []
+
+    limit = max(1, min(int(limit), 50))
+    prefix = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+    if _borrower_fts_enabled and len(query) >= BORROWER_SEARCH_MIN_LENGTH:
+        sql = '''
+            SELECT b.id, b.name, b.phone
+            FROM borrowers_fts f
+            JOIN borrowers b ON b.id = f.rowid
+            WHERE borrowers_fts MATCH ?
+            ORDER BY (b.name LIKE ? ESCAPE '\\') DESC, (b.phone LIKE ? ESCAPE '\\') DESC, f.rank, b.name
+            LIMIT ?
+        '''
+        params = [_fts_phrase(query), prefix, prefix, limit]
+    else:
+        sql = '''
+            SELECT b.id, b.name, b.phone
+            FROM borrowers b
+            WHERE b.name LIKE ? ESCAPE '\\' OR b.phone LIKE ? ESCAPE '\\'
+            ORDER BY b.name
+            LIMIT ?
+        '''
+        params = [prefix, prefix, limit]
+
+    with db_connection() as conn:
+        results = [dict(row) for row in conn.execute(sql, params).fetchall()]
+
+        if results:
+            ids = [r['id'] for r in results]
+            placeholders = ','.join('?' * len(ids))
+            active = dict(conn.execute(f'''
+                SELECT borrower_id, COUNT(*) FROM loans
+                WHERE status = 'Active' AND borrower_id IN ({placeholders})
+                GROUP BY borrower_id
+            ''', ids).fetchall())
+
+    for result in results:
+        result['active_loans'] = active.get(result['id'], 0)
+
+    return results
+
 def calculate_interest_due(loan, interest_month):
     """Calculate interest due for a specific month."""
-    # Get the opening principal for the month
-    # This is the outstanding principal at the start of the month
-    # considering all principal payments made before this month
-
-    conn = get_db_connection()
-
-    # Get all principal payments made before or during this month
-    cursor = conn.execute('''
-        SELECT SUM(principal_paid) as total_principal_paid
-        FROM payments
-        WHERE loan_id = ? AND interest_month < ?
-    ''', (loan['id'], interest_month))
-
-    result = cursor.fetchone()
-    total_principal_paid_before = result['total_principal_paid'] or 0
-
-    conn.close()
-
-    # Opening principal for the month
-    opening_principal = loan['principal_given'] - total_principal_paid_before
-
-    # Calculate interest
-    interest_due = opening_principal * (loan['monthly_rate'] / 100)
-
-    return round(interest_due, 2)
+    with db_connection() as conn:
+        return loan_logic.calculate_interest_due(conn, loan, interest_month)
 
 def get_person_history(borrower_name):
-    """Get complete payment history for a borrower."""
-    conn = get_db_connection()
-
-    # Get all loans for this borrower
-    cursor = conn.execute('''
-        SELECT l.id, l.principal_given, l.given_date, l.status
-        FROM loans l
-        JOIN borrowers b ON l.borrower_id = b.id
-        WHERE b.name = ?
-        ORDER BY l.given_date
-    ''', (borrower_name,))
-
-    loans = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-
-    # For each loan, get payment history
-    history = []
-    for loan in loans:
-        payments = get_payments_by_loan(loan['id'])
-        history.append({
-            'loan': loan,
-            'payments': payments
-        })
-
-    return history
+    """Get complete payment history for a borrower, with per-loan totals."""
+    with db_connection() as conn:
+        return loan_logic.get_person_history(conn, normalize_borrower_name(borrower_name))
 
+@_cached('payments', 'loans', 'borrowers')
 def get_recent_payments_all(months=3):
     """Get payments for all borrowers for the last N months, grouped by month."""
     from datetime import datetime
     from dateutil.relativedelta import relativedelta
 
-    conn = get_db_connection()
-
     # Calculate the start month (N months ago)
     current_date = datetime.now()
     start_date = current_date - relativedelta(months=months-1)
     start_month = start_date.strftime('%Y-%m')
 
-    # Get all payments from the last N months
-    cursor = conn.execute('''
-        SELECT
-            p.*,
-            b.name as borrower_name,
-            l.principal_given,
-            l.outstanding_principal,
-            l.monthly_rate
-        FROM payments p
-        JOIN loans l ON p.loan_id = l.id
-        JOIN borrowers b ON l.borrower_id = b.id
-        WHERE p.interest_month >= ?
-        ORDER BY p.interest_month DESC, p.payment_date DESC, b.name
-    ''', (start_month,))
-
-    payments = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    with db_connection() as conn:
+        # Get all payments from the last N months
+        cursor = conn.execute('''
+            SELECT
+                p.*,
+                b.name as borrower_name,
+                l.principal_given,
+                l.outstanding_principal,
+                l.monthly_rate
+            FROM payments p
+            JOIN loans l ON p.loan_id = l.id
+            JOIN borrowers b ON l.borrower_id = b.id
+            WHERE p.interest_month >= ?
+            ORDER BY p.interest_month DESC, p.payment_date DESC, b.name
+        ''', (start_month,))
+
+        payments = [dict(row) for row in cursor.fetchall()]
 
     # Group payments by month
     payments_by_month = {}
@@ -349,164 +1017,97 @@ def get_recent_payments_all(months=3):
 
     return payments_by_month
 
-def get_monthly_report(report_month, include_closed=False):
-    """Generate monthly report showing who paid and who didn't."""
-    conn = get_db_connection()
-
-    # Get all active loans (or all loans if include_closed is True)
-    query = '''
-        SELECT l.*, b.name as borrower_name
+def _export_filters(date_column, status, date_from, date_to):
+    conditions = []
+    params = []
+    if status:
+        conditions.append('l.status = ?')
+        params.append(status)
+    if date_from:
+        conditions.append(f'{date_column} >= ?')
+        params.append(date_from)
+    if date_to:
+        conditions.append(f'{date_column} <= ?')
+        params.append(date_to)
+    where = ' AND '.join(conditions) if conditions else '1=1'
+    return where, params
+
+def _iter_export(query, params):
+    with db_connection() as conn:
+        cursor = conn.execute(query, params)
+        yield tuple(column[0] for column in cursor.description)
+        while True:
+            rows = cursor.fetchmany(500)
+            if not rows:
+                break
+            yield from (tuple(row) for row in rows)
+
+def iter_loans_export(status=None, date_from=None, date_to=None):
+    """
+    Stream loans for CSV export straight from the cursor.
+
+    Args:
+        status: Optional loan status ('Active' / 'Closed')
+        date_from, date_to: Optional inclusive given_date range (YYYY-MM-DD)
+
+    Yields:
+        Tuple of column names, then one tuple per loan
+    """
+    where, params = _export_filters('l.given_date', status, date_from, date_to)
+    return _iter_export(f'''
+        SELECT l.*, b.name as borrower_name, b.phone as borrower_phone
         FROM loans l
         JOIN borrowers b ON l.borrower_id = b.id
-        WHERE 1=1
-    '''
-    params = []
-
-    if not include_closed:
-        query += ' AND l.status = "Active"'
-
-    cursor = conn.execute(query, params)
-    loans = [dict(row) for row in cursor.fetchall()]
-
-    # For each loan, check if interest was paid for this month
-    report = {
-        'full_paid': [],
-        'partial_paid': [],
-        'not_paid': [],
-        'totals': {
-            'interest_received': 0,
-            'principal_received': 0,
-            'total_received': 0,
-            'interest_pending_month': 0,
-            'interest_pending': 0
-        }
-    }
-
-    for loan in loans:
-        # Skip if loan was closed before this month
-        if loan['closed_date'] and loan['closed_date'] < report_month:
-            continue
-
-        # Check if loan started in or before the report month
-        from datetime import datetime
-        from dateutil.relativedelta import relativedelta
-
-        loan_start_date = datetime.strptime(loan['given_date'], '%Y-%m-%d')
-        report_month_start = datetime.strptime(report_month + '-01', '%Y-%m-%d')
-        report_month_end = report_month_start + relativedelta(months=1) - relativedelta(days=1)
-
-        # If loan started after the report month ends, skip it entirely
-        if loan_start_date > report_month_end:
-            continue
-
-        interest_due = calculate_interest_due(loan, report_month)
-
-        # Get payments for this month
-        cursor = conn.execute('''
-            SELECT SUM(interest_paid) as interest_paid,
-                   SUM(principal_paid) as principal_paid,
-                   SUM(total_received) as total_received
-            FROM payments
-            WHERE loan_id = ? AND interest_month = ?
-        ''', (loan['id'], report_month))
-
-        payment_data = cursor.fetchone()
-        interest_paid = payment_data['interest_paid'] or 0
-        principal_paid = payment_data['principal_paid'] or 0
-        total_received = payment_data['total_received'] or 0
-
-        # Calculate pending interest for this month only
-        month_pending_interest = interest_due - interest_paid
-
-        # Calculate total pending interest from loan start to report month
-        total_pending_interest = calculate_pending_interest(loan['id'], report_month)
-
-        loan_info = {
-            'loan_id': loan['id'],
-            'borrower_name': loan['borrower_name'],
-            'outstanding_principal': loan['outstanding_principal'],
-            'monthly_rate': loan['monthly_rate'],
-            'interest_due': interest_due,
-            'interest_paid': interest_paid,
-            'interest_pending_month': month_pending_interest,  # Pending for this month only
-            'interest_pending': total_pending_interest,  # Total pending from start
-            'principal_paid': principal_paid,
-            'total_received': total_received
-        }
-
-        # Categorize
-        if interest_paid >= interest_due:
-            report['full_paid'].append(loan_info)
-        elif interest_paid > 0:
-            report['partial_paid'].append(loan_info)
-            # Add month pending only for partial paid (not fully paid)
-            report['totals']['interest_pending_month'] += month_pending_interest
-        else:
-            report['not_paid'].append(loan_info)
-            # Add month pending only for not paid
-            report['totals']['interest_pending_month'] += month_pending_interest
+        WHERE {where}
+        ORDER BY l.created_at DESC
+    ''', params)
+
+def iter_payments_export(status=None, date_from=None, date_to=None):
+    """
+    Stream payments for CSV export straight from the cursor.
+
+    Args:
+        status: Optional status of the payment's loan ('Active' / 'Closed')
+        date_from, date_to: Optional inclusive payment_date range (YYYY-MM-DD)
+
+    Yields:
+        Tuple of column names, then one tuple per payment
+    """
+    where, params = _export_filters('p.payment_date', status, date_from, date_to)
+    return _iter_export(f'''
+        SELECT p.*, b.name as borrower_name
+        FROM payments p
+        JOIN loans l ON p.loan_id = l.id
+        JOIN borrowers b ON l.borrower_id = b.id
+        WHERE {where}
+        ORDER BY p.payment_date DESC
+    ''', params)
+
+@_retry_when_locked
+def rebuild_loan_ledger():
+    """Recreate the loan month ledger from scratch."""
+    with db_connection() as conn:
+        rows = loan_logic.rebuild_loan_ledger(conn)
+        conn.commit()
 
-        # Update totals (these are for all loans)
-        report['totals']['interest_received'] += interest_paid
-        report['totals']['principal_received'] += principal_paid
-        report['totals']['total_received'] += total_received
-        report['totals']['interest_pending'] += total_pending_interest
+    _data_changed('loans')
+    return rows
 
-    conn.close()
-    return report
+@_cached('loans', 'payments', 'borrowers')
+def get_monthly_report(report_month, include_closed=False):
+    """Generate monthly report showing who paid and who didn't."""
+    with db_connection() as conn:
+        return loan_logic.get_monthly_report(conn, report_month, include_closed)
 
 def calculate_pending_interest(loan_id, up_to_month=None):
     """Calculate total pending interest for a loan up to a specific month."""
-    from datetime import datetime
-    from dateutil.relativedelta import relativedelta
-
-    loan = get_loan_by_id(loan_id)
-    if not loan:
-        return 0
-
-    conn = get_db_connection()
-
-    # Get all unique months from loan start to up_to_month or current month
-    if up_to_month is None:
-        up_to_month = datetime.now().strftime('%Y-%m')
-
-    start_date = datetime.strptime(loan['given_date'], '%Y-%m-%d')
-    end_date = datetime.strptime(up_to_month + '-01', '%Y-%m-%d')
-
-    # If loan is closed, only calculate up to closed date
-    if loan['closed_date']:
-        closed_date = datetime.strptime(loan['closed_date'], '%Y-%m-%d')
-        if closed_date < end_date:
-            end_date = closed_date
-
-    total_due = 0
-    total_paid = 0
+    with db_connection() as conn:
+        return loan_logic.calculate_pending_interest(conn, loan_id, up_to_month)
 
-    current = start_date.replace(day=1)
-    while current <= end_date:
-        month_str = current.strftime('%Y-%m')
-
-        # Calculate interest due for this month
-        interest_due = calculate_interest_due(loan, month_str)
-        total_due += interest_due
-
-        # Get interest paid for this month
-        cursor = conn.execute('''
-            SELECT SUM(interest_paid) as interest_paid
-            FROM payments
-            WHERE loan_id = ? AND interest_month = ?
-        ''', (loan_id, month_str))
-
-        result = cursor.fetchone()
-        interest_paid = result['interest_paid'] or 0
-        total_paid += interest_paid
-
-        current += relativedelta(months=1)
-
-    conn.close()
-
-    pending = total_due - total_paid
-    return round(pending, 2)
+def calculate_pending_interest_batch(loan_ids, up_to_month=None):
+    """Calculate total pending interest for many loans using one connection."""
+    with db_connection() as conn:
+        return loan_logic.calculate_pending_interest_batch(conn, loan_ids, up_to_month)
 
 # ============================================================================
 # CHIT MANAGEMENT - NEW MODULE (India chit member + borrower interest adjustment)
@@ -518,208 +1119,251 @@ from database import chit_logic
 # Re-export chit functions for easy access
 # These maintain the same interface but use the new business logic
 
+@_retry_when_locked
 def create_chit_group(name, monthly_installment, start_month, notes=''):
     """Create a new chit group (my membership)."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         chit_id = chit_logic.create_chit_group(conn, name, monthly_installment, start_month, notes)
-        return chit_id
-    finally:
-        conn.close()
 
+    _data_changed('chit_groups')
+    return chit_id
+
+@_retry_when_locked
 def update_chit_group(chit_id, name, monthly_installment, start_month, notes=''):
     """Update chit group details."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         chit_logic.update_chit_group(conn, chit_id, name, monthly_installment, start_month, notes)
-    finally:
-        conn.close()
 
+    _data_changed('chit_groups')
+
+@_retry_when_locked
 def close_chit_group(chit_id, closed_month):
     """Close a chit group."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         chit_logic.close_chit_group(conn, chit_id, closed_month)
-    finally:
-        conn.close()
+
+    _data_changed('chit_groups')
 
 def get_chit_groups(status=None):
     """Get all chit groups."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         return chit_logic.get_chit_groups(conn, status)
-    finally:
-        conn.close()
 
 def get_chit_group_by_id(chit_id):
     """Get a specific chit group."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         return chit_logic.get_chit_group_by_id(conn, chit_id)
-    finally:
-        conn.close()
 
+@_retry_when_locked
 def link_borrower_to_chit(borrower_id, chit_id, notes=''):
     """Link a borrower to a chit group."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         chit_logic.link_borrower_to_chit(conn, borrower_id, chit_id, notes)
-    finally:
-        conn.close()
 
+    _data_changed('borrower_chit_links')
+
+@_retry_when_locked
 def unlink_borrower_from_chit(borrower_id, chit_id):
     """Remove borrower-chit link."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         chit_logic.unlink_borrower_from_chit(conn, borrower_id, chit_id)
-    finally:
-        conn.close()
+
+    _data_changed('borrower_chit_links')
 
 def get_borrower_chit_links(borrower_id=None, chit_id=None):
     """Get borrower-chit links."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         return chit_logic.get_borrower_chit_links(conn, borrower_id, chit_id)
-    finally:
-        conn.close()
 
 def is_borrower_linked_to_chit(borrower_id, chit_id):
     """Check if borrower is linked to chit."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         return chit_logic.is_borrower_linked_to_chit(conn, borrower_id, chit_id)
-    finally:
-        conn.close()
 
+def validate_adjustment(borrower_id, interest_month, chit_id, chit_month, amount):
+    """
+    Validate an adjustment from one consistent read.
+
+    create_adjustment() repeats the same read inside its write transaction,
+    so a result that went stale in between is still caught there.
+
+    Returns:
+        dict with valid, errors, interest_view, chit_view and max_allowed
+    """
+    with db_connection() as conn:
+        context = chit_logic.get_adjustment_context(
+            conn, borrower_id, interest_month, chit_id, chit_month
+        )
+
+    errors = chit_logic.get_adjustment_warnings(context, amount)
+    interest_view = context['interest_view']
+    chit_view = context['chit_view']
+
+    return {
+        'valid': len(errors) == 0,
+        'errors': errors,
+        'interest_view': interest_view,
+        'chit_view': chit_view,
+        'max_allowed': min(interest_view['interest_available'], chit_view['remaining_due'])
+    }
+
+@_retry_when_locked
 def create_adjustment(borrower_id, interest_month, chit_id, chit_month, amount, notes=''):
-    """Create a new adjustment."""
-    conn = get_db_connection()
-    try:
+    """
+    Create a new adjustment.
+
+    The checks are re-read under BEGIN IMMEDIATE, so interest or chit dues
+    used by another writer since validate_adjustment() cannot be allocated twice.
+    """
+    with db_connection() as conn:
+        _begin_write(conn)
         adjustment_id = chit_logic.create_adjustment(
             conn, borrower_id, interest_month, chit_id, chit_month, amount, notes
         )
-        return adjustment_id
-    finally:
-        conn.close()
 
+    _data_changed('adjustments')
+    return adjustment_id
+
+@_retry_when_locked
+def auto_allocate_interest(from_month, to_month, borrower_id=None, chit_id=None,
+                           dry_run=False, notes='Auto allocation'):
+    """
+    Allocate available interest to remaining chit dues for a month range (FIFO).
+
+    The plan is read and, unless dry_run, all its adjustments are inserted
+    inside one write transaction, so either every allocation is made or none.
+
+    Returns:
+        chit_logic.plan_auto_allocation() result plus dry_run
+    """
+    with db_connection() as conn:
+        if not dry_run:
+            _begin_write(conn)
+
+        plan = chit_logic.plan_auto_allocation(conn, from_month, to_month, borrower_id, chit_id)
+
+        if not dry_run:
+            chit_logic.apply_auto_allocation(conn, plan, notes)
+            conn.commit()
+
+    if not dry_run and plan['allocations']:
+        _data_changed('adjustments')
+
+    plan['dry_run'] = dry_run
+    return plan
+
+@_retry_when_locked
 def reverse_adjustment(adjustment_id, notes=''):
     """Reverse an adjustment."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         reversal_id = chit_logic.reverse_adjustment(conn, adjustment_id, notes)
-        return reversal_id
-    finally:
-        conn.close()
+
+    _data_changed('adjustments')
+    return reversal_id
+
+@_retry_when_locked
+def reverse_adjustments_bulk(adjustment_ids=None, borrower_id=None, chit_id=None,
+                             chit_month=None, interest_month_from=None, interest_month_to=None,
+                             notes='', reapply_interest_month=None, reapply_chit_month=None):
+    """Reverse (and optionally re-apply) many adjustments in one transaction."""
+    with db_connection() as conn:
+        _begin_write(conn)
+        result = chit_logic.reverse_adjustments_bulk(
+            conn, adjustment_ids, borrower_id, chit_id, chit_month,
+            interest_month_from, interest_month_to, notes,
+            reapply_interest_month, reapply_chit_month
+        )
+        conn.commit()
+
+    if result['count']:
+        _data_changed('adjustments')
+    return result
 
 def get_adjustments(borrower_id=None, chit_id=None, status='ACTIVE'):
     """Get adjustments with filters."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         return chit_logic.get_adjustments(conn, borrower_id, chit_id, status)
-    finally:
-        conn.close()
 
 def get_adjustment_by_id(adjustment_id):
     """Get a specific adjustment."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         return chit_logic.get_adjustment_by_id(conn, adjustment_id)
-    finally:
-        conn.close()
 
+@_retry_when_locked
 def add_direct_chit_payment(borrower_id, chit_id, chit_month, amount,
                             payment_date, payment_mode='', reference='', notes=''):
     """Add a direct cash payment for chit."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         payment_id = chit_logic.add_direct_chit_payment(
             conn, borrower_id, chit_id, chit_month, amount,
             payment_date, payment_mode, reference, notes
         )
-        return payment_id
-    finally:
-        conn.close()
+
+    _data_changed('direct_chit_payments')
+    return payment_id
 
 def get_direct_chit_payments(borrower_id=None, chit_id=None):
     """Get direct chit payments."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         return chit_logic.get_direct_chit_payments(conn, borrower_id, chit_id)
-    finally:
-        conn.close()
 
 # Calculation functions
 def calculate_interest_received(borrower_id, interest_month):
     """Calculate interest received for borrower + month."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         return chit_logic.calculate_interest_received(conn, borrower_id, interest_month)
-    finally:
-        conn.close()
 
 def calculate_interest_adjusted(borrower_id, interest_month):
     """Calculate interest adjusted for borrower + month."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         return chit_logic.calculate_interest_adjusted(conn, borrower_id, interest_month)
-    finally:
-        conn.close()
 
 def calculate_interest_available(borrower_id, interest_month):
     """Calculate available interest for borrower + month."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         return chit_logic.calculate_interest_available(conn, borrower_id, interest_month)
-    finally:
-        conn.close()
 
 def calculate_chit_due(borrower_id, chit_id, chit_month):
     """Calculate chit due for borrower + chit + month."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         return chit_logic.calculate_chit_due(conn, borrower_id, chit_id, chit_month)
-    finally:
-        conn.close()
 
 def calculate_chit_adjusted_paid(borrower_id, chit_id, chit_month):
     """Calculate total adjusted + paid for chit month."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         return chit_logic.calculate_chit_adjusted_paid(conn, borrower_id, chit_id, chit_month)
-    finally:
-        conn.close()
 
 def calculate_chit_remaining_due(borrower_id, chit_id, chit_month):
     """Calculate remaining due for chit month."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         return chit_logic.calculate_chit_remaining_due(conn, borrower_id, chit_id, chit_month)
-    finally:
-        conn.close()
 
 def get_chit_month_view(borrower_id, chit_id, chit_month):
     """Get complete view of a chit month."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         return chit_logic.get_chit_month_view(conn, borrower_id, chit_id, chit_month)
-    finally:
-        conn.close()
+
+def get_chit_grid(from_month, to_month, chit_id=None, borrower_id=None):
+    """Get the borrower x chit x month grid of dues for a month range."""
+    with db_connection() as conn:
+        return chit_logic.get_chit_grid(conn, from_month, to_month, chit_id, borrower_id)
 
 def get_interest_month_view(borrower_id, interest_month):
     """Get complete view of interest for a month."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         return chit_logic.get_interest_month_view(conn, borrower_id, interest_month)
-    finally:
-        conn.close()
 
+@_cached('borrower_chit_links', 'chit_groups', 'adjustments', 'direct_chit_payments', 'borrowers')
 def get_borrower_chit_summary(borrower_id):
     """Get summary of all chit payments for a borrower."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         return chit_logic.get_borrower_chit_summary(conn, borrower_id)
-    finally:
-        conn.close()
+
+@_cached('borrower_chit_links', 'chit_groups', 'adjustments', 'direct_chit_payments', 'borrowers')
+def get_borrower_chit_summaries(borrower_id=None):
+    """Get chit contribution totals for all borrower-chit links (or one borrower's)."""
+    with db_connection() as conn:
+        return chit_logic.get_borrower_chit_summaries(conn, borrower_id)
 
 # ============================================================================
 # INDIVIDUAL CHIT MANAGEMENT FUNCTIONS
@@ -727,8 +1371,7 @@ def get_borrower_chit_summary(borrower_id):
 
 def get_individual_chits(status=None):
     """Get all individual chits with optional status filter."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         query = 'SELECT * FROM chits'
         params = []
 
@@ -741,58 +1384,144 @@ def get_individual_chits(status=None):
         cursor = conn.execute(query, params)
         chits = [dict(row) for row in cursor.fetchall()]
         return chits
-    finally:
-        conn.close()
 
-def create_individual_chit(borrower_name, chit_name, total_months, start_date, monthly_amounts, prized_month=None, prize_amount=None, notes=''):
-    """Create a new individual chit with monthly schedule."""
-    conn = get_db_connection()
+# Most chits accepted by one create_individual_chits_bulk() call
+MAX_BULK_CHITS = 1000
+
+def _schedule_due_dates(start_date, total_months):
+    """
+    Due dates for months 1..total_months, one calendar month apart.
+
+    Same result as start + relativedelta(months=i): the day is clamped to the
+    last day of shorter months (Jan 31 -> Feb 28 -> Mar 31).
+    """
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    dates = []
+    for i in range(total_months):
+        year, month = divmod(start.month - 1 + i, 12)
+        year += start.year
+        day = min(start.day, calendar.monthrange(year, month + 1)[1])
+        dates.append(f'{year:04d}-{month + 1:02d}-{day:02d}')
+    return dates
+
+def _begin_write(conn):
+    """Start an explicit write transaction unless the caller already has one."""
+    if not conn.in_transaction:
+        conn.execute('BEGIN IMMEDIATE')
+
+def _insert_individual_chit(conn, borrower_name, chit_name, total_months, start_date,
+                            monthly_amounts, prized_month=None, prize_amount=None, notes=''):
+    """Insert a chit and its whole schedule (executemany) without committing."""
+    if not borrower_name or not str(borrower_name).strip():
+        raise ValueError('borrower_name is required')
+    if not chit_name or not str(chit_name).strip():
+        raise ValueError('chit_name is required')
+    total_months = int(total_months)
+    if total_months < 1:
+        raise ValueError('total_months must be at least 1')
     try:
-        # Get or create borrower
-        cursor = conn.execute('SELECT id FROM borrowers WHERE name = ?', (borrower_name,))
-        borrower = cursor.fetchone()
-
-        if borrower:
-            borrower_id = borrower['id']
-        else:
-            cursor = conn.execute('INSERT INTO borrowers (name) VALUES (?)', (borrower_name,))
-            borrower_id = cursor.lastrowid
-
-        # Create chit
-        cursor = conn.execute('''
-            INSERT INTO chits (borrower_id, borrower_name, chit_name, total_months, start_date,
-                             prized_month, prize_amount, notes)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (borrower_id, borrower_name, chit_name, total_months, start_date,
-              prized_month, prize_amount, notes))
+        due_dates = _schedule_due_dates(start_date, total_months)
+    except (TypeError, ValueError):
+        raise ValueError('start_date must be in YYYY-MM-DD format')
 
-        chit_id = cursor.lastrowid
+    # Get or create borrower
+    borrower_id, _ = _get_or_create_borrower_id(conn, borrower_name)
 
-        # Create monthly schedule
-        from dateutil.relativedelta import relativedelta
-        from datetime import datetime as dt
-
-        start = dt.strptime(start_date, '%Y-%m-%d')
-
-        for i in range(total_months):
-            month_number = i + 1
-            due_date = start + relativedelta(months=i)
-            due_amount = monthly_amounts[i] if i < len(monthly_amounts) else 0
+    # Create chit
+    cursor = conn.execute('''
+        INSERT INTO chits (borrower_id, borrower_name, chit_name, total_months, start_date,
+                         prized_month, prize_amount, notes)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (borrower_id, borrower_name, chit_name, total_months, start_date,
+          prized_month, prize_amount, notes))
+
+    chit_id = cursor.lastrowid
+
+    # Create monthly schedule
+    conn.executemany('''
+        INSERT INTO chit_monthly_schedule (chit_id, month_number, due_date, due_amount)
+        VALUES (?, ?, ?, ?)
+    ''', [
+        (chit_id, i + 1, due_date, monthly_amounts[i] if i < len(monthly_amounts) else 0)
+        for i, due_date in enumerate(due_dates)
+    ])
+
+    return chit_id
+
+@_retry_when_locked
+def create_individual_chit(borrower_name, chit_name, total_months, start_date, monthly_amounts, prized_month=None, prize_amount=None, notes=''):
+    """Create a new individual chit with monthly schedule."""
+    with db_connection() as conn:
+        _begin_write(conn)
+        chit_id = _insert_individual_chit(
+            conn, borrower_name, chit_name, total_months, start_date,
+            monthly_amounts, prized_month, prize_amount, notes
+        )
+        conn.commit()
 
-            conn.execute('''
-                INSERT INTO chit_monthly_schedule (chit_id, month_number, due_date, due_amount)
-                VALUES (?, ?, ?, ?)
-            ''', (chit_id, month_number, due_date.strftime('%Y-%m-%d'), due_amount))
+    _data_changed('chits', 'chit_monthly_schedule', 'borrowers')
+    return chit_id
+
+@_retry_when_locked
+def create_individual_chits_bulk(chits):
+    """
+    Create many individual chits in one transaction.
+
+    Each row runs inside its own savepoint, so a bad row is rolled back and
+    reported without aborting the rest of the batch.
+
+    Args:
+        chits: List of dicts with the create_individual_chit() arguments
+
+    Returns:
+        Dict with 'created' [{index, chit_id}] and 'errors' [{index, error}]
+
+    Raises:
+        ValueError: If more than MAX_BULK_CHITS rows are given
+    """
+    if len(chits) > MAX_BULK_CHITS:
+        raise ValueError(f'At most {MAX_BULK_CHITS} chits per request')
+
+    created = []
+    errors = []
+
+    with db_connection() as conn:
+        _begin_write(conn)
+
+        for index, row in enumerate(chits):
+            conn.execute('SAVEPOINT bulk_chit')
+            try:
+                if not isinstance(row, dict):
+                    raise ValueError('Each chit must be an object')
+                chit_id = _insert_individual_chit(
+                    conn,
+                    borrower_name=row.get('borrower_name'),
+                    chit_name=row.get('chit_name'),
+                    total_months=row.get('total_months'),
+                    start_date=row.get('start_date'),
+                    monthly_amounts=row.get('monthly_amounts') or [],
+                    prized_month=row.get('prized_month'),
+                    prize_amount=row.get('prize_amount'),
+                    notes=row.get('notes', '')
+                )
+            except (ValueError, TypeError, sqlite3.IntegrityError) as e:
+                conn.execute('ROLLBACK TO bulk_chit')
+                conn.execute('RELEASE bulk_chit')
+                errors.append({'index': index, 'error': str(e)})
+                continue
+
+            conn.execute('RELEASE bulk_chit')
+            created.append({'index': index, 'chit_id': chit_id})
 
         conn.commit()
-        return chit_id
-    finally:
-        conn.close()
+
+    if created:
+        _data_changed('chits', 'chit_monthly_schedule', 'borrowers')
+    return {'created': created, 'errors': errors}
 
 def get_individual_chit_by_id(chit_id):
     """Get a specific individual chit with schedule."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         # Get chit details
         cursor = conn.execute('SELECT * FROM chits WHERE id = ?', (chit_id,))
         chit = cursor.fetchone()
@@ -812,22 +1541,15 @@ def get_individual_chit_by_id(chit_id):
         chit_dict['schedule'] = [dict(row) for row in cursor.fetchall()]
 
         return chit_dict
-    finally:
-        conn.close()
 
+@_retry_when_locked
 def update_individual_chit(chit_id, borrower_name, chit_name, start_date, monthly_amounts, prized_month=None, prize_amount=None, notes=''):
     """Update an individual chit."""
-    conn = get_db_connection()
-    try:
-        # Get or create borrower
-        cursor = conn.execute('SELECT id FROM borrowers WHERE name = ?', (borrower_name,))
-        borrower = cursor.fetchone()
+    with db_connection() as conn:
+        _begin_write(conn)
 
-        if borrower:
-            borrower_id = borrower['id']
-        else:
-            cursor = conn.execute('INSERT INTO borrowers (name) VALUES (?)', (borrower_name,))
-            borrower_id = cursor.lastrowid
+        # Get or create borrower
+        borrower_id, _ = _get_or_create_borrower_id(conn, borrower_name)
 
         # Update chit
         conn.execute('''
@@ -839,80 +1561,151 @@ def update_individual_chit(chit_id, borrower_name, chit_name, start_date, monthl
               prized_month, prize_amount, notes, chit_id))
 
         # Update monthly schedule amounts (only for pending/future months)
-        from datetime import datetime as dt
-        current_date = dt.now().strftime('%Y-%m-%d')
-
-        cursor = conn.execute('''
-            SELECT id, month_number, payment_status, due_date
-            FROM chit_monthly_schedule
-            WHERE chit_id = ?
-            ORDER BY month_number
-        ''', (chit_id,))
-
-        schedules = cursor.fetchall()
+        current_date = datetime.now().strftime('%Y-%m-%d')
 
-        for schedule in schedules:
-            month_idx = schedule['month_number'] - 1
-            if month_idx < len(monthly_amounts):
-                # Only update if not paid/adjusted and not in the past
-                if schedule['payment_status'] == 'Pending' and schedule['due_date'] >= current_date:
-                    conn.execute('''
-                        UPDATE chit_monthly_schedule
-                        SET due_amount = ?
-                        WHERE id = ?
-                    ''', (monthly_amounts[month_idx], schedule['id']))
+        conn.executemany('''
+            UPDATE chit_monthly_schedule
+            SET due_amount = ?
+            WHERE chit_id = ? AND month_number = ?
+              AND payment_status = 'Pending' AND due_date >= ?
+        ''', [
+            (amount, chit_id, month_idx + 1, current_date)
+            for month_idx, amount in enumerate(monthly_amounts)
+        ])
 
         conn.commit()
-    finally:
-        conn.close()
 
+    _data_changed('chits', 'chit_monthly_schedule', 'borrowers')
+
+@_retry_when_locked
 def close_individual_chit(chit_id):
     """Close an individual chit."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         conn.execute('UPDATE chits SET status = ? WHERE id = ?', ('Closed', chit_id))
         conn.commit()
-    finally:
-        conn.close()
 
-def get_pending_chit_dues():
-    """Get all pending chit dues till current date."""
-    from datetime import datetime
+    _data_changed('chits')
 
-    conn = get_db_connection()
-    try:
-        current_date = datetime.now().strftime('%Y-%m-%d')
+@_cached('chits', 'chit_monthly_schedule')
+def get_pending_chit_dues(from_date=None, to_date=None, borrower_id=None):
+    """
+    Get pending chit dues (due on or before today unless to_date says otherwise).
+
+    Open rows (Pending/Partial with something left) are read through the
+    partial index idx_chit_schedule_open on due_date, so the query only
+    touches unpaid rows in the requested window.
+
+    Args:
+        from_date, to_date: Optional inclusive YYYY-MM-DD due date range
+            (to_date defaults to today)
+        borrower_id: Optional borrower filter
+
+    Returns:
+        Dict with dues (rows ordered by due date), count, total_due,
+        total_paid, total_remaining, from_date and to_date
+
+    Raises:
+        ValueError: If a date is invalid
+    """
+    for value in (from_date, to_date):
+        if value:
+            try:
+                datetime.strptime(value, '%Y-%m-%d')
+            except ValueError:
+                raise ValueError('Dates must be in YYYY-MM-DD format')
 
+    to_date = to_date or datetime.now().strftime('%Y-%m-%d')
+
+    query = '''
+        SELECT
+            cms.id,
+            c.borrower_id,
+            c.borrower_name,
+            c.chit_name,
+            cms.month_number,
+            cms.due_date,
+            cms.due_amount,
+            cms.paid_amount,
+            cms.payment_status,
+            (cms.due_amount - cms.paid_amount) as remaining
+        FROM chit_monthly_schedule cms
+        JOIN chits c ON cms.chit_id = c.id
+        WHERE cms.payment_status IN ('Pending', 'Partial')
+          AND cms.due_amount - cms.paid_amount > 0
+          AND c.status = 'Active'
+          AND cms.due_date <= ?
+    '''
+    params = [to_date]
+
+    if from_date:
+        query += ' AND cms.due_date >= ?'
+        params.append(from_date)
+    if borrower_id:
+        query += ' AND c.borrower_id = ?'
+        params.append(borrower_id)
+
+    query += ' ORDER BY cms.due_date'
+
+    with db_connection() as conn:
+        dues = [dict(row) for row in conn.execute(query, params)]
+
+    return {
+        'dues': dues,
+        'count': len(dues),
+        'total_due': sum((due['due_amount'] for due in dues), 0.0),
+        'total_paid': sum((due['paid_amount'] or 0.0 for due in dues), 0.0),
+        'total_remaining': sum((due['remaining'] for due in dues), 0.0),
+        'from_date': from_date,
+        'to_date': to_date
+    }
+
+def get_chits_dashboard():
+    """
+    Get the chits page summary in one aggregate query.
+
+    Pending dues use the same rules as get_pending_chit_dues() (active chits,
+    Pending/Partial rows with something left, due on or before today) and are
+    totalled by due_amount; total paid covers every schedule row.
+
+    Returns:
+        Dict with active_chits, current_month, current_month_dues,
+        pending_count, total_pending_dues and total_paid
+    """
+    now = datetime.now()
+    current_date = now.strftime('%Y-%m-%d')
+    current_month = now.strftime('%Y-%m')
+
+    with db_connection() as conn:
         cursor = conn.execute('''
+            WITH pending AS (
+                SELECT cms.due_date, cms.due_amount
+                FROM chit_monthly_schedule cms
+                JOIN chits c ON cms.chit_id = c.id
+                WHERE cms.payment_status IN ('Pending', 'Partial')
+                  AND cms.due_amount - cms.paid_amount > 0
+                  AND c.status = 'Active'
+                  AND cms.due_date <= ?
+            )
             SELECT
-                cms.id,
-                c.borrower_id,
-                c.borrower_name,
-                c.chit_name,
-                cms.month_number,
-                cms.due_date,
-                cms.due_amount,
-                cms.paid_amount,
-                cms.payment_status,
-                (cms.due_amount - cms.paid_amount) as remaining
-            FROM chit_monthly_schedule cms
-            JOIN chits c ON cms.chit_id = c.id
-            WHERE cms.payment_status IN ('Pending', 'Partial')
-              AND c.status = 'Active'
-              AND (cms.due_amount - cms.paid_amount) > 0
-              AND cms.due_date <= ?
-            ORDER BY cms.due_date
-        ''', (current_date,))
-
-        dues = [dict(row) for row in cursor.fetchall()]
-        return dues
-    finally:
-        conn.close()
-
+                (SELECT COUNT(*) FROM chits WHERE status = 'Active') as active_chits,
+                (SELECT COALESCE(SUM(due_amount), 0) FROM pending
+                 WHERE substr(due_date, 1, 7) = ?) as current_month_dues,
+                (SELECT COUNT(*) FROM pending) as pending_count,
+                (SELECT COALESCE(SUM(due_amount), 0) FROM pending) as total_pending_dues,
+                (SELECT COALESCE(SUM(cms.paid_amount), 0)
+                 FROM chit_monthly_schedule cms
+                 JOIN chits c ON cms.chit_id = c.id) as total_paid
+        ''', (current_date, current_month))
+
+        dashboard = dict(cursor.fetchone())
+
+    dashboard['current_month'] = current_month
+    return dashboard
+
+@_retry_when_locked
 def pay_chit_schedule(schedule_id, paid_amount, paid_date, payment_mode='', notes=''):
     """Mark a chit schedule item as paid."""
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         # Get current schedule details
         cursor = conn.execute('''
             SELECT due_amount, paid_amount
@@ -947,56 +1740,118 @@ def pay_chit_schedule(schedule_id, paid_amount, paid_date, payment_mode='', note
         ''', (new_paid_amount, paid_date, payment_mode, payment_status, notes, schedule_id))
 
         conn.commit()
-    finally:
-        conn.close()
-
-def get_out_of_pocket_payments():
-    """Get all out-of-pocket chit payments (showing only the out-of-pocket portion)."""
-    conn = get_db_connection()
-    try:
-        cursor = conn.execute('''
-            SELECT
-                cms.id,
-                c.borrower_name,
-                c.chit_name,
-                cms.month_number,
-                cms.due_date,
-                cms.due_amount,
-                cms.paid_amount,
-                cms.paid_date,
-                cms.payment_mode,
-                cms.payment_status,
-                cms.notes,
-                COALESCE((SELECT SUM(adjusted_amount) FROM chit_adjustments WHERE chit_schedule_id = cms.id), 0) as adjusted_amount
-            FROM chit_monthly_schedule cms
-            JOIN chits c ON cms.chit_id = c.id
-            WHERE cms.payment_status IN ('Paid', 'Partial')
-              AND cms.paid_amount > 0
-            ORDER BY cms.paid_date DESC, c.borrower_name
-        ''')
-
-        all_records = [dict(row) for row in cursor.fetchall()]
 
-        # Calculate out-of-pocket amount for each record
-        payments = []
-        for record in all_records:
-            out_of_pocket_amount = record['paid_amount'] - record['adjusted_amount']
+    _data_changed('chit_monthly_schedule')
+
+def get_out_of_pocket_payments(from_date=None, to_date=None, limit=None, cursor=None):
+    """
+    Get out-of-pocket chit payments (showing only the out-of-pocket portion).
+
+    Adjustments are summed per schedule row once and joined in, and rows with
+    nothing paid out of pocket are filtered in SQL. Without limit/cursor every
+    matching row is returned as a list (as before); with either, one page is
+    returned with next_cursor (keyset on paid date, borrower name, id).
+
+    Args:
+        from_date, to_date: Optional inclusive YYYY-MM-DD paid date range
+        limit: Page size, at least 1 (capped at MAX_PAGE_SIZE)
+        cursor: next_cursor from the previous page
+
+    Returns:
+        List of schedule row dicts with adjusted_amount and
+        out_of_pocket_amount, or {'payments': [...], 'next_cursor': str or None}
+        when paging
+
+    Raises:
+        ValueError: If a date, limit or the cursor is invalid
+    """
+    if limit is not None and limit < 1:
+        raise ValueError('limit must be at least 1')
+    for value in (from_date, to_date):
+        if value:
+            try:
+                datetime.strptime(value, '%Y-%m-%d')
+            except ValueError:
+                raise ValueError('Dates must be in YYYY-MM-DD format')
+
+    paged = limit is not None or cursor is not None
 
-            # Only include if there's an actual out-of-pocket payment
-            if out_of_pocket_amount > 0:
-                record['out_of_pocket_amount'] = out_of_pocket_amount
-                payments.append(record)
+    query = '''
+        SELECT
+            cms.id,
+            c.borrower_name,
+            c.chit_name,
+            cms.month_number,
+            cms.due_date,
+            cms.due_amount,
+            cms.paid_amount,
+            cms.paid_date,
+            cms.payment_mode,
+            cms.payment_status,
+            cms.notes,
+            COALESCE(ca.adjusted_amount, 0) as adjusted_amount,
+            cms.paid_amount - COALESCE(ca.adjusted_amount, 0) as out_of_pocket_amount
+        FROM chit_monthly_schedule cms
+        JOIN chits c ON cms.chit_id = c.id
+        LEFT JOIN (
+            SELECT chit_schedule_id, SUM(adjusted_amount) as adjusted_amount
+            FROM chit_adjustments
+            GROUP BY chit_schedule_id
+        ) ca ON ca.chit_schedule_id = cms.id
+        WHERE cms.payment_status IN ('Paid', 'Partial')
+          AND cms.paid_amount > 0
+          AND cms.paid_amount - COALESCE(ca.adjusted_amount, 0) > 0
+    '''
+    params = []
 
+    if from_date:
+        query += ' AND cms.paid_date >= ?'
+        params.append(from_date)
+    if to_date:
+        query += ' AND cms.paid_date <= ?'
+        params.append(to_date)
+
+    if cursor:
+        value, schedule_id = _decode_cursor(cursor, 'out_of_pocket')
+        try:
+            paid_date, borrower_name = value
+        except (TypeError, ValueError):
+            raise ValueError('Invalid cursor')
+        query += '''
+          AND (COALESCE(cms.paid_date, '') < ?
+               OR (COALESCE(cms.paid_date, '') = ?
+                   AND (c.borrower_name > ? OR (c.borrower_name = ? AND cms.id > ?))))
+        '''
+        params.extend([paid_date, paid_date, borrower_name, borrower_name, schedule_id])
+
+    query += " ORDER BY COALESCE(cms.paid_date, '') DESC, c.borrower_name, cms.id"
+
+    if paged:
+        limit = MAX_PAGE_SIZE if limit is None else min(limit, MAX_PAGE_SIZE)
+        query += ' LIMIT ?'
+        params.append(limit + 1)
+
+    with db_connection() as conn:
+        payments = [dict(row) for row in conn.execute(query, params)]
+
+    if not paged:
         return payments
-    finally:
-        conn.close()
 
+    next_cursor = None
+    if len(payments) > limit:
+        payments = payments[:limit]
+        last = payments[-1]
+        next_cursor = _encode_cursor(
+            'out_of_pocket', [last['paid_date'] or '', last['borrower_name']], last['id']
+        )
+    return {'payments': payments, 'next_cursor': next_cursor}
+
+@_retry_when_locked
 def create_chit_adjustment(schedule_id, loan_id, interest_month, adjusted_amount, notes=''):
     """Create a chit adjustment against loan interest."""
     from datetime import datetime
 
-    conn = get_db_connection()
-    try:
+    with db_connection() as conn:
         # Get current date for adjustment_date
         adjustment_date = datetime.now().strftime('%Y-%m-%d')
 
@@ -1005,18 +1860,10 @@ def create_chit_adjustment(schedule_id, loan_id, interest_month, adjusted_amount
         if not loan:
             raise Exception('Loan not found')
 
-        # Calculate interest due for the specified month
-        interest_due = calculate_interest_due(loan, interest_month)
-
-        # Get already paid interest for this month
-        cursor = conn.execute('''
-            SELECT COALESCE(SUM(interest_paid), 0) as total_paid
-            FROM payments
-            WHERE loan_id = ? AND interest_month = ?
-        ''', (loan_id, interest_month))
-
-        result = cursor.fetchone()
-        already_paid = result['total_paid'] or 0
+        # Interest due and already paid interest for the specified month
+        position = loan_logic.get_month_position(conn, loan, interest_month)
+        interest_due = position['interest_due']
+        already_paid = position['interest_paid']
 
         # Calculate available interest
         available_interest = interest_due - already_paid
@@ -1106,15 +1953,15 @@ def create_chit_adjustment(schedule_id, loan_id, interest_month, adjusted_amount
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         ''', (loan_id, adjustment_date, interest_month, amount_to_adjust, amount_to_adjust, 0.0, 'Adjustment', payment_notes))
 
+        loan_logic.refresh_stale_ledgers(conn)
         conn.commit()
+        _data_changed('payments', 'chit_adjustments', 'chit_monthly_schedule')
 
         # Return adjustment_id and partial adjustment message if applicable
         return {
             'adjustment_id': adjustment_id,
             'partial_adjustment_msg': partial_adjustment_msg
         }
-    finally:
-        conn.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,696 @@
+"""
+LOAN MODULE BUSINESS LOGIC
+Interest schedules and reports for loans
+
+Functions take an open connection (same convention as chit_logic).
+
+Per-month interest figures are materialized in loan_month_ledger, one row per
+(loan_id, interest_month) from the month the loan was given up to its last
+payment month. Triggers on loans/payments record the earliest month that
+changed in loan_ledger_stale; refresh_stale_ledgers() recomputes only those
+rows, and reports read the ledger instead of walking payments month by month.
+Months after a loan's last ledger row have no payments, so their figures are
+extended from that row in closed form.
+"""
+
+from datetime import datetime
+
+# Max loan ids per IN (...) query (stays under SQLite's variable limit)
+BATCH_SIZE = 500
+
+# from_month used to mark a loan for a full ledger rebuild
+FULL_REBUILD_MONTH = '0000-00'
+
+
+# ============================================================================
+# MONTH HELPERS
+# ============================================================================
+
+def month_index(month):
+    """
+    Convert a YYYY-MM (or YYYY-MM-DD) string into a month counter.
+
+    Returns: int
+    """
+    return int(month[:4]) * 12 + int(month[5:7]) - 1
+
+
+def month_from_index(index):
+    """
+    Convert a month counter back into a YYYY-MM string.
+
+    Returns: str
+    """
+    return f'{index // 12:04d}-{index % 12 + 1:02d}'
+
+
+# ============================================================================
+# INTEREST CALCULATIONS (in memory, from per-month payment totals)
+# ============================================================================
+
+def get_monthly_payment_totals(conn, up_to_month=None, loan_ids=None, after_month=None):
+    """
+    Load per-(loan, interest_month) payment totals in one query.
+
+    Args:
+        conn: Database connection
+        up_to_month: Optional YYYY-MM - months after this are not loaded
+        loan_ids: Optional list of loan IDs (default: all loans)
+        after_month: Optional YYYY-MM - only months after this are loaded
+
+    Returns:
+        dict of loan_id -> list of (interest_month, interest_paid,
+        principal_paid, total_received), ordered by interest_month
+    """
+    query = '''
+        SELECT loan_id,
+               interest_month,
+               SUM(interest_paid) as interest_paid,
+               SUM(principal_paid) as principal_paid,
+               SUM(total_received) as total_received
+        FROM payments
+        WHERE 1=1
+    '''
+    params = []
+
+    if up_to_month:
+        query += ' AND interest_month <= ?'
+        params.append(up_to_month)
+
+    if after_month:
+        query += ' AND interest_month > ?'
+        params.append(after_month)
+
+    if loan_ids is not None:
+        query += f' AND loan_id IN ({",".join("?" * len(loan_ids))})'
+        params.extend(loan_ids)
+
+    query += ' GROUP BY loan_id, interest_month ORDER BY loan_id, interest_month'
+
+    totals = {}
+    for row in conn.execute(query, params):
+        totals.setdefault(row['loan_id'], []).append((
+            row['interest_month'],
+            row['interest_paid'] or 0,
+            row['principal_paid'] or 0,
+            row['total_received'] or 0
+        ))
+    return totals
+
+
+def interest_due_for_opening(loan, opening_principal):
+    """
+    Interest due for one month on the given opening principal.
+
+    Returns: float
+    """
+    interest_due = opening_principal * (loan['monthly_rate'] / 100)
+    return round(interest_due, 2)
+
+
+def pending_interest_end_month(loan, up_to_month):
+    """
+    Last month that counts towards pending interest.
+    Closed loans stop accruing after their closed month.
+
+    Returns: str (YYYY-MM)
+    """
+    if loan['closed_date'] and loan['closed_date'][:7] < up_to_month:
+        return loan['closed_date'][:7]
+    return up_to_month
+
+
+def build_ledger_rows(loan, month_totals, seed=None):
+    """
+    Walk a loan month by month and build its ledger rows.
+
+    Args:
+        loan: Loan dict (id, principal_given, monthly_rate, given_date, closed_date)
+        month_totals: Sorted per-month payment totals for this loan
+                      (see get_monthly_payment_totals); only months after the
+                      seed month when a seed is given
+        seed: Optional last ledger row to continue from (dict). Without a
+              seed the walk starts at the month the loan was given.
+
+    Returns:
+        List of (loan_id, interest_month, opening_principal, interest_due,
+        interest_paid, principal_paid, total_received, pending_interest)
+    """
+    position = 0
+    count = len(month_totals)
+
+    if seed:
+        start = month_index(seed['interest_month']) + 1
+        opening_principal = seed['opening_principal'] - seed['principal_paid']
+        pending = seed['pending_interest']
+    else:
+        start = month_index(loan['given_date'])
+        opening_principal = loan['principal_given']
+        pending = 0
+
+        # Principal paid against months before the loan start still
+        # reduces the opening principal of the first month
+        while position < count and month_index(month_totals[position][0]) < start:
+            opening_principal -= month_totals[position][2]
+            position += 1
+
+    if count > position:
+        end = month_index(month_totals[-1][0])
+    else:
+        end = start - 1
+    if not seed:
+        end = max(end, start)
+
+    closed_index = month_index(loan['closed_date']) if loan['closed_date'] else None
+
+    rows = []
+    for index in range(start, end + 1):
+        interest_paid = principal_paid = total_received = 0
+        if position < count and month_index(month_totals[position][0]) == index:
+            _, interest_paid, principal_paid, total_received = month_totals[position]
+            position += 1
+
+        interest_due = interest_due_for_opening(loan, opening_principal)
+
+        # Running pending interest stops at the closed month
+        if closed_index is None or index <= closed_index:
+            pending += interest_due - interest_paid
+
+        rows.append((loan['id'], month_from_index(index), opening_principal, interest_due,
+                     interest_paid, principal_paid, total_received, pending))
+
+        opening_principal -= principal_paid
+
+    return rows
+
+
+def ledger_position(loan, row, month):
+    """
+    Interest figures for `month` from the latest ledger row at or before it.
+
+    Months after the last ledger row have no payments, so the opening
+    principal stays at that row's closing principal and pending interest
+    grows by one month's due per month (until the closed month).
+
+    Args:
+        loan: Loan dict (monthly_rate, closed_date)
+        row: Latest ledger row (dict) with interest_month <= month, or None
+        month: YYYY-MM
+
+    Returns:
+        dict with interest_due, interest_paid, principal_paid,
+        total_received and pending_interest
+    """
+    if row is None:
+        # Month is before the loan was given
+        return None
+
+    if row['interest_month'] == month:
+        return {
+            'interest_due': row['interest_due'],
+            'interest_paid': row['interest_paid'],
+            'principal_paid': row['principal_paid'],
+            'total_received': row['total_received'],
+            'pending_interest': round(row['pending_interest'], 2)
+        }
+
+    interest_due = interest_due_for_opening(loan, row['opening_principal'] - row['principal_paid'])
+    end = month_index(pending_interest_end_month(loan, month))
+    months = max(0, end - month_index(row['interest_month']))
+
+    return {
+        'interest_due': interest_due,
+        'interest_paid': 0,
+        'principal_paid': 0,
+        'total_received': 0,
+        'pending_interest': round(row['pending_interest'] + interest_due * months, 2)
+    }
+
+
+# ============================================================================
+# LEDGER MAINTENANCE
+# ============================================================================
+
+def _insert_ledger_rows(conn, rows):
+    conn.executemany('''
+        INSERT INTO loan_month_ledger (
+            loan_id, interest_month, opening_principal, interest_due,
+            interest_paid, principal_paid, total_received, pending_interest
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+
+
+def refresh_loan_ledger(conn, loan_id, from_month=FULL_REBUILD_MONTH):
+    """
+    Recompute a loan's ledger rows from from_month onwards.
+
+    Rows before from_month are kept and the walk continues from the last of
+    them, so a payment only costs the months from its interest_month on.
+    Does not commit.
+    """
+    cursor = conn.execute('''
+        SELECT id, principal_given, monthly_rate, given_date, closed_date
+        FROM loans WHERE id = ?
+    ''', (loan_id,))
+    loan = cursor.fetchone()
+
+    if not loan:
+        conn.execute('DELETE FROM loan_month_ledger WHERE loan_id = ?', (loan_id,))
+        return
+
+    loan = dict(loan)
+    seed = None
+
+    if from_month > loan['given_date'][:7]:
+        cursor = conn.execute('''
+            SELECT * FROM loan_month_ledger
+            WHERE loan_id = ? AND interest_month < ?
+            ORDER BY interest_month DESC
+            LIMIT 1
+        ''', (loan_id, from_month))
+        row = cursor.fetchone()
+        seed = dict(row) if row else None
+
+    if seed:
+        conn.execute('''
+            DELETE FROM loan_month_ledger
+            WHERE loan_id = ? AND interest_month > ?
+        ''', (loan_id, seed['interest_month']))
+        month_totals = get_monthly_payment_totals(
+            conn, loan_ids=[loan_id], after_month=seed['interest_month']
+        ).get(loan_id, [])
+
+        if not month_totals:
+            # Latest payment was removed - drop trailing months without payments
+            cursor = conn.execute('''
+                SELECT MAX(interest_month) as last_month FROM payments WHERE loan_id = ?
+            ''', (loan_id,))
+            last_month = max(cursor.fetchone()['last_month'] or '', loan['given_date'][:7])
+            conn.execute('''
+                DELETE FROM loan_month_ledger
+                WHERE loan_id = ? AND interest_month > ?
+            ''', (loan_id, last_month))
+            return
+    else:
+        conn.execute('DELETE FROM loan_month_ledger WHERE loan_id = ?', (loan_id,))
+        month_totals = get_monthly_payment_totals(conn, loan_ids=[loan_id]).get(loan_id, [])
+
+    _insert_ledger_rows(conn, build_ledger_rows(loan, month_totals, seed))
+
+
+def refresh_stale_ledgers(conn):
+    """
+    Bring the ledger up to date for every loan flagged in loan_ledger_stale.
+    Write paths call this before committing; reads call sync_ledger().
+    Does not commit.
+
+    Returns:
+        Number of loans refreshed
+    """
+    cursor = conn.execute('SELECT loan_id, from_month FROM loan_ledger_stale')
+    stale = cursor.fetchall()
+
+    for row in stale:
+        refresh_loan_ledger(conn, row['loan_id'], row['from_month'])
+
+    conn.executemany('DELETE FROM loan_ledger_stale WHERE loan_id = ?',
+                     [(row['loan_id'],) for row in stale])
+    return len(stale)
+
+
+def sync_ledger(conn):
+    """
+    Refresh stale ledger rows (e.g. after payments were edited directly in
+    SQLite) and commit if anything changed.
+    """
+    if refresh_stale_ledgers(conn):
+        conn.commit()
+
+
+def rebuild_loan_ledger(conn):
+    """
+    Recreate the whole ledger from loans and payments.
+    Does not commit.
+
+    Returns:
+        Number of ledger rows written
+    """
+    conn.execute('DELETE FROM loan_month_ledger')
+    conn.execute('DELETE FROM loan_ledger_stale')
+
+    cursor = conn.execute('''
+        SELECT id, principal_given, monthly_rate, given_date, closed_date
+        FROM loans
+    ''')
+    loans = [dict(row) for row in cursor.fetchall()]
+    payment_totals = get_monthly_payment_totals(conn)
+
+    written = 0
+    for loan in loans:
+        rows = build_ledger_rows(loan, payment_totals.get(loan['id'], []))
+        _insert_ledger_rows(conn, rows)
+        written += len(rows)
+
+    return written
+
+
+# ============================================================================
+# LEDGER READS
+# ============================================================================
+
+def get_ledger_rows(conn, loan_ids, month):
+    """
+    Latest ledger row at or before `month` for each loan (indexed lookups).
+
+    Returns:
+        dict of loan_id -> ledger row (dict)
+    """
+    rows = {}
+    loan_ids = list(loan_ids)
+
+    for offset in range(0, len(loan_ids), BATCH_SIZE):
+        chunk = loan_ids[offset:offset + BATCH_SIZE]
+        cursor = conn.execute(f'''
+            SELECT g.*
+            FROM loans l
+            JOIN loan_month_ledger g ON g.loan_id = l.id
+             AND g.interest_month = (
+                SELECT MAX(interest_month) FROM loan_month_ledger
+                WHERE loan_id = l.id AND interest_month <= ?
+             )
+            WHERE l.id IN ({",".join("?" * len(chunk))})
+        ''', [month] + chunk)
+
+        for row in cursor.fetchall():
+            rows[row['loan_id']] = dict(row)
+
+    return rows
+
+
+def get_month_position(conn, loan, interest_month):
+    """
+    Interest due and payments of one loan for one month, read from the ledger.
+
+    Returns:
+        dict with interest_due, interest_paid, principal_paid,
+        total_received and pending_interest
+    """
+    sync_ledger(conn)
+
+    row = get_ledger_rows(conn, [loan['id']], interest_month).get(loan['id'])
+    position = ledger_position(loan, row, interest_month)
+    if position:
+        return position
+
+    # Month before the loan was given - not covered by the ledger
+    cursor = conn.execute('''
+        SELECT SUM(CASE WHEN interest_month < ? THEN principal_paid END) as principal_paid_before,
+               SUM(CASE WHEN interest_month = ? THEN interest_paid END) as interest_paid,
+               SUM(CASE WHEN interest_month = ? THEN principal_paid END) as principal_paid,
+               SUM(CASE WHEN interest_month = ? THEN total_received END) as total_received
+        FROM payments
+        WHERE loan_id = ? AND interest_month <= ?
+    ''', (interest_month, interest_month, interest_month, interest_month,
+          loan['id'], interest_month))
+    result = cursor.fetchone()
+
+    opening_principal = loan['principal_given'] - (result['principal_paid_before'] or 0)
+    return {
+        'interest_due': interest_due_for_opening(loan, opening_principal),
+        'interest_paid': result['interest_paid'] or 0,
+        'principal_paid': result['principal_paid'] or 0,
+        'total_received': result['total_received'] or 0,
+        'pending_interest': 0
+    }
+
+
+def calculate_interest_due(conn, loan, interest_month):
+    """
+    Calculate interest due for a specific month.
+    Opening principal = principal_given - principal paid for earlier months.
+
+    Returns: float
+    """
+    return get_month_position(conn, loan, interest_month)['interest_due']
+
+
+def calculate_pending_interest(conn, loan_id, up_to_month=None):
+    """
+    Calculate total pending interest for a loan up to a specific month
+    (default: current month).
+
+    Returns: float
+    """
+    return calculate_pending_interest_batch(conn, [loan_id], up_to_month).get(loan_id, 0)
+
+
+def calculate_pending_interest_batch(conn, loan_ids, up_to_month=None):
+    """
+    Calculate pending interest for many loans on one connection.
+
+    Returns:
+        dict of loan_id -> pending interest (unknown loan ids are omitted)
+    """
+    if up_to_month is None:
+        up_to_month = datetime.now().strftime('%Y-%m')
+
+    sync_ledger(conn)
+
+    pending = {}
+    loan_ids = list(loan_ids)
+
+    for offset in range(0, len(loan_ids), BATCH_SIZE):
+        chunk = loan_ids[offset:offset + BATCH_SIZE]
+        cursor = conn.execute(f'''
+            SELECT id, monthly_rate, closed_date
+            FROM loans
+            WHERE id IN ({",".join("?" * len(chunk))})
+        ''', chunk)
+        loans = [dict(row) for row in cursor.fetchall()]
+        ledger_rows = get_ledger_rows(conn, chunk, up_to_month)
+
+        for loan in loans:
+            position = ledger_position(loan, ledger_rows.get(loan['id']), up_to_month)
+            pending[loan['id']] = position['pending_interest'] if position else 0
+
+    return pending
+
+
+# ============================================================================
+# MONTHLY REPORT
+# ============================================================================
+
+def get_monthly_report(conn, report_month, include_closed=False):
+    """
+    Generate monthly report showing who paid and who didn't.
+
+    Each loan is joined to its latest ledger row at or before the report
+    month, so the whole report is one indexed read.
+
+    Returns:
+        dict with full_paid / partial_paid / not_paid lists and totals
+    """
+    sync_ledger(conn)
+
+    query = '''
+        SELECT l.*, b.name as borrower_name,
+               g.interest_month as ledger_month,
+               g.opening_principal as ledger_opening_principal,
+               g.interest_due as ledger_interest_due,
+               g.interest_paid as ledger_interest_paid,
+               g.principal_paid as ledger_principal_paid,
+               g.total_received as ledger_total_received,
+               g.pending_interest as ledger_pending_interest
+        FROM loans l
+        JOIN borrowers b ON l.borrower_id = b.id
+        JOIN loan_month_ledger g ON g.loan_id = l.id
+         AND g.interest_month = (
+            SELECT MAX(interest_month) FROM loan_month_ledger
+            WHERE loan_id = l.id AND interest_month <= ?
+         )
+        WHERE 1=1
+    '''
+
+    if not include_closed:
+        query += ' AND l.status = "Active"'
+
+    query += ' ORDER BY l.id'
+
+    loans = [dict(row) for row in conn.execute(query, (report_month,))]
+
+    report = {
+        'full_paid': [],
+        'partial_paid': [],
+        'not_paid': [],
+        'totals': {
+            'interest_received': 0,
+            'principal_received': 0,
+            'total_received': 0,
+            'interest_pending_month': 0,
+            'interest_pending': 0
+        }
+    }
+
+    for loan in loans:
+        # Skip if loan was closed before this month
+        if loan['closed_date'] and loan['closed_date'] < report_month:
+            continue
+
+        ledger_row = {
+            'interest_month': loan['ledger_month'],
+            'opening_principal': loan['ledger_opening_principal'],
+            'interest_due': loan['ledger_interest_due'],
+            'interest_paid': loan['ledger_interest_paid'],
+            'principal_paid': loan['ledger_principal_paid'],
+            'total_received': loan['ledger_total_received'],
+            'pending_interest': loan['ledger_pending_interest']
+        }
+        position = ledger_position(loan, ledger_row, report_month)
+
+        interest_due = position['interest_due']
+        interest_paid = position['interest_paid']
+        principal_paid = position['principal_paid']
+        total_received = position['total_received']
+
+        # Calculate pending interest for this month only
+        month_pending_interest = interest_due - interest_paid
+
+        # Total pending interest from loan start to report month
+        total_pending_interest = position['pending_interest']
+
+        loan_info = {
+            'loan_id': loan['id'],
+            'borrower_name': loan['borrower_name'],
+            'outstanding_principal': loan['outstanding_principal'],
+            'monthly_rate': loan['monthly_rate'],
+            'interest_due': interest_due,
+            'interest_paid': interest_paid,
+            'interest_pending_month': month_pending_interest,  # Pending for this month only
+            'interest_pending': total_pending_interest,  # Total pending from start
+            'principal_paid': principal_paid,
+            'total_received': total_received
+        }
+
+        # Categorize
+        if interest_paid >= interest_due:
+            report['full_paid'].append(loan_info)
+        elif interest_paid > 0:
+            report['partial_paid'].append(loan_info)
+            # Add month pending only for partial paid (not fully paid)
+            report['totals']['interest_pending_month'] += month_pending_interest
+        else:
+            report['not_paid'].append(loan_info)
+            # Add month pending only for not paid
+            report['totals']['interest_pending_month'] += month_pending_interest
+
+        # Update totals (these are for all loans)
+        report['totals']['interest_received'] += interest_paid
+        report['totals']['principal_received'] += principal_paid
+        report['totals']['total_received'] += total_received
+        report['totals']['interest_pending'] += total_pending_interest
+
+    return report
+
+
+def get_person_history(conn, name_key, as_of_month=None):
+    """
+    Complete payment history for a borrower, grouped by loan.
+
+    One query joins the borrower's loans to their payments and to the latest
+    ledger row at or before as_of_month; rows are grouped into
+    loans -> payments and per-loan totals are added up in the same pass.
+
+    Args:
+        conn: Database connection
+        name_key: Normalized borrower name (borrowers.name_key)
+        as_of_month: Month for pending interest (defaults to current month)
+
+    Returns:
+        List of {'loan', 'payments', 'totals'} in loan given_date order;
+        totals has total_received, interest_paid, principal_paid and
+        pending_interest
+    """
+    if as_of_month is None:
+        as_of_month = datetime.now().strftime('%Y-%m')
+
+    sync_ledger(conn)
+
+    cursor = conn.execute('''
+        SELECT l.id as _loan_id,
+               l.principal_given as _principal_given,
+               l.given_date as _given_date,
+               l.status as _status,
+               l.monthly_rate as _monthly_rate,
+               l.closed_date as _closed_date,
+               g.interest_month as _ledger_month,
+               g.opening_principal as _ledger_opening_principal,
+               g.interest_due as _ledger_interest_due,
+               g.interest_paid as _ledger_interest_paid,
+               g.principal_paid as _ledger_principal_paid,
+               g.total_received as _ledger_total_received,
+               g.pending_interest as _ledger_pending_interest,
+               p.*
+        FROM loans l
+        JOIN borrowers b ON l.borrower_id = b.id
+        LEFT JOIN loan_month_ledger g ON g.loan_id = l.id
+         AND g.interest_month = (
+            SELECT MAX(interest_month) FROM loan_month_ledger
+            WHERE loan_id = l.id AND interest_month <= ?
+         )
+        LEFT JOIN payments p ON p.loan_id = l.id
+        WHERE b.name_key = ?
+        ORDER BY l.given_date, l.id, p.payment_date DESC, p.interest_month DESC
+    ''', (as_of_month, name_key))
+
+    history = []
+    entry = None
+
+    for row in cursor:
+        row = dict(row)
+
+        if entry is None or entry['loan']['id'] != row['_loan_id']:
+            loan = {
+                'id': row['_loan_id'],
+                'principal_given': row['_principal_given'],
+                'given_date': row['_given_date'],
+                'status': row['_status']
+            }
+            ledger_row = None
+            if row['_ledger_month'] is not None:
+                ledger_row = {
+                    'interest_month': row['_ledger_month'],
+                    'opening_principal': row['_ledger_opening_principal'],
+                    'interest_due': row['_ledger_interest_due'],
+                    'interest_paid': row['_ledger_interest_paid'],
+                    'principal_paid': row['_ledger_principal_paid'],
+                    'total_received': row['_ledger_total_received'],
+                    'pending_interest': row['_ledger_pending_interest']
+                }
+            position = ledger_position(
+                {'monthly_rate': row['_monthly_rate'], 'closed_date': row['_closed_date']},
+                ledger_row, as_of_month
+            )
+
+            entry = {
+                'loan': loan,
+                'payments': [],
+                'totals': {
+                    'total_received': 0,
+                    'interest_paid': 0,
+                    'principal_paid': 0,
+                    'pending_interest': position['pending_interest'] if position else 0
+                }
+            }
+            history.append(entry)
+
+        if row['id'] is None:
+            # Loan without payments (LEFT JOIN placeholder row)
+            continue
+
+        payment = {key: value for key, value in row.items() if not key.startswith('_')}
+        entry['payments'].append(payment)
+        entry['totals']['total_received'] += payment['total_received'] or 0
+        entry['totals']['interest_paid'] += payment['interest_paid'] or 0
+        entry['totals']['principal_paid'] += payment['principal_paid'] or 0
+
+    return history
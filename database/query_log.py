@@ -0,0 +1,299 @@
+"""
+QUERY LOG
+SQL statement counts, row counts and timings per request, plus a slow-query log
+
+Connections created by db_manager use QueryCursor, which counts every
+statement and times it from execute() until its rows have been read, and
+counts the rows read. Totals go to the current Flask request, to any
+track() blocks on the thread and to process-wide totals. Statements that
+reach the slow-query threshold (execute plus fetching) are logged once,
+with their EXPLAIN QUERY PLAN.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from time import perf_counter
+from flask import g, has_app_context
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised by QueryLog.budget() when a block runs more statements than allowed."""
+
+
+class QueryStats:
+    """Statement, row and time totals for one unit of work."""
+
+    __slots__ = ('queries', 'rows', 'seconds', 'slow')
+
+    def __init__(self):
+        self.queries = 0
+        self.rows = 0
+        self.seconds = 0.0
+        self.slow = 0
+
+    @property
+    def ms(self):
+        return self.seconds * 1000
+
+    def add(self, rows, seconds, slow):
+        self.queries += 1
+        self.rows += rows
+        self.seconds += seconds
+        self.slow += slow
+
+    def add_rows(self, rows, seconds):
+        self.rows += rows
+        self.seconds += seconds
+
+    def as_dict(self):
+        return {
+            'queries': self.queries,
+            'rows': self.rows,
+            'time_ms': round(self.ms, 3),
+            'slow': self.slow
+        }
+
+
+class QueryLog:
+    """Collects QueryStats per request / tracked block and logs slow statements."""
+
+    def __init__(self, slow_query_ms=100, log_path=None, max_recent=50):
+        """
+        Args:
+            slow_query_ms: Statements taking at least this long are logged (0 disables)
+            log_path: Optional file the slow-query log is also written to
+            max_recent: Slow statements kept for the diagnostics endpoint
+        """
+        self.slow_query_ms = slow_query_ms
+        self.totals = QueryStats()
+        self._recent = deque(maxlen=max_recent)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        if log_path:
+            handler = logging.FileHandler(log_path)
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            logger.addHandler(handler)
+
+    def current(self):
+        """Stats for the current Flask request (an empty QueryStats outside one)."""
+        if has_app_context():
+            stats = g.get('_query_stats')
+            if stats is None:
+                stats = g._query_stats = QueryStats()
+            return stats
+        return QueryStats()
+
+    @contextmanager
+    def track(self):
+        """Collect stats for every statement run on this thread inside the block."""
+        stats = QueryStats()
+        tracked = self._local.__dict__.setdefault('tracked', [])
+        tracked.append(stats)
+        try:
+            yield stats
+        finally:
+            tracked.remove(stats)
+
+    @contextmanager
+    def budget(self, max_queries, label='block'):
+        """
+        Fail when the block runs more than max_queries statements.
+
+        Meant for checks against N+1 regressions, e.g. around a test client
+        request for a route.
+
+        Raises:
+            QueryBudgetExceeded: If the block ran more statements than allowed
+        """
+        with self.track() as stats:
+            yield stats
+        if stats.queries > max_queries:
+            raise QueryBudgetExceeded(
+                f'{label} ran {stats.queries} queries (budget {max_queries})'
+            )
+
+    def statement_executed(self, conn, sql, parameters, seconds, rows):
+        """
+        Record one statement's execute() (called by QueryCursor).
+
+        Returns:
+            True if execute() alone reached the slow-query threshold (and was logged)
+        """
+        slow = 0 < self.slow_query_ms <= seconds * 1000
+        if slow:
+            self._log_slow(conn, sql, parameters, seconds, rows)
+
+        with self._lock:
+            self.totals.add(rows, seconds, slow)
+        for stats in self._local_stats():
+            stats.add(rows, seconds, slow)
+        return slow
+
+    def rows_read(self, rows, seconds):
+        """Record rows fetched by a QueryCursor and the time spent fetching them."""
+        with self._lock:
+            self.totals.add_rows(rows, seconds)
+        for stats in self._local_stats():
+            stats.add_rows(rows, seconds)
+
+    def statement_read(self, conn, sql, parameters, seconds, rows):
+        """
+        Check a statement once its rows are read (called by QueryCursor).
+
+        seconds covers execute() plus fetching; the statement is logged and
+        counted as slow if that reaches the threshold.
+        """
+        if 0 < self.slow_query_ms <= seconds * 1000:
+            self._log_slow(conn, sql, parameters, seconds, rows)
+            with self._lock:
+                self.totals.slow += 1
+            for stats in self._local_stats():
+                stats.slow += 1
+
+    def _local_stats(self):
+        """Stats of the current request and of the track() blocks open on this thread."""
+        tracked = self._local.__dict__.get('tracked') or ()
+        if has_app_context():
+            return (self.current(), *tracked)
+        return tracked
+
+    def recent_slow_queries(self):
+        with self._lock:
+            return list(self._recent)
+
+    def stats(self):
+        """Process-wide totals, the threshold and the most recent slow statements."""
+        with self._lock:
+            stats = self.totals.as_dict()
+        stats['slow_query_ms'] = self.slow_query_ms
+        stats['recent_slow'] = self.recent_slow_queries()
+        return stats
+
+    def _log_slow(self, conn, sql, parameters, seconds, rows):
+        # Parameters are left out of the log; they hold borrower names and amounts
+        sql = ' '.join(sql.split())
+        plan = self._explain(conn, sql, parameters)
+        entry = {
+            'sql': sql,
+            'time_ms': round(seconds * 1000, 3),
+            'rows': rows,
+            'plan': plan,
+            'at': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        with self._lock:
+            self._recent.append(entry)
+        logger.warning('Slow query (%.1f ms, %d rows): %s\n%s', entry['time_ms'], rows, sql,
+                       '\n'.join(f'    {line}' for line in plan))
+
+    @staticmethod
+    def _explain(conn, sql, parameters):
+        if parameters is None:
+            return ['(no plan for executemany/executescript)']
+        if not sql.lstrip().upper().startswith(('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')):
+            return []
+        try:
+            # A plain cursor, so the EXPLAIN itself is not counted
+            cursor = conn.cursor(sqlite3.Cursor)
+            return [row[3] for row in cursor.execute(f'EXPLAIN QUERY PLAN {sql}', parameters)]
+        except sqlite3.Error as e:
+            return [f'(plan unavailable: {e})']
+
+
+class QueryCursor(sqlite3.Cursor):
+    """
+    Cursor that counts each statement and times it from execute() until its rows are read.
+
+    execute() and every fetch call are timed, so a statement's time includes
+    reading its results. Iteration reads FETCH_CHUNK rows per fetchmany()
+    and yields them from the chunk, so rows cost no timer calls of their own
+    (rows left in a chunk when a loop breaks early are dropped with it). The
+    slow-query check runs once per statement: at execute() when that alone
+    reaches the threshold, otherwise when the rows run out or the cursor is
+    re-executed or closed.
+    """
+
+    FETCH_CHUNK = 256
+
+    _statement = None  # [sql, parameters, seconds, rows] while rows may still be read
+
+    def _run(self, call, sql, parameters, *args):
+        if self._statement is not None:
+            self._finish()
+        query_log = self.connection.query_log
+        started = perf_counter()
+        try:
+            call(sql, *args)
+        finally:
+            seconds = perf_counter() - started
+            rows = max(self.rowcount, 0)
+            slow = query_log.statement_executed(self.connection, sql, parameters, seconds, rows)
+        if not slow and parameters is not None and self.description is not None:
+            self._statement = [sql, parameters, seconds, rows]
+        return self
+
+    def _fetched(self, rows, seconds, exhausted):
+        self.connection.query_log.rows_read(rows, seconds)
+        statement = self._statement
+        if statement is not None:
+            statement[2] += seconds
+            statement[3] += rows
+            if exhausted:
+                self._finish()
+
+    def _finish(self):
+        sql, parameters, seconds, rows = self._statement
+        self._statement = None
+        self.connection.query_log.statement_read(self.connection, sql, parameters, seconds, rows)
+
+    def execute(self, sql, parameters=()):
+        return self._run(super().execute, sql, parameters, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._run(super().executemany, sql, None, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self._run(super().executescript, sql_script, None)
+
+    def fetchone(self):
+        started = perf_counter()
+        row = super().fetchone()
+        self._fetched(0 if row is None else 1, perf_counter() - started, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        started = perf_counter()
+        rows = super().fetchmany(size)
+        self._fetched(len(rows), perf_counter() - started, len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        started = perf_counter()
+        rows = super().fetchall()
+        self._fetched(len(rows), perf_counter() - started, True)
+        return rows
+
+    def __iter__(self):
+        while True:
+            rows = self.fetchmany(self.FETCH_CHUNK)
+            yield from rows
+            if len(rows) < self.FETCH_CHUNK:
+                return
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def close(self):
+        if self._statement is not None:
+            self._finish()
+        super().close()
@@ -3,6 +3,7 @@ CREATE TABLE IF NOT EXISTS borrowers (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     name TEXT NOT NULL,
     phone TEXT,
+    name_key TEXT,  -- Case-folded, whitespace-collapsed name (unique index created by init_db)
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -44,6 +45,73 @@ CREATE TABLE IF NOT EXISTS payments (
     CHECK (total_received = interest_paid + principal_paid)
 );
 
+-- Loan Month Ledger (materialized per-month interest figures, see loan_logic.py)
+CREATE TABLE IF NOT EXISTS loan_month_ledger (
+    loan_id INTEGER NOT NULL,
+    interest_month TEXT NOT NULL,  -- YYYY-MM
+    opening_principal REAL NOT NULL,
+    interest_due REAL NOT NULL,
+    interest_paid REAL NOT NULL DEFAULT 0,
+    principal_paid REAL NOT NULL DEFAULT 0,
+    total_received REAL NOT NULL DEFAULT 0,
+    pending_interest REAL NOT NULL,  -- Running: interest due - interest paid from given month (stops at closed month)
+    PRIMARY KEY (loan_id, interest_month),
+    FOREIGN KEY (loan_id) REFERENCES loans(id)
+) WITHOUT ROWID;
+
+-- Loans whose ledger rows need recomputing from from_month (filled by triggers below)
+CREATE TABLE IF NOT EXISTS loan_ledger_stale (
+    loan_id INTEGER PRIMARY KEY,
+    from_month TEXT NOT NULL  -- YYYY-MM, '0000-00' = full rebuild
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_payments_ledger_insert AFTER INSERT ON payments
+BEGIN
+    INSERT INTO loan_ledger_stale (loan_id, from_month) VALUES (NEW.loan_id, NEW.interest_month)
+    ON CONFLICT(loan_id) DO UPDATE SET from_month = MIN(from_month, excluded.from_month);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_payments_ledger_update AFTER UPDATE ON payments
+BEGIN
+    INSERT INTO loan_ledger_stale (loan_id, from_month) VALUES (OLD.loan_id, OLD.interest_month)
+    ON CONFLICT(loan_id) DO UPDATE SET from_month = MIN(from_month, excluded.from_month);
+    INSERT INTO loan_ledger_stale (loan_id, from_month) VALUES (NEW.loan_id, NEW.interest_month)
+    ON CONFLICT(loan_id) DO UPDATE SET from_month = MIN(from_month, excluded.from_month);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_payments_ledger_delete AFTER DELETE ON payments
+BEGIN
+    INSERT INTO loan_ledger_stale (loan_id, from_month) VALUES (OLD.loan_id, OLD.interest_month)
+    ON CONFLICT(loan_id) DO UPDATE SET from_month = MIN(from_month, excluded.from_month);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_loans_ledger_insert AFTER INSERT ON loans
+BEGIN
+    INSERT INTO loan_ledger_stale (loan_id, from_month) VALUES (NEW.id, '0000-00')
+    ON CONFLICT(loan_id) DO UPDATE SET from_month = '0000-00';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_loans_ledger_terms AFTER UPDATE OF principal_given, monthly_rate, given_date ON loans
+BEGIN
+    INSERT INTO loan_ledger_stale (loan_id, from_month) VALUES (NEW.id, '0000-00')
+    ON CONFLICT(loan_id) DO UPDATE SET from_month = '0000-00';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_loans_ledger_closed AFTER UPDATE OF closed_date ON loans
+WHEN COALESCE(OLD.closed_date, '') != COALESCE(NEW.closed_date, '')
+BEGIN
+    INSERT INTO loan_ledger_stale (loan_id, from_month)
+    VALUES (NEW.id, substr(MIN(COALESCE(NULLIF(OLD.closed_date, ''), '9999-12'),
+                               COALESCE(NULLIF(NEW.closed_date, ''), '9999-12')), 1, 7))
+    ON CONFLICT(loan_id) DO UPDATE SET from_month = MIN(from_month, excluded.from_month);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_loans_ledger_delete AFTER DELETE ON loans
+BEGIN
+    INSERT INTO loan_ledger_stale (loan_id, from_month) VALUES (OLD.id, '0000-00')
+    ON CONFLICT(loan_id) DO UPDATE SET from_month = '0000-00';
+END;
+
 -- User table for PIN authentication
 CREATE TABLE IF NOT EXISTS users (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -91,14 +159,14 @@ CREATE TABLE IF NOT EXISTS chit_monthly_schedule (
 -- Chit Adjustments table (tracks adjustments against loan interest)
 CREATE TABLE IF NOT EXISTS chit_adjustments (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
-    schedule_id INTEGER NOT NULL,
+    chit_schedule_id INTEGER NOT NULL,
     loan_id INTEGER NOT NULL,
     interest_month TEXT NOT NULL,
     adjusted_amount REAL NOT NULL,
     adjustment_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     notes TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (schedule_id) REFERENCES chit_monthly_schedule(id),
+    FOREIGN KEY (chit_schedule_id) REFERENCES chit_monthly_schedule(id),
     FOREIGN KEY (loan_id) REFERENCES loans(id)
 );
 
@@ -167,12 +235,24 @@ CREATE TABLE IF NOT EXISTS direct_chit_payments (
 -- Indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_loans_borrower ON loans(borrower_id);
 CREATE INDEX IF NOT EXISTS idx_loans_status ON loans(status);
+-- Keyset paging / sorting for /api/loans (id is appended implicitly as the rowid)
+CREATE INDEX IF NOT EXISTS idx_loans_created ON loans(created_at);
+CREATE INDEX IF NOT EXISTS idx_loans_status_created ON loans(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_loans_status_outstanding ON loans(status, outstanding_principal);
+CREATE INDEX IF NOT EXISTS idx_loans_status_given_date ON loans(status, given_date);
+CREATE INDEX IF NOT EXISTS idx_loans_status_rate ON loans(status, monthly_rate);
+CREATE INDEX IF NOT EXISTS idx_loans_outstanding ON loans(outstanding_principal);
+CREATE INDEX IF NOT EXISTS idx_loans_given_date ON loans(given_date);
+CREATE INDEX IF NOT EXISTS idx_loans_rate ON loans(monthly_rate);
 CREATE INDEX IF NOT EXISTS idx_payments_loan ON payments(loan_id);
 CREATE INDEX IF NOT EXISTS idx_payments_interest_month ON payments(interest_month);
+CREATE INDEX IF NOT EXISTS idx_loan_month_ledger_month ON loan_month_ledger(interest_month);
 CREATE INDEX IF NOT EXISTS idx_chits_borrower ON chits(borrower_id);
 CREATE INDEX IF NOT EXISTS idx_chits_status ON chits(status);
 CREATE INDEX IF NOT EXISTS idx_chit_schedule_chit ON chit_monthly_schedule(chit_id);
-CREATE INDEX IF NOT EXISTS idx_chit_adjustments_schedule ON chit_adjustments(schedule_id);
+CREATE INDEX IF NOT EXISTS idx_chit_schedule_paid ON chit_monthly_schedule(payment_status, paid_date) WHERE paid_amount > 0;
+CREATE INDEX IF NOT EXISTS idx_chit_schedule_open ON chit_monthly_schedule(due_date) WHERE payment_status IN ('Pending', 'Partial') AND due_amount - paid_amount > 0;
+CREATE INDEX IF NOT EXISTS idx_chit_adjustments_schedule ON chit_adjustments(chit_schedule_id);
 CREATE INDEX IF NOT EXISTS idx_chit_adjustments_loan ON chit_adjustments(loan_id);
 CREATE INDEX IF NOT EXISTS idx_chit_groups_status ON chit_groups(status);
 CREATE INDEX IF NOT EXISTS idx_chit_groups_start_month ON chit_groups(start_month);
@@ -183,6 +263,8 @@ CREATE INDEX IF NOT EXISTS idx_adjustments_interest_month ON adjustments(interes
 CREATE INDEX IF NOT EXISTS idx_adjustments_chit ON adjustments(chit_id);
 CREATE INDEX IF NOT EXISTS idx_adjustments_chit_month ON adjustments(chit_month);
 CREATE INDEX IF NOT EXISTS idx_adjustments_status ON adjustments(status);
+CREATE INDEX IF NOT EXISTS idx_adjustments_borrower_chit ON adjustments(borrower_id, chit_id, chit_month);
 CREATE INDEX IF NOT EXISTS idx_direct_chit_payments_borrower ON direct_chit_payments(borrower_id);
 CREATE INDEX IF NOT EXISTS idx_direct_chit_payments_chit ON direct_chit_payments(chit_id);
 CREATE INDEX IF NOT EXISTS idx_direct_chit_payments_month ON direct_chit_payments(chit_month);
+CREATE INDEX IF NOT EXISTS idx_direct_chit_payments_borrower_chit ON direct_chit_payments(borrower_id, chit_id, chit_month);
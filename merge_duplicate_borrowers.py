@@ -0,0 +1,41 @@
+"""
+Merge duplicate borrowers.
+
+Borrowers whose names differ only in case or spacing ("Ravi Kumar",
+"ravi  kumar") are folded into the oldest record: their loans, chits, links,
+adjustments and payments move to it and the duplicates are deleted. Once no
+duplicates remain, borrower names get a unique index so they cannot fork
+again.
+
+Back up database/lending.db before running.
+"""
+
+import sys
+
+from database import db_manager
+
+print("=" * 70)
+print("MERGE DUPLICATE BORROWERS")
+print("=" * 70)
+
+db_manager.init_db()
+merges = db_manager.merge_duplicate_borrowers(dry_run=True)
+
+if not merges:
+    print("✓ No duplicate borrowers found")
+    sys.exit(0)
+
+for merge in merges:
+    print(f"\nKeep #{merge['kept_id']} {merge['kept_name']!r}")
+    for borrower_id, name in zip(merge['merged_ids'], merge['merged_names']):
+        print(f"  merge #{borrower_id} {name!r}")
+
+print()
+if '--yes' not in sys.argv:
+    response = input("Merge these borrowers? (type 'yes' to continue): ")
+    if response.lower() != 'yes':
+        print("Merge cancelled.")
+        sys.exit(0)
+
+merges = db_manager.merge_duplicate_borrowers()
+print(f"✓ Merged {sum(len(m['merged_ids']) for m in merges)} duplicate borrowers into {len(merges)}")
@@ -0,0 +1,241 @@
+"""
+METRICS
+Prometheus text-format metrics for the Flask app
+
+Per endpoint: request count by method and status, latency histogram,
+response size histogram, errors (status >= 400 or an unhandled exception)
+and SQL statements run. Database connection counters, SQL totals and result
+cache counters are read from db_manager when /metrics is scraped, so they
+cost nothing per request. Recording a request is a few dict updates under
+one lock, cheap enough to leave on in production.
+
+/metrics needs a logged-in session like the rest of the app; set
+LENDING_METRICS_TOKEN to let a scraper read it with
+"Authorization: Bearer <token>".
+"""
+
+import hmac
+import os
+import threading
+import time
+
+from flask import Response, g, request, session
+
+# Latency buckets in seconds (Prometheus client defaults)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Response size buckets in bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _number(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [count per bucket..., sum, count]
+
+    def observe(self, labels, value):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+                break
+        series[-2] += value
+        series[-1] += 1
+
+    def samples(self, name, label_names):
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield (f'{name}_bucket', label_names + ('le',), labels + (_number(bound),), cumulative)
+            yield (f'{name}_bucket', label_names + ('le',), labels + ('+Inf',), series[-1])
+            yield (f'{name}_sum', label_names, labels, series[-2])
+            yield (f'{name}_count', label_names, labels, series[-1])
+
+
+class Metrics:
+    """Request metrics for one Flask app plus database counters read at scrape time."""
+
+    def __init__(self, app=None, db=None, prefix='lending'):
+        """
+        Args:
+            app: Flask app to instrument (or call init_app() later)
+            db: The db_manager module, for connection, query and cache counters
+            prefix: Prefix for every metric name
+        """
+        self.prefix = prefix
+        self.db = db
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._requests = {}       # (endpoint, method, status) -> count
+        self._errors = {}         # (endpoint,) -> count
+        self._db_queries = {}     # (endpoint,) -> count
+        self._latency = Histogram(LATENCY_BUCKETS)
+        self._size = Histogram(SIZE_BUCKETS)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Register the request hooks and the /metrics endpoint."""
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def _before_request(self):
+        g._metrics_started = time.perf_counter()
+
+    def _after_request(self, response):
+        started = g.pop('_metrics_started', None)
+        if started is not None:
+            # Streamed responses (CSV exports) have no length yet and are timed until streaming starts
+            self.record(request.endpoint, request.method, response.status_code,
+                        time.perf_counter() - started, response.content_length)
+        return response
+
+    def _teardown_request(self, exception=None):
+        # Only reached with the start time still set when after_request did not run
+        started = g.pop('_metrics_started', None)
+        if started is not None:
+            self.record(request.endpoint, request.method, 500, time.perf_counter() - started, None)
+
+    def record(self, endpoint, method, status, seconds, size):
+        """Record one finished request."""
+        endpoint = endpoint or 'unmatched'
+        queries = self.db.query_log.current().queries if self.db is not None else 0
+        key = (endpoint,)
+
+        with self._lock:
+            request_key = (endpoint, method, str(status))
+            self._requests[request_key] = self._requests.get(request_key, 0) + 1
+            if status >= 400:
+                self._errors[key] = self._errors.get(key, 0) + 1
+            if queries:
+                self._db_queries[key] = self._db_queries.get(key, 0) + queries
+            self._latency.observe(key, seconds)
+            if size is not None:
+                self._size.observe(key, size)
+
+    # ------------------------------------------------------------------
+    # Exposition
+    # ------------------------------------------------------------------
+
+    def _families(self):
+        """(name, type, help, label names, {labels: value} or samples) for every metric."""
+        p = self.prefix
+        with self._lock:
+            families = [
+                (f'{p}_http_requests_total', 'counter',
+                 'Requests handled, by endpoint, method and status code.',
+                 ('endpoint', 'method', 'status'), dict(self._requests)),
+                (f'{p}_http_request_errors_total', 'counter',
+                 'Requests that ended with status >= 400 or an unhandled exception.',
+                 ('endpoint',), dict(self._errors)),
+                (f'{p}_http_request_duration_seconds', 'histogram',
+                 'Time to build the response (until streaming starts for streamed responses).',
+                 ('endpoint',), list(self._latency.samples(f'{p}_http_request_duration_seconds', ('endpoint',)))),
+                (f'{p}_http_response_size_bytes', 'histogram',
+                 'Response body size (responses with a known length).',
+                 ('endpoint',), list(self._size.samples(f'{p}_http_response_size_bytes', ('endpoint',)))),
+                (f'{p}_http_db_queries_total', 'counter',
+                 'SQL statements run while building responses (streamed bodies excluded), by endpoint.',
+                 ('endpoint',), dict(self._db_queries)),
+            ]
+
+        families.append((f'{p}_process_start_time_seconds', 'gauge',
+                         'Start time of the process since the Unix epoch.', (), {(): self.started}))
+
+        if self.db is not None:
+            families.extend(self._db_families())
+        return families
+
+    def _db_families(self):
+        p = self.prefix
+        connections = self.db.get_connection_stats()
+        queries = self.db.query_log.stats()
+        cache = self.db.result_cache.stats()
+
+        families = [
+            (f'{p}_db_connections_{stat}_total', 'counter', help_text, (), {(): connections[stat]})
+            for stat, help_text in (
+                ('opened', 'Database connections opened.'),
+                ('closed', 'Database connections closed.'),
+                ('reused', 'Nested or same-request uses of an open connection.'),
+                ('pooled', 'Connections taken from the idle pool.'),
+                ('write_retries', 'Writes retried after "database is locked".'),
+            )
+        ]
+        families += [
+            (f'{p}_db_connections_idle', 'gauge', 'Idle connections in the pool.', (), {(): connections['idle']}),
+            (f'{p}_db_queries_total', 'counter', 'SQL statements run.', (), {(): queries['queries']}),
+            (f'{p}_db_query_seconds_total', 'counter', 'Time spent in SQLite executing and fetching.',
+             (), {(): queries['time_ms'] / 1000}),
+            (f'{p}_db_slow_queries_total', 'counter', 'Statements over the slow-query threshold.',
+             (), {(): queries['slow']}),
+        ]
+        families += [
+            (f'{p}_result_cache_{stat}_total', 'counter', help_text, (), {(): cache[stat]})
+            for stat, help_text in (
+                ('hits', 'Result cache hits.'),
+                ('misses', 'Result cache misses.'),
+                ('evictions', 'Result cache entries evicted by the size limit.'),
+                ('expired', 'Result cache entries dropped by the TTL.'),
+                ('invalidated', 'Result cache entries dropped by writes.'),
+            )
+        ]
+        families += [
+            (f'{p}_result_cache_entries', 'gauge', 'Results currently cached.', (), {(): cache['size']}),
+            (f'{p}_result_cache_hit_ratio', 'gauge', 'Hits / lookups since start.', (), {(): cache['hit_rate']}),
+        ]
+        return families
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, kind, help_text, label_names, values in self._families():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'histogram':
+                for sample, names, labels, value in values:
+                    lines.append(f'{sample}{_labels(names, labels)} {_number(value)}')
+            else:
+                for labels, value in sorted(values.items()):
+                    lines.append(f'{name}{_labels(label_names, labels)} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def metrics_view(self):
+        """GET /metrics (logged-in session, or the bearer token from LENDING_METRICS_TOKEN)."""
+        token = os.environ.get('LENDING_METRICS_TOKEN')
+        authorization = request.headers.get('Authorization', '')
+        allowed = 'logged_in' in session or bool(
+            token and hmac.compare_digest(authorization.encode(), f'Bearer {token}'.encode())
+        )
+        if not allowed:
+            return Response('Unauthorized\n', status=401, content_type='text/plain')
+        return Response(self.render(), content_type=CONTENT_TYPE)
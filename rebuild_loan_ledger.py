@@ -0,0 +1,18 @@
+"""
+Rebuild the loan month ledger.
+
+Recreates every loan_month_ledger row from the loans and payments tables.
+Run this after bulk edits to payments made outside the app if reports look
+out of date, or after restoring an old database by hand.
+"""
+
+from database import db_manager
+
+print("=" * 70)
+print("LOAN LEDGER REBUILD")
+print("=" * 70)
+
+db_manager.init_db()
+rows = db_manager.rebuild_loan_ledger()
+
+print(f"✓ Rebuilt {rows} ledger rows")
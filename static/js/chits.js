@@ -77,7 +77,7 @@ async function loadChits() {
 async function loadPendingDues() {
     try {
         const response = await fetch('/api/pending-chit-dues');
-        const dues = await response.json();
+        const { dues } = await response.json();
 
         const tbody = document.getElementById('pendingDuesTableBody');
         tbody.innerHTML = '';
@@ -139,38 +139,13 @@ async function loadBorrowers() {
 // Load chits summary
 async function loadChitsSummary() {
     try {
-        const [chitsResponse, duesResponse] = await Promise.all([
-            fetch('/api/chits'),
-            fetch('/api/pending-chit-dues')
-        ]);
+        const response = await fetch('/api/chits/dashboard');
+        const summary = await response.json();
 
-        const allChits = await chitsResponse.json();
-        const pendingDues = await duesResponse.json();
-
-        const activeChits = allChits.filter(c => c.status === 'Active').length;
-
-        // Calculate current month dues
-        const today = new Date();
-        const currentMonth = today.toISOString().substring(0, 7);
-        const currentMonthDues = pendingDues.filter(d => d.due_date.substring(0, 7) === currentMonth);
-        const currentMonthTotal = currentMonthDues.reduce((sum, d) => sum + d.due_amount, 0);
-
-        // Calculate total pending dues
-        const totalPending = pendingDues.reduce((sum, d) => sum + d.due_amount, 0);
-
-        // Calculate total paid (sum all paid_amount from all chits' schedules)
-        let totalPaid = 0;
-        for (const chit of allChits) {
-            const chitDetails = await fetch(`/api/chits/${chit.id}`).then(r => r.json());
-            if (chitDetails.schedule) {
-                totalPaid += chitDetails.schedule.reduce((sum, s) => sum + (s.paid_amount || 0), 0);
-            }
-        }
-
-        document.getElementById('summaryActiveChits').textContent = activeChits;
-        document.getElementById('summaryCurrentMonthDues').textContent = formatCurrency(currentMonthTotal);
-        document.getElementById('summaryTotalPendingDues').textContent = formatCurrency(totalPending);
-        document.getElementById('summaryTotalPaid').textContent = formatCurrency(totalPaid);
+        document.getElementById('summaryActiveChits').textContent = summary.active_chits;
+        document.getElementById('summaryCurrentMonthDues').textContent = formatCurrency(summary.current_month_dues);
+        document.getElementById('summaryTotalPendingDues').textContent = formatCurrency(summary.total_pending_dues);
+        document.getElementById('summaryTotalPaid').textContent = formatCurrency(summary.total_paid);
     } catch (error) {
         console.error('Error loading chits summary:', error);
     }
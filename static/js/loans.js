@@ -1,6 +1,12 @@
 let selectedLoanId = null;
 let selectedInterestMonth = null;
 
+// Loans are fetched a page at a time; nextLoansCursor is null on the last page
+const LOANS_PAGE_SIZE = 50;
+const LOAN_LIST_FIELDS = 'id,borrower_name,borrower_phone,principal_given,outstanding_principal,monthly_rate,status';
+let nextLoansCursor = null;
+let loansRequestId = 0;
+
 // Load loans on page load
 document.addEventListener('DOMContentLoaded', function() {
     loadLoans();
@@ -16,6 +22,9 @@ document.addEventListener('DOMContentLoaded', function() {
         document.getElementById('editDocumentFields').style.display = this.checked ? 'block' : 'none';
     });
 
+    // Suggest existing borrowers while typing a name
+    document.getElementById('borrower_name').addEventListener('input', suggestBorrowers);
+
     // Set today as default date
     const today = new Date().toISOString().split('T')[0];
     document.getElementById('given_date').value = today;
@@ -41,18 +50,29 @@ function loadLoansSummary() {
         });
 }
 
-function loadLoans() {
+function loansUrl(cursor) {
     const status = document.getElementById('statusFilter').value;
     const search = document.getElementById('searchFilter').value;
+    const [sort, order] = document.getElementById('sortFilter').value.split(':');
+
+    const params = new URLSearchParams({ limit: LOANS_PAGE_SIZE, sort, order, fields: LOAN_LIST_FIELDS });
+    if (status) params.set('status', status);
+    if (search) params.set('search', search);
+    if (cursor) params.set('cursor', cursor);
+    return `/api/loans?${params}`;
+}
 
-    let url = '/api/loans?';
-    if (status) url += `status=${status}&`;
-    if (search) url += `search=${search}&`;
+function fetchLoansPage(cursor, append) {
+    // Ignore responses for filters that have since changed (e.g. typing in search)
+    const requestId = ++loansRequestId;
 
-    fetch(url)
+    fetch(loansUrl(cursor))
         .then(response => response.json())
-        .then(loans => {
-            displayLoans(loans);
+        .then(page => {
+            if (requestId !== loansRequestId) return;
+            nextLoansCursor = page.next_cursor;
+            document.getElementById('loansLoadMore').style.display = nextLoansCursor ? 'block' : 'none';
+            displayLoans(page.loans, append);
         })
         .catch(error => {
             console.error('Error loading loans:', error);
@@ -60,10 +80,20 @@ function loadLoans() {
         });
 }
 
-function displayLoans(loans) {
+function loadLoans() {
+    fetchLoansPage(null, false);
+}
+
+function loadMoreLoans() {
+    if (nextLoansCursor) {
+        fetchLoansPage(nextLoansCursor, true);
+    }
+}
+
+function displayLoans(loans, append = false) {
     const tbody = document.getElementById('loansTableBody');
 
-    if (loans.length === 0) {
+    if (loans.length === 0 && !append) {
         tbody.innerHTML = '<tr><td colspan="8" class="loading">No loans found</td></tr>';
         return;
     }
@@ -72,7 +102,7 @@ function displayLoans(loans) {
     const currentMonth = new Date().toISOString().slice(0, 7);
     selectedInterestMonth = currentMonth;
 
-    tbody.innerHTML = loans.map(loan => `
+    const rows = loans.map(loan => `
         <tr>
             <td>${loan.borrower_name}</td>
             <td>${loan.borrower_phone || '-'}</td>
@@ -90,6 +120,12 @@ function displayLoans(loans) {
         </tr>
     `).join('');
 
+    if (append) {
+        tbody.insertAdjacentHTML('beforeend', rows);
+    } else {
+        tbody.innerHTML = rows;
+    }
+
     // Calculate interest due for each loan
     loans.forEach(loan => {
         if (loan.status === 'Active') {
@@ -109,6 +145,36 @@ function calculateInterestDue(loanId, month) {
         });
 }
 
+let borrowerSuggestions = [];
+let borrowerSuggestTimer = null;
+
+function suggestBorrowers() {
+    const input = document.getElementById('borrower_name');
+    const query = input.value.trim();
+
+    // Picking a suggestion fills in the borrower's phone
+    const match = borrowerSuggestions.find(b => b.name === input.value);
+    const phoneInput = document.getElementById('phone');
+    if (match && match.phone && !phoneInput.value) {
+        phoneInput.value = match.phone;
+    }
+
+    clearTimeout(borrowerSuggestTimer);
+    if (!query) return;
+
+    borrowerSuggestTimer = setTimeout(() => {
+        fetch(`/api/borrowers/search?q=${encodeURIComponent(query)}&limit=10`)
+            .then(response => response.json())
+            .then(borrowers => {
+                borrowerSuggestions = borrowers;
+                document.getElementById('borrowerSuggestions').innerHTML = borrowers
+                    .map(b => `<option value="${b.name.replace(/"/g, '&quot;')}">${b.phone || ''}</option>`)
+                    .join('');
+            })
+            .catch(error => console.error('Error searching borrowers:', error));
+    }, 150);
+}
+
 function showAddLoanModal() {
     document.getElementById('addLoanModal').style.display = 'block';
 }
@@ -10,16 +10,55 @@ function formatMonthYear(dateString) {
     return `${months[date.getMonth()]} ${date.getFullYear()}`;
 }
 
-// Load all out-of-pocket payments
+// Out-of-pocket payments are fetched a page at a time (newest first)
+const OUT_OF_POCKET_PAGE_SIZE = 100;
+let nextOutOfPocketCursor = null;
+let outOfPocketRequestId = 0;
+
+function outOfPocketUrl(cursor) {
+    const params = new URLSearchParams({ limit: OUT_OF_POCKET_PAGE_SIZE });
+    const fromDate = document.getElementById('fromDateFilter').value;
+    const toDate = document.getElementById('toDateFilter').value;
+    if (fromDate) params.set('from', fromDate);
+    if (toDate) params.set('to', toDate);
+    if (cursor) params.set('cursor', cursor);
+    return `/api/out-of-pocket-payments?${params}`;
+}
+
+// Load out-of-pocket payments (first page for the current date range)
 async function loadOutOfPocketPayments() {
+    await fetchOutOfPocketPage(null, false);
+}
+
+function loadMoreOutOfPocketPayments() {
+    if (nextOutOfPocketCursor) {
+        fetchOutOfPocketPage(nextOutOfPocketCursor, true);
+    }
+}
+
+async function fetchOutOfPocketPage(cursor, append) {
+    // Ignore responses for date ranges that have since changed
+    const requestId = ++outOfPocketRequestId;
+
     try {
-        const response = await fetch('/api/out-of-pocket-payments');
-        const payments = await response.json();
+        const response = await fetch(outOfPocketUrl(cursor));
+        const page = await response.json();
+        if (requestId !== outOfPocketRequestId) return;
+
+        if (!response.ok) {
+            throw new Error(page.error || 'Request failed');
+        }
+
+        const payments = page.payments;
+        nextOutOfPocketCursor = page.next_cursor;
+        document.getElementById('outOfPocketLoadMore').style.display = nextOutOfPocketCursor ? 'block' : 'none';
 
         const tbody = document.getElementById('outOfPocketTableBody');
-        tbody.innerHTML = '';
+        if (!append) {
+            tbody.innerHTML = '';
+        }
 
-        if (payments.length === 0) {
+        if (payments.length === 0 && !append) {
             tbody.innerHTML = '<tr><td colspan="10" style="text-align: center;">No out-of-pocket payments found</td></tr>';
             return;
         }
@@ -145,7 +145,7 @@ function displayPersonHistory(borrowerName, history) {
         <h2>${borrowerName} - Complete History</h2>
     `;
 
-    history.forEach(({ loan, payments }) => {
+    history.forEach(({ loan, payments, totals }) => {
         html += `
         <div class="history-section">
             <h3>Loan #${loan.id} - ${formatDate(loan.given_date)} (${loan.status})</h3>
@@ -154,6 +154,10 @@ function displayPersonHistory(borrowerName, history) {
                     <div class="detail-label">Principal Given</div>
                     <div class="detail-value">${formatCurrency(loan.principal_given)}</div>
                 </div>
+                <div class="detail-item">
+                    <div class="detail-label">Pending Interest</div>
+                    <div class="detail-value">${formatCurrency(totals.pending_interest)}</div>
+                </div>
             </div>
         `;
 
@@ -193,17 +197,12 @@ function displayPersonHistory(borrowerName, history) {
             </table>
             `;
 
-            // Calculate totals
-            const totalReceived = payments.reduce((sum, p) => sum + p.total_received, 0);
-            const totalInterest = payments.reduce((sum, p) => sum + p.interest_paid, 0);
-            const totalPrincipal = payments.reduce((sum, p) => sum + p.principal_paid, 0);
-
             html += `
             <div style="margin-top: 1rem; padding: 1rem; background: #f8f9fa; border-radius: 4px;">
                 <strong>Totals:</strong>
-                Total Received: ${formatCurrency(totalReceived)} |
-                Interest: ${formatCurrency(totalInterest)} |
-                Principal: ${formatCurrency(totalPrincipal)}
+                Total Received: ${formatCurrency(totals.total_received)} |
+                Interest: ${formatCurrency(totals.interest_paid)} |
+                Principal: ${formatCurrency(totals.principal_paid)}
             </div>
             `;
         } else {
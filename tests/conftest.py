@@ -0,0 +1,11 @@
+import pytest
+
+from database import db_manager
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """db_manager pointed at a fresh database."""
+    monkeypatch.setattr(db_manager, 'DB_PATH', str(tmp_path / 'lending.db'))
+    db_manager.init_db()
+    return db_manager
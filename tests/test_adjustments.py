@@ -0,0 +1,31 @@
+"""
+Regression checks for creating interest -> chit adjustments.
+
+Run from the repository root with: python -m pytest tests
+"""
+
+import sqlite3
+
+import pytest
+
+
+def test_create_rechecks_after_outside_write(db):
+    loan_id = db.create_loan('Ravi', '', 100000, '2024-01-05', 1.0, 5, 0, '', '', None, '')
+    db.add_payment(loan_id, '2024-03-05', '2024-03', 1000, 1000, 0, 'Cash', '', '')
+    borrower_id = db.get_or_create_borrower('Ravi')
+    chit_id = db.create_chit_group('Group A', 5000, '2024-03')
+    db.link_borrower_to_chit(borrower_id, chit_id)
+
+    assert db.validate_adjustment(borrower_id, '2024-03', chit_id, '2024-03', 800)['valid']
+
+    # Another process uses part of the interest after validation
+    other = sqlite3.connect(db.DB_PATH)
+    other.execute('''
+        INSERT INTO adjustments (borrower_id, interest_month, chit_id, chit_month, amount, status)
+        VALUES (?, '2024-03', ?, '2024-03', 500, 'ACTIVE')
+    ''', (borrower_id, chit_id))
+    other.commit()
+    other.close()
+
+    with pytest.raises(ValueError, match='Insufficient interest'):
+        db.create_adjustment(borrower_id, '2024-03', chit_id, '2024-03', 800)
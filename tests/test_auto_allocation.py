@@ -0,0 +1,34 @@
+"""
+Regression checks for interest -> chit auto allocation.
+
+Run from the repository root with: python -m pytest tests
+"""
+
+
+def test_float_leftover_due_is_not_allocated(db):
+    # 100.1 + 200.2 + 0.7 leaves ~5.7e-14 of a 301 installment "unpaid"
+    loan_id = db.create_loan('Ravi', '', 100000, '2024-01-05', 1.0, 5, 0, '', '', None, '')
+    db.add_payment(loan_id, '2024-03-05', '2024-03', 1000, 1000, 0, 'Cash', '', '')
+    borrower_id = db.get_or_create_borrower('Ravi')
+    chit_id = db.create_chit_group('Group A', 301, '2024-03')
+    db.link_borrower_to_chit(borrower_id, chit_id)
+    for amount in (100.1, 200.2, 0.7):
+        db.add_direct_chit_payment(borrower_id, chit_id, '2024-03', amount, '2024-03-10')
+
+    plan = db.auto_allocate_interest('2024-03', '2024-03', dry_run=True)
+    assert plan['allocations'] == []
+
+    result = db.auto_allocate_interest('2024-03', '2024-03')
+    assert result['totals']['count'] == 0
+
+
+def test_allocation_never_exceeds_available_interest(db):
+    loan_id = db.create_loan('Meena', '', 100000, '2024-01-05', 1.0, 5, 0, '', '', None, '')
+    db.add_payment(loan_id, '2024-03-05', '2024-03', 100.009, 100.009, 0, 'Cash', '', '')
+    borrower_id = db.get_or_create_borrower('Meena')
+    chit_id = db.create_chit_group('Group B', 500, '2024-03')
+    db.link_borrower_to_chit(borrower_id, chit_id)
+
+    result = db.auto_allocate_interest('2024-03', '2024-03')
+    assert [a['amount'] for a in result['allocations']] == [100.0]
+    assert all(a['amount'] >= 0.01 for a in result['allocations'])
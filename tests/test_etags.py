@@ -0,0 +1,69 @@
+"""
+Checks for the ETag / 304 Not Modified handling of read endpoints.
+
+Run from the repository root with: python -m pytest tests
+"""
+
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture
+def loan(db):
+    return db.create_loan('Ravi', '', 100000, '2024-01-05', 1.0, 5, 0, '', '', None, '')
+
+
+@pytest.fixture
+def client(db):
+    import app as app_module
+
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['logged_in'] = True
+    return client
+
+
+def test_matching_if_none_match_gets_304_without_queries(db, loan, client):
+    first = client.get('/api/loans/summary')
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'no-cache'
+    etag = first.headers['ETag']
+
+    with db.query_log.track() as stats:
+        again = client.get('/api/loans/summary', headers={'If-None-Match': etag})
+
+    assert again.status_code == 304
+    assert again.get_data() == b''
+    assert again.headers['ETag'] == etag
+    assert stats.queries == 0
+
+
+def test_etag_differs_per_query_string(loan, client):
+    assert (client.get('/api/loans?status=Active').headers['ETag']
+            != client.get('/api/loans?status=Closed').headers['ETag'])
+
+
+def test_write_changes_the_etag(db, loan, client):
+    etag = client.get('/api/loans/summary').headers['ETag']
+
+    db.add_payment(loan, '2024-03-05', '2024-03', 1000, 1000, 0, 'Cash', '', '')
+
+    response = client.get('/api/loans/summary', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_write_from_another_connection_changes_the_signature(db, loan, client):
+    signature = db.get_data_signature()
+    etag = client.get('/api/loans/summary').headers['ETag']
+
+    other = sqlite3.connect(db.DB_PATH)
+    other.execute('UPDATE loans SET monthly_rate = 2.0 WHERE id = ?', (loan,))
+    other.commit()
+    other.close()
+
+    assert db.get_data_signature() != signature
+    response = client.get('/api/loans/summary', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
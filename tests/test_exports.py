@@ -0,0 +1,31 @@
+"""
+Regression checks for the streamed CSV exports.
+
+Run from the repository root with: python -m pytest tests
+"""
+
+import pytest
+
+
+@pytest.fixture
+def client(db):
+    import app as app_module
+
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['logged_in'] = True
+    return client
+
+
+@pytest.mark.parametrize('path', ['/api/export/loans', '/api/export/payments'])
+def test_empty_export_is_an_empty_file(client, path):
+    response = client.get(path)
+    assert response.status_code == 200
+    assert response.get_data() == b''
+
+
+def test_export_writes_header_then_rows(client, db):
+    db.create_loan('Ravi', '', 100000, '2024-01-05', 1.0, 5, 0, '', '', None, '')
+    lines = client.get('/api/export/loans').get_data(as_text=True).splitlines()
+    assert len(lines) == 2
+    assert lines[1].split(',')[0] not in lines[0].split(',')
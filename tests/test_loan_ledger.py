@@ -0,0 +1,156 @@
+"""
+Checks that the persisted loan ledger (loan_month_ledger) stays equal to a
+full rebuild after every kind of write, and that pending interest still
+matches a month-by-month walk over the payments.
+
+Run from the repository root with: python -m pytest tests
+"""
+
+import sqlite3
+
+import pytest
+
+from database.loan_logic import month_from_index, month_index
+
+MONTHS = ['2023-12', '2024-01', '2024-02', '2024-03', '2024-04', '2024-06', '2024-09', '2025-01']
+
+
+def _reference_pending(conn, loan_id, up_to_month):
+    """Pending interest walked month by month from loans and payments (no ledger)."""
+    loan = conn.execute('SELECT * FROM loans WHERE id = ?', (loan_id,)).fetchone()
+    end = up_to_month
+    if loan['closed_date'] and loan['closed_date'][:7] < end:
+        end = loan['closed_date'][:7]
+
+    pending = 0
+    for index in range(month_index(loan['given_date']), month_index(end) + 1):
+        month = month_from_index(index)
+        principal_before, interest_paid = conn.execute('''
+            SELECT SUM(CASE WHEN interest_month < ? THEN principal_paid END),
+                   SUM(CASE WHEN interest_month = ? THEN interest_paid END)
+            FROM payments WHERE loan_id = ?
+        ''', (month, month, loan_id)).fetchone()
+        opening = loan['principal_given'] - (principal_before or 0)
+        pending += round(opening * loan['monthly_rate'] / 100, 2) - (interest_paid or 0)
+    return round(pending, 2)
+
+
+def _ledger(conn):
+    return conn.execute('SELECT * FROM loan_month_ledger ORDER BY loan_id, interest_month').fetchall()
+
+
+def assert_ledger_consistent(db):
+    """Pending interest matches the reference, and the ledger matches a rebuild."""
+    conn = sqlite3.connect(db.DB_PATH)
+    conn.row_factory = sqlite3.Row
+    try:
+        loan_ids = [row[0] for row in conn.execute('SELECT id FROM loans')]
+        for loan_id in loan_ids:
+            for month in MONTHS:
+                # Reads bring stale ledger rows up to date first
+                assert db.calculate_pending_interest(loan_id, month) == pytest.approx(
+                    _reference_pending(conn, loan_id, month)
+                ), (loan_id, month)
+
+        assert conn.execute('SELECT COUNT(*) FROM loan_ledger_stale').fetchone()[0] == 0
+        incremental = [tuple(row) for row in _ledger(conn)]
+        db.rebuild_loan_ledger()
+        assert [tuple(row) for row in _ledger(conn)] == incremental
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def loan(db):
+    loan_id = db.create_loan('Ravi', '', 100000, '2024-01-05', 2.0, 5, 0, '', '', None, '')
+    db.create_loan('Lakshmi', '', 50000, '2024-02-10', 1.5, 10, 0, '', '', None, '')
+    return loan_id
+
+
+def _pay(db, loan_id, month, interest, principal=0):
+    db.add_payment(loan_id, f'{month}-05', month, interest + principal, interest, principal, 'Cash', '', '')
+
+
+def test_add_payment(db, loan):
+    _pay(db, loan, '2024-01', 2000)
+    _pay(db, loan, '2024-02', 1000, 20000)
+    _pay(db, loan, '2024-04', 1600)
+    assert_ledger_consistent(db)
+
+    # An earlier month after later ones, and a second payment for a month
+    _pay(db, loan, '2024-03', 1600, 10000)
+    _pay(db, loan, '2024-02', 500)
+    assert_ledger_consistent(db)
+
+
+def test_update_loan_terms(db, loan):
+    _pay(db, loan, '2024-01', 2000)
+    _pay(db, loan, '2024-03', 1000, 20000)
+    assert_ledger_consistent(db)
+
+    db.update_loan(loan, 'Ravi', '', 100000, 80000, '2024-01-05', 2.5, 5, 0, '', '', None, '')
+    assert_ledger_consistent(db)
+
+    # Only the rate, changed outside the app
+    conn = sqlite3.connect(db.DB_PATH)
+    conn.execute('UPDATE loans SET monthly_rate = 3.0 WHERE id = ?', (loan,))
+    conn.commit()
+    conn.close()
+    assert_ledger_consistent(db)
+
+    db.update_loan(loan, 'Ravi', '', 120000, 100000, '2023-12-20', 2.5, 5, 0, '', '', None, '')
+    assert_ledger_consistent(db)
+
+
+def test_close_loan(db, loan):
+    _pay(db, loan, '2024-01', 2000)
+    _pay(db, loan, '2024-02', 2000, 50000)
+    db.close_loan(loan, 'Settled')
+    assert_ledger_consistent(db)
+
+    # Closed date moved back to before the later months
+    conn = sqlite3.connect(db.DB_PATH)
+    conn.execute("UPDATE loans SET closed_date = '2024-03-15' WHERE id = ?", (loan,))
+    conn.commit()
+    conn.close()
+    assert_ledger_consistent(db)
+
+
+def test_create_chit_adjustment(db, loan):
+    _pay(db, loan, '2024-01', 2000)
+    chit_id = db.create_individual_chit('Ravi', 'C1', 3, '2024-02-01', [1500, 1500, 1500])
+    conn = sqlite3.connect(db.DB_PATH)
+    schedule_id = conn.execute(
+        'SELECT id FROM chit_monthly_schedule WHERE chit_id = ? ORDER BY month_number', (chit_id,)
+    ).fetchone()[0]
+    conn.close()
+
+    db.create_chit_adjustment(schedule_id, loan, '2024-02', 1500)
+    assert_ledger_consistent(db)
+
+
+def test_payment_edits_and_deletes_from_another_connection(db, loan):
+    for month in ('2024-01', '2024-02', '2024-03', '2024-04'):
+        _pay(db, loan, month, 2000, 5000 if month == '2024-02' else 0)
+    assert_ledger_consistent(db)
+
+    conn = sqlite3.connect(db.DB_PATH)
+    conn.execute("UPDATE payments SET principal_paid = 15000, total_received = 17000 "
+                 "WHERE loan_id = ? AND interest_month = '2024-02'", (loan,))
+    conn.commit()
+    assert_ledger_consistent(db)
+
+    conn.execute("UPDATE payments SET interest_month = '2024-06' "
+                 "WHERE loan_id = ? AND interest_month = '2024-03'", (loan,))
+    conn.commit()
+    assert_ledger_consistent(db)
+
+    # Latest payment removed, then one in the middle
+    conn.execute("DELETE FROM payments WHERE loan_id = ? AND interest_month = '2024-06'", (loan,))
+    conn.commit()
+    assert_ledger_consistent(db)
+
+    conn.execute("DELETE FROM payments WHERE loan_id = ? AND interest_month = '2024-01'", (loan,))
+    conn.commit()
+    conn.close()
+    assert_ledger_consistent(db)
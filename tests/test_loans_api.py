@@ -0,0 +1,39 @@
+"""
+Checks for the /api/loans paging arguments.
+
+Run from the repository root with: python -m pytest tests
+"""
+
+import pytest
+
+
+@pytest.fixture
+def client(db):
+    import app as app_module
+
+    for name in ('Ravi', 'Lakshmi', 'Suresh'):
+        db.create_loan(name, '', 100000, '2024-01-05', 1.0, 5, 0, '', '', None, '')
+
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['logged_in'] = True
+    return client
+
+
+def test_limit_pages_through_loans(client):
+    page = client.get('/api/loans?limit=2').get_json()
+    assert len(page['loans']) == 2
+    rest = client.get(f'/api/loans?limit=2&cursor={page["next_cursor"]}').get_json()
+    assert len(rest['loans']) == 1
+    assert rest['next_cursor'] is None
+
+
+def test_without_limit_returns_every_loan(client):
+    assert len(client.get('/api/loans').get_json()) == 3
+
+
+@pytest.mark.parametrize('limit', ['abc', '1.5', '0', '-1'])
+def test_invalid_limit_is_rejected(client, limit):
+    response = client.get(f'/api/loans?limit={limit}')
+    assert response.status_code == 400
+    assert 'limit' in response.get_json()['error']
@@ -0,0 +1,36 @@
+"""
+Checks for the /api/out-of-pocket-payments paging arguments.
+
+Run from the repository root with: python -m pytest tests
+"""
+
+import pytest
+
+
+@pytest.fixture
+def client(db):
+    import app as app_module
+
+    db.create_individual_chit('Ravi', 'C1', 3, '2024-03-01', [1000, 1000, 1000])
+    for schedule_id, paid_date in ((1, '2024-03-01'), (2, '2024-04-01'), (3, '2024-05-01')):
+        db.pay_chit_schedule(schedule_id, 1000, paid_date, 'Cash')
+
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['logged_in'] = True
+    return client
+
+
+def test_limit_pages_through_payments(client):
+    page = client.get('/api/out-of-pocket-payments?limit=2').get_json()
+    assert [row['paid_date'] for row in page['payments']] == ['2024-05-01', '2024-04-01']
+    rest = client.get(f'/api/out-of-pocket-payments?limit=2&cursor={page["next_cursor"]}').get_json()
+    assert [row['paid_date'] for row in rest['payments']] == ['2024-03-01']
+    assert rest['next_cursor'] is None
+
+
+@pytest.mark.parametrize('limit', ['abc', '1.5', '0', '-1'])
+def test_invalid_limit_is_rejected(client, limit):
+    response = client.get(f'/api/out-of-pocket-payments?limit={limit}')
+    assert response.status_code == 400
+    assert 'limit' in response.get_json()['error']
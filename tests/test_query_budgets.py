@@ -0,0 +1,97 @@
+"""
+SQL statement budgets for the read routes.
+
+Each route is requested through the Flask test client inside
+db_manager.query_log.budget(); a route that runs more statements than its
+budget (typically an N+1 loop creeping back in) fails. Budgets do not depend
+on the amount of data, so a small generated portfolio is enough.
+
+Run from the repository root with: python -m pytest tests
+"""
+
+import sqlite3
+
+import pytest
+
+from benchmarks.generate_data import generate
+
+# (path, most statements allowed); {loan}, {borrower}, {name}, {chit},
+# {group}, {month} and {first_month} are filled from the database
+ROUTE_BUDGETS = [
+    ('/api/loans?status=Active', 1),
+    ('/api/loans?status=Active&limit=50', 1),
+    ('/api/loans/summary', 1),
+    ('/api/loans/{loan}', 5),
+    ('/api/loans/{loan}/interest-due', 5),
+    ('/api/payments/{loan}', 1),
+    ('/api/borrowers', 1),
+    ('/api/person-history/{name}', 3),
+    ('/api/recent-payments', 1),
+    ('/api/monthly-report?month={month}', 3),
+    ('/api/export/loans', 1),
+    ('/api/export/payments', 1),
+    ('/api/chits', 1),
+    ('/api/chits/dashboard', 1),
+    ('/api/chits/{chit}', 2),
+    ('/api/pending-chit-dues', 1),
+    ('/api/out-of-pocket-payments?limit=100', 1),
+    ('/api/chit-groups', 1),
+    ('/api/borrower-chit-links', 1),
+    ('/api/adjustments', 1),
+    ('/api/direct-chit-payments', 1),
+    ('/api/interest-view/{borrower}/{month}', 4),
+    ('/api/chit-month-view/{borrower}/{group}/{month}', 1),
+    ('/api/chit-grid?from={first_month}&to={month}', 3),
+    ('/api/borrower-chit-summary/{borrower}', 1),
+    ('/api/borrower-chit-summary?all=1', 1),
+]
+
+
+def _placeholders(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        month = conn.execute('SELECT MAX(interest_month) FROM payments').fetchone()[0]
+        link = conn.execute('SELECT borrower_id, chit_id FROM borrower_chit_links ORDER BY 1, 2').fetchone()
+        loan = conn.execute('SELECT id, borrower_id FROM loans ORDER BY id').fetchone()
+        return {
+            'loan': loan[0],
+            'name': conn.execute('SELECT name FROM borrowers WHERE id = ?', (loan[1],)).fetchone()[0],
+            'borrower': link[0],
+            'group': link[1],
+            'chit': conn.execute('SELECT MIN(id) FROM chits').fetchone()[0],
+            'month': month,
+            'first_month': f'{int(month[:4]) - 1}{month[4:]}'
+        }
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def portfolio(db):
+    """A few of every kind of row, so loops over borrowers, loans or chits show up."""
+    generate(db.DB_PATH, borrowers=20, loans=30, payments=400, chit_groups=3, links=10,
+             adjustments=40, direct_payments=10, chits=5)
+    return _placeholders(db.DB_PATH)
+
+
+@pytest.fixture
+def client(db):
+    import app as app_module
+
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['logged_in'] = True
+    return client
+
+
+@pytest.mark.parametrize('template, budget', ROUTE_BUDGETS)
+def test_route_within_query_budget(db, portfolio, client, template, budget):
+    path = template.format(**portfolio)
+    db.result_cache.invalidate()
+
+    with db.query_log.budget(budget, path):
+        response = client.get(path)
+        response.get_data()  # run streamed responses to the end
+        response.close()
+
+    assert response.status_code == 200
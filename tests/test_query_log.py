@@ -0,0 +1,61 @@
+"""
+Checks for statement timing and the slow-query log.
+
+Run from the repository root with: python -m pytest tests
+"""
+
+import sqlite3
+import time
+
+from database import db_manager
+from database.query_log import QueryLog
+
+
+def _connect(query_log):
+    conn = sqlite3.connect(':memory:', factory=db_manager._CountingConnection)
+    conn.query_log = query_log
+    # Each call takes 20 ms; in an unsorted scan the calls happen while fetching
+    conn.create_function('pause', 1, lambda value: time.sleep(0.02) or value)
+    conn.execute('CREATE TABLE t (x INTEGER)')
+    conn.executemany('INSERT INTO t (x) VALUES (?)', [(i,) for i in range(6)])
+    return conn
+
+
+def test_fetch_time_counts_towards_slow_queries():
+    query_log = QueryLog(slow_query_ms=60)
+    conn = _connect(query_log)
+
+    with query_log.track() as stats:
+        rows = [row[0] for row in conn.execute('SELECT pause(x) FROM t')]
+
+    assert rows == list(range(6))
+    assert stats.queries == 1
+    assert stats.rows == 6
+    assert stats.seconds >= 0.12
+    assert stats.slow == 1
+    (entry,) = query_log.recent_slow_queries()
+    assert entry['sql'] == 'SELECT pause(x) FROM t'
+    assert entry['rows'] == 6
+    assert entry['time_ms'] >= 120
+
+
+def test_statement_slow_at_execute_is_logged_once():
+    query_log = QueryLog(slow_query_ms=60)
+    conn = _connect(query_log)
+
+    # ORDER BY on the function result runs every call inside execute()
+    rows = conn.execute('SELECT pause(x) AS y FROM t ORDER BY y DESC').fetchall()
+
+    assert len(rows) == 6
+    assert len(query_log.recent_slow_queries()) == 1
+    assert query_log.totals.slow == 1
+
+
+def test_fast_statements_are_not_logged():
+    query_log = QueryLog(slow_query_ms=60)
+    conn = _connect(query_log)
+
+    assert conn.execute('SELECT x FROM t WHERE x = 3').fetchone()[0] == 3
+    assert conn.execute('SELECT COUNT(*) FROM t').fetchall() == [(6,)]
+    assert query_log.recent_slow_queries() == []
+    assert query_log.totals.queries == 4
@@ -0,0 +1,57 @@
+"""
+Regression checks for the result cache and its invalidation by writes.
+
+Run from the repository root with: python -m pytest tests
+"""
+
+import pytest
+
+
+@pytest.fixture
+def loan(db):
+    return db.create_loan('Ravi', '', 100000, '2024-01-05', 1.0, 5, 0, '', '', None, '')
+
+
+def test_hit_returns_the_stored_result_read_only(db, loan):
+    report = db.get_monthly_report('2024-03')
+
+    assert db.get_monthly_report('2024-03') is report
+    with pytest.raises(TypeError):
+        report['not_paid'].append({})
+    with pytest.raises(TypeError):
+        report['totals']['total_received'] = 1
+
+
+def test_add_payment_invalidates_reports(db, loan):
+    assert db.get_monthly_report('2024-03')['totals']['total_received'] == 0
+    summary = db.get_loans_summary()
+
+    db.add_payment(loan, '2024-03-05', '2024-03', 1500, 1000, 500, 'Cash', '', '')
+
+    assert db.get_monthly_report('2024-03')['totals']['total_received'] == 1500
+    assert db.get_loans_summary() != summary
+
+
+def test_create_adjustment_invalidates_chit_summaries(db, loan):
+    db.add_payment(loan, '2024-03-05', '2024-03', 1000, 1000, 0, 'Cash', '', '')
+    borrower_id = db.get_or_create_borrower('Ravi')
+    chit_id = db.create_chit_group('Group A', 5000, '2024-03')
+    db.link_borrower_to_chit(borrower_id, chit_id)
+    before = db.get_borrower_chit_summaries(borrower_id)
+
+    db.create_adjustment(borrower_id, '2024-03', chit_id, '2024-03', 800)
+
+    assert db.get_borrower_chit_summaries(borrower_id) != before
+
+
+def test_pay_chit_schedule_invalidates_pending_dues(db):
+    db.create_individual_chit('Ravi', 'C1', 3, '2024-03-01', [1000, 1000, 1000])
+    dues = db.get_pending_chit_dues(to_date='2024-12-31')
+    assert dues['count'] == 3
+
+    db.pay_chit_schedule(dues['dues'][0]['id'], 400, '2024-03-01')
+    db.pay_chit_schedule(dues['dues'][1]['id'], 1000, '2024-04-01')
+
+    dues = db.get_pending_chit_dues(to_date='2024-12-31')
+    assert dues['count'] == 2
+    assert dues['total_paid'] == 400